@@ -24,6 +24,9 @@ if __name__ == "__main__":
         print("  python run.py cancelador")
         print("  python run.py painel")
         print("  python run.py stop")
+        print("  python run.py backtest <books.jsonl> [--modo tracker|engine] [--db ./data/backtest.db]")
+        print("  python run.py manutencao [--logs-dias 7] [--eventos-dias 30] [--arquivo ./data/arquivo]")
+        print("  python run.py exportar [--destino ./data/export] [--formato parquet|npy] [--tabela trades]")
         sys.exit(1)
     
     script = sys.argv[1]
@@ -42,9 +45,18 @@ if __name__ == "__main__":
         elif script == "stop":
             from stop_bot import stop_bot
             stop_bot()
+        elif script == "backtest":
+            from simulacao.backtest import main as backtest
+            backtest(sys.argv[2:])
+        elif script == "manutencao":
+            from repository.manutencao import main as manutencao
+            manutencao(sys.argv[2:])
+        elif script == "exportar":
+            from repository.exportacao import main as exportar
+            exportar(sys.argv[2:])
         else:
             print(f"Script '{script}' não reconhecido")
-            print("Scripts disponíveis: main, cancelador, painel, stop")
+            print("Scripts disponíveis: main, cancelador, painel, stop, backtest, manutencao, exportar")
             sys.exit(1)
     except Exception as e:
         print(f"Erro ao executar {script}: {e}")
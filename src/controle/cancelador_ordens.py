@@ -1,4 +1,5 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import os
 from pathlib import Path
@@ -12,6 +13,7 @@ from services.log_service import LogService
 from services.exchange_executor import ExchangeExecutor
 
 TEMPO_MAXIMO = 60  # segundos
+MAX_WORKERS = 8
 
 def cancelar_ordens_pendentes():
     DATA_DIR = os.getenv("DATA_DIR", "./data")  # Valor padrão se não estiver definido
@@ -25,24 +27,42 @@ def cancelar_ordens_pendentes():
     ordens = db.listar_ordens_abertas()
 
     agora = datetime.utcnow()
+    vencidas = []
     for ordem in ordens:
         ordem_id, symbol, side, price, quantity, created_at = ordem
         tempo = agora - datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
 
         if tempo.total_seconds() > TEMPO_MAXIMO:
-            try:
-                status = executor.fetch_order_status(ordem_id, symbol)
-                if status["status"] == "open":
-                    executor.cancel_order(ordem_id, symbol)
-                    log.warn(f"🛑 Ordem {ordem_id} cancelada por timeout ({symbol})")
-                else:
-                    log.info(f"✅ Ordem {ordem_id} já executada")
+            vencidas.append((ordem_id, symbol))
 
-            except Exception as e:
-                log.error(f"Erro ao cancelar {ordem_id}: {e}")
+    if not ordens:
+        print("Nenhuma ordem pendente")
 
-            db.remover_ordem_aberta(ordem_id)   
-    else:
-        print("Nenhuma ordem pendente") 
+    # Consulta e cancelamento em paralelo; banco e log ficam na thread principal
+    if vencidas:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(vencidas))) as pool:
+            resultados = list(pool.map(lambda o: _verificar_e_cancelar(executor, *o), vencidas))
+
+        for (ordem_id, symbol), (situacao, erro) in zip(vencidas, resultados):
+            if situacao == "cancelada":
+                log.warn(f"🛑 Ordem {ordem_id} cancelada por timeout ({symbol})")
+            elif situacao == "executada":
+                log.info(f"✅ Ordem {ordem_id} já executada")
+            else:
+                log.error(f"Erro ao cancelar {ordem_id}: {erro}")
+
+            db.remover_ordem_aberta(ordem_id)
 
     db.close()
+
+
+def _verificar_e_cancelar(executor, ordem_id, symbol):
+    """Retorna ("cancelada" | "executada" | "erro", mensagem de erro)"""
+    try:
+        status = executor.fetch_order_status(ordem_id, symbol)
+        if status["status"] == "open":
+            executor.cancel_order(ordem_id, symbol)
+            return "cancelada", None
+        return "executada", None
+    except Exception as e:
+        return "erro", e
@@ -1,29 +1,143 @@
+import threading
+
+
+class Reserva:
+    """
+    Capital reservado por um ciclo. liberar() é idempotente, então pode ser chamado
+    em todos os caminhos de saída (fill, cancelamento, exceção) sem liberar duas vezes.
+    Também funciona como context manager: libera ao sair do bloco.
+    """
+
+    __slots__ = ("_gerenciador", "par", "valor", "ativa")
+
+    def __init__(self, gerenciador, par, valor):
+        self._gerenciador = gerenciador
+        self.par = par
+        self.valor = valor
+        self.ativa = True
+
+    def liberar(self):
+        self._gerenciador._liberar_reserva(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+        return False
+
+    def __repr__(self):
+        return f"Reserva({self.par}, {self.valor:.4f}, ativa={self.ativa})"
+
+
 class CapitalManager:
-    def __init__(self, limite_por_par):
+    def __init__(self, limite_por_par, limite_global=None):
         """
         limite_por_par = {
             "BTC/USDT": 10,
             "ETH/USDT": 20
         }
+        limite_global: teto da soma do capital em uso em todos os pares (None = sem teto)
         """
         self.limite_por_par = limite_por_par
+        self.limite_global = limite_global
         self.capital_em_uso = {}  # Ex: {"BTC/USDT": 10.0}
+        self.total_em_uso = 0.0
+        self.reservas_ativas = 0
+        self.recusas = 0
+        # Só protege as contas: nenhuma chamada de rede acontece com o lock na mão
+        self._lock = threading.Lock()
 
-    def pode_usar_capital(self, par, valor):
-        """Verifica se há saldo liberado para usar no par"""
+    def atualizar_limites(self, limite_por_par, limite_global=None):
+        """Troca os limites (config recarregado); reservas ativas continuam valendo"""
+        with self._lock:
+            self.limite_por_par = limite_por_par
+            self.limite_global = limite_global
+
+    def _cabe(self, par, valor):
         usado = self.capital_em_uso.get(par, 0)
         limite = self.limite_por_par.get(par, 0)
-        return (usado + valor) <= limite
+        if usado + valor > limite:
+            return False
+        return self.limite_global is None or self.total_em_uso + valor <= self.limite_global
+
+    def _somar(self, par, valor):
+        self.capital_em_uso[par] = self.capital_em_uso.get(par, 0) + valor
+        self.total_em_uso += valor
+
+    def _subtrair(self, par, valor):
+        if par in self.capital_em_uso:
+            liberado = min(valor, self.capital_em_uso[par])
+            self.capital_em_uso[par] -= liberado
+            self.total_em_uso = max(self.total_em_uso - liberado, 0.0)
+
+    def tentar_reservar(self, par, valor):
+        """
+        Verifica o limite do par e o limite global e reserva na mesma operação.
+        Retorna uma Reserva, ou None se o capital não couber.
+        """
+        with self._lock:
+            if not self._cabe(par, valor):
+                self.recusas += 1
+                return None
+            self._somar(par, valor)
+            self.reservas_ativas += 1
+        return Reserva(self, par, valor)
+
+    def _liberar_reserva(self, reserva):
+        with self._lock:
+            if not reserva.ativa:
+                return
+            reserva.ativa = False
+            self.reservas_ativas -= 1
+            self._subtrair(reserva.par, reserva.valor)
+
+    def pode_usar_capital(self, par, valor):
+        """Verifica se há saldo liberado para usar no par (só consulta; para reservar use tentar_reservar)"""
+        with self._lock:
+            return self._cabe(par, valor)
+
+    def _folga_global(self):
+        return float("inf") if self.limite_global is None else self.limite_global - self.total_em_uso
+
+    def folga_global(self):
+        """
+        Capital ainda disponível no limite global (None sem limite). É o `capital_total`
+        do planejamento: folgas() dá a cada par a folga global inteira, e só o corte
+        acumulado do planejador impede N pares de somarem mais que o limite.
+        """
+        with self._lock:
+            return None if self.limite_global is None else max(self._folga_global(), 0.0)
+
+    def folgas(self, pares):
+        """Capital ainda disponível em cada par (mesma ordem de `pares`), para o planejamento em lote"""
+        with self._lock:
+            folga_global = self._folga_global()
+            return [min(self.limite_por_par.get(par, 0) - self.capital_em_uso.get(par, 0), folga_global)
+                    for par in pares]
+
+    def snapshot(self):
+        """Cópia consistente do estado para monitoramento"""
+        with self._lock:
+            por_par = {
+                par: {"em_uso": self.capital_em_uso.get(par, 0), "limite": limite,
+                      "folga": limite - self.capital_em_uso.get(par, 0)}
+                for par, limite in self.limite_por_par.items()
+            }
+            return {
+                "por_par": por_par,
+                "total_em_uso": self.total_em_uso,
+                "limite_global": self.limite_global,
+                "reservas_ativas": self.reservas_ativas,
+                "recusas": self.recusas,
+            }
 
     def reservar_capital(self, par, valor):
-        """Reserva parte do capital no par"""
-        if par not in self.capital_em_uso:
-            self.capital_em_uso[par] = 0
-        self.capital_em_uso[par] += valor
+        """Reserva parte do capital no par, sem verificar limites (prefira tentar_reservar)"""
+        with self._lock:
+            self._somar(par, valor)
 
     def liberar_capital(self, par, valor):
         """Libera o capital quando a posição se encerra"""
-        if par in self.capital_em_uso:
-            self.capital_em_uso[par] -= valor
-            if self.capital_em_uso[par] < 0:
-                self.capital_em_uso[par] = 0
+        with self._lock:
+            self._subtrair(par, valor)
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+MAX_CICLOS_SIMULTANEOS = 4
+
+
+class ExecutorCiclos:
+    """
+    Roda ciclos de trade de pares diferentes em paralelo num pool de threads.
+    - No máximo `max_simultaneos` ciclos em andamento ao mesmo tempo
+    - Nunca dois ciclos do mesmo par ao mesmo tempo: o par em andamento é pulado
+      (não enfileira), e volta a ser elegível quando o ciclo dele termina
+    O loop principal não espera os ciclos: um fill lento num par não atrasa
+    a entrada nos demais.
+    """
+
+    def __init__(self, max_simultaneos=MAX_CICLOS_SIMULTANEOS, logger=None):
+        self.max_simultaneos = max_simultaneos
+        self.log = logger
+        self._pool = ThreadPoolExecutor(max_workers=max_simultaneos, thread_name_prefix="ciclo")
+        self._em_andamento = {}  # par -> Future
+        self._lock = threading.Lock()
+        self.concluidos = 0
+        self.pulados = 0
+
+    def submeter(self, symbol, funcao, *args, **kwargs):
+        """Agenda o ciclo do par; retorna False se o par já está em andamento ou o limite foi atingido"""
+        with self._lock:
+            if symbol in self._em_andamento or len(self._em_andamento) >= self.max_simultaneos:
+                self.pulados += 1
+                return False
+            futuro = self._pool.submit(self._executar, symbol, funcao, args, kwargs)
+            self._em_andamento[symbol] = futuro
+            return True
+
+    def _executar(self, symbol, funcao, args, kwargs):
+        try:
+            return funcao(*args, **kwargs)
+        except Exception as e:
+            if self.log:
+                self.log.error(f"{symbol} | Erro no ciclo concorrente: {e}")
+        finally:
+            with self._lock:
+                self._em_andamento.pop(symbol, None)
+                self.concluidos += 1
+
+    def em_andamento(self):
+        with self._lock:
+            return list(self._em_andamento)
+
+    def vagas(self):
+        with self._lock:
+            return self.max_simultaneos - len(self._em_andamento)
+
+    def aguardar_todos(self, timeout=None):
+        with self._lock:
+            futuros = list(self._em_andamento.values())
+        wait(futuros, timeout=timeout)
+
+    def encerrar(self, timeout=None):
+        """Espera os ciclos em andamento terminarem e fecha o pool"""
+        self.aguardar_todos(timeout)
+        self._pool.shutdown(wait=False)
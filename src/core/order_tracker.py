@@ -1,15 +1,26 @@
-import time
-from datetime import datetime
+from core.order_watcher import OrderWatcher, EXECUTADA
 
 class OrderTracker:
-    def __init__(self, executor, logger, db_repo, capital_manager=None, tempo_max_espera=15):
+    def __init__(self, executor, logger, db_repo, capital_manager=None, tempo_max_espera=15,
+                 relogio=None, intervalo_polling=1, watcher=None):
         self.executor = executor
         self.log = logger
         self.db = db_repo
         self.capital_manager = capital_manager
         self.timeout = tempo_max_espera
+        # Um watcher compartilhado (com iniciar(), criado no main) acompanha as ordens de
+        # todos os trackers com uma consulta por tick e cada ciclo só espera o próprio Future;
+        # sem ele o tracker conduz um watcher próprio na thread do chamador
+        self.watcher = watcher or OrderWatcher(
+            executor, intervalo=intervalo_polling, tempo_max_espera=tempo_max_espera, relogio=relogio, logger=logger
+        )
 
-    def executar_ordem_completa(self, symbol, quantidade, preco_compra, preco_venda):
+    def executar_ordem_completa(self, symbol, quantidade, preco_compra, preco_venda, reserva=None):
+        """
+        `reserva` (CapitalManager.tentar_reservar) é liberada ao final em qualquer caso:
+        ida e volta completa, cancelamento por timeout ou exceção. Sem ela, o capital
+        reservado por quem chama é liberado com liberar_capital (exceto com a venda cancelada).
+        """
         try:
             # Enviar ordem limit de compra
             ordem = self.executor.place_limit_order(symbol, "buy", preco_compra, quantidade)
@@ -23,8 +34,7 @@ class OrderTracker:
                 self.executor.cancel_order(ordem_id, symbol)
                 self.log.warn(f"{symbol} | Ordem {ordem_id} cancelada por timeout")
                 self.db.remover_ordem_aberta(ordem_id)
-                if self.capital_manager:
-                    self.capital_manager.liberar_capital(symbol, preco_compra * quantidade)
+                self._liberar_capital(reserva, symbol, preco_compra * quantidade)
                 return
 
             # Buscar rebate real
@@ -63,23 +73,30 @@ class OrderTracker:
             self.db.save_trade(symbol, "buy", preco_compra, quantidade, rebate=rebate, pnl=0)
             self.db.save_trade(symbol, "sell", preco_venda, quantidade, rebate=0, pnl=pnl)
 
-            if self.capital_manager:
-                self.capital_manager.liberar_capital(symbol, preco_compra * quantidade)
+            self._liberar_capital(reserva, symbol, preco_compra * quantidade)
 
             self.log.info(f"{symbol} | Trade finalizado. P&L: {pnl:.5f} | 🎁 Rebate: {rebate:.5f}")
 
         except Exception as e:
             self.log.error(f"{symbol} | Erro geral na execução da ordem: {str(e)}")
-            if self.capital_manager:
-                self.capital_manager.liberar_capital(symbol, preco_compra * quantidade)
+            self._liberar_capital(reserva, symbol, preco_compra * quantidade)
+
+        finally:
+            if reserva is not None:
+                reserva.liberar()
+
+    def _liberar_capital(self, reserva, symbol, valor):
+        if reserva is not None:
+            reserva.liberar()
+        elif self.capital_manager:
+            self.capital_manager.liberar_capital(symbol, valor)
 
     def _aguardar_execucao(self, ordem_id, symbol):
-        inicio = datetime.utcnow()
-        while (datetime.utcnow() - inicio).total_seconds() < self.timeout:
-            status = self.executor.fetch_order_status(ordem_id, symbol)
-            if status["status"] == "closed":
-                self.log.info(f"{symbol} | Ordem {ordem_id} executada.")
-                self.db.remover_ordem_aberta(ordem_id)
-                return True
-            time.sleep(1)
+        resultado = self.watcher.aguardar(self.watcher.acompanhar(ordem_id, symbol, timeout=self.timeout))
+        if resultado["estado"] == EXECUTADA:
+            self.log.info(f"{symbol} | Ordem {ordem_id} executada.")
+            self.db.remover_ordem_aberta(ordem_id)
+            return True
+        if resultado["filled"]:
+            self.log.warn(f"{symbol} | Ordem {ordem_id} parcialmente executada ({resultado['filled']}) | Estado: {resultado['estado']}")
         return False
@@ -0,0 +1,249 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# Estados entregues ao chamador
+EXECUTADA = "executada"
+PARCIAL = "parcial"
+CANCELADA = "cancelada"
+TIMEOUT = "timeout"
+ERRO = "erro"
+
+STATUS_CANCELADOS = ("canceled", "cancelled", "expired", "rejected")
+MAX_FALHAS_CONSULTA = 3
+# Com poucos símbolos, fetch_open_orders por símbolo (peso 6) sai mais barato
+# do que a consulta da conta inteira (peso 80)
+MAX_SIMBOLOS_CONSULTA_INDIVIDUAL = 10
+
+
+class _Acompanhamento:
+    __slots__ = ("ordem_id", "symbol", "prazo", "callback", "futuro", "preenchido", "falhas")
+
+    def __init__(self, ordem_id, symbol, prazo, callback):
+        self.ordem_id = ordem_id
+        self.symbol = symbol
+        self.prazo = prazo
+        self.callback = callback
+        self.futuro = Future()
+        self.preenchido = 0.0
+        self.falhas = 0
+
+
+class OrderWatcher:
+    """
+    Acompanha todas as ordens pendentes do bot com uma consulta por tick
+    (fetch_open_orders) em vez de um fetch_order por ordem por segundo.
+
+    acompanhar() devolve um Future que é resolvido com
+    {"id", "symbol", "estado", "filled", "ordem"} quando a ordem é executada,
+    cancelada fora do bot ou atinge o prazo (estado TIMEOUT; cancelar fica a
+    cargo do chamador). O callback opcional recebe (estado, resultado) a cada
+    execução parcial e no estado final.
+
+    Só ordens que somem da lista de abertas custam um fetch_order (uma vez, para
+    saber o estado final). Com uma única ordem pendente o tick é um fetch_order
+    direto (peso 4), mais barato que abertas (peso 6) + consulta final.
+    Um stream de user data pode alimentar aplicar_atualizacao() diretamente com
+    ordens no formato ccxt.
+
+    Com iniciar() os ticks rodam numa thread; sem ela, aguardar() conduz os ticks
+    na thread do chamador (útil com relógio simulado).
+    """
+
+    def __init__(self, executor, intervalo=1.0, tempo_max_espera=15, relogio=None, logger=None):
+        self.executor = executor
+        self.log = logger
+        self.intervalo = intervalo
+        self.tempo_max_espera = tempo_max_espera
+        # relogio permite rodar com tempo simulado (simulacao/backtest); None = tempo real
+        self.relogio = relogio
+        self._pendentes = {}  # ordem_id -> _Acompanhamento
+        self._lock = threading.Lock()
+        self._lock_tick = threading.Lock()
+        self._thread = None
+        self._rodando = False
+        self._acordar = threading.Event()
+        self.ticks = 0
+        self.consultas = 0
+
+    # ---------- tempo ----------
+
+    def _agora(self):
+        return self.relogio.agora() if self.relogio else time.monotonic()
+
+    def _dormir(self, segundos):
+        if self.relogio:
+            self.relogio.dormir(segundos)
+        else:
+            time.sleep(segundos)
+
+    def _avisar(self, mensagem):
+        if self.log is not None:
+            self.log.warn(f"[WATCHER] {mensagem}")
+        else:
+            print(f"[WATCHER] {mensagem}")
+
+    # ---------- registro ----------
+
+    def acompanhar(self, ordem_id, symbol, timeout=None, callback=None):
+        prazo = self._agora() + (self.tempo_max_espera if timeout is None else timeout)
+        item = _Acompanhamento(ordem_id, symbol, prazo, callback)
+        with self._lock:
+            self._pendentes[ordem_id] = item
+        self._acordar.set()
+        return item.futuro
+
+    def esquecer(self, ordem_id):
+        with self._lock:
+            return self._pendentes.pop(ordem_id, None) is not None
+
+    @property
+    def pendentes(self):
+        with self._lock:
+            return len(self._pendentes)
+
+    # ---------- resolução ----------
+
+    def _resultado(self, item, estado, ordem):
+        return {
+            "id": item.ordem_id,
+            "symbol": item.symbol,
+            "estado": estado,
+            "filled": item.preenchido,
+            "ordem": ordem,
+        }
+
+    def _notificar(self, item, estado, ordem):
+        if item.callback is None:
+            return
+        try:
+            item.callback(estado, self._resultado(item, estado, ordem))
+        except Exception as e:
+            self._avisar(f"⚠️ Erro no callback da ordem {item.ordem_id}: {e}")
+
+    def _resolver(self, item, estado, ordem=None):
+        with self._lock:
+            if self._pendentes.pop(item.ordem_id, None) is None:
+                return
+        self._notificar(item, estado, ordem)
+        item.futuro.set_result(self._resultado(item, estado, ordem))
+
+    def aplicar_atualizacao(self, ordem):
+        """Aplica uma ordem no formato ccxt (REST ou user data stream)"""
+        with self._lock:
+            item = self._pendentes.get(ordem.get("id"))
+        if item is None:
+            return
+
+        preenchido = float(ordem.get("filled") or 0)
+        status = ordem.get("status")
+        if preenchido > item.preenchido:
+            item.preenchido = preenchido
+            if status == "open":
+                self._notificar(item, PARCIAL, ordem)
+
+        if status == "closed":
+            self._resolver(item, EXECUTADA, ordem)
+        elif status in STATUS_CANCELADOS:
+            self._resolver(item, CANCELADA, ordem)
+
+    # ---------- tick ----------
+
+    def _buscar_abertas(self, symbols):
+        if len(symbols) > MAX_SIMBOLOS_CONSULTA_INDIVIDUAL:
+            self.consultas += 1
+            return self.executor.fetch_open_orders()
+        abertas = []
+        for symbol in symbols:
+            self.consultas += 1
+            abertas.extend(self.executor.fetch_open_orders(symbol))
+        return abertas
+
+    def verificar(self):
+        """Um tick: consulta as ordens abertas e resolve o que mudou"""
+        with self._lock_tick:
+            with self._lock:
+                itens = list(self._pendentes.values())
+            if not itens:
+                return
+            self.ticks += 1
+
+            if len(itens) == 1:
+                # Uma ordem só: fetch_order direto em vez de abertas + consulta final
+                item = itens[0]
+                ordem = self._consultar_ordem(item)
+                if self._agora() >= item.prazo:
+                    self._resolver(item, TIMEOUT, ordem)
+                return
+
+            try:
+                abertas = {o["id"]: o for o in self._buscar_abertas(sorted({i.symbol for i in itens}))}
+            except Exception as e:
+                self._avisar(f"⚠️ Falha ao consultar ordens abertas: {e}")
+                abertas = None
+
+            agora = self._agora()
+            for item in itens:
+                ordem = None
+                if abertas is not None and item.ordem_id not in abertas:
+                    ordem = self._consultar_ordem(item)
+                elif abertas is not None:
+                    ordem = abertas[item.ordem_id]
+                    self.aplicar_atualizacao(ordem)
+                # Também vale quando a consulta individual ainda diz "open": o prazo não pode ser pulado
+                if agora >= item.prazo:
+                    self._resolver(item, TIMEOUT, ordem)
+
+    def _consultar_ordem(self, item):
+        """
+        Consulta individual da ordem: quando ela saiu das abertas (executou ou foi
+        cancelada) ou quando é a única pendente. Retorna a ordem lida (None se a consulta falhou)
+        """
+        try:
+            ordem = self.executor.fetch_order_status(item.ordem_id, item.symbol)
+        except Exception as e:
+            item.falhas += 1
+            if item.falhas >= MAX_FALHAS_CONSULTA:
+                self._avisar(f"❌ Ordem {item.ordem_id} sem estado após {item.falhas} tentativas: {e}")
+                self._resolver(item, ERRO)
+            return None
+        # Se ainda vier "open", segue acompanhando no próximo tick
+        self.aplicar_atualizacao(ordem)
+        return ordem
+
+    # ---------- espera ----------
+
+    def aguardar(self, futuro):
+        """Bloqueia até o Future resolver; sem thread própria, conduz os ticks aqui"""
+        if self._thread and self._thread.is_alive():
+            return futuro.result()
+        while not futuro.done():
+            self.verificar()
+            if futuro.done():
+                break
+            self._dormir(self.intervalo)
+        return futuro.result()
+
+    # ---------- ciclo de vida ----------
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._rodando = True
+        self._thread = threading.Thread(target=self._executar, name="order-watcher", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=5):
+        self._rodando = False
+        self._acordar.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _executar(self):
+        while self._rodando:
+            if not self.pendentes:
+                self._acordar.wait(self.intervalo)
+                self._acordar.clear()
+                continue
+            self.verificar()
+            time.sleep(self.intervalo)
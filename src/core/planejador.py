@@ -0,0 +1,110 @@
+import numpy as np
+
+TAXA_REBATE_MAKER = 0.0001  # rebate por perna sobre o notional (ordens limit maker)
+
+
+def rebate_esperado(preco_compra, preco_venda, quantidade, taxa_rebate=TAXA_REBATE_MAKER):
+    """
+    Rebate da ida e volta: taxa sobre o notional de compra + o de venda.
+    Fórmula única do planejador e do TradeEngine (aceita escalares ou arrays).
+    """
+    return taxa_rebate * (preco_compra + preco_venda) * quantidade
+
+
+def _normalizar(oportunidades):
+    """Aceita o dict do scanner (par -> dados) ou a lista do scorer (dicts com "symbol")"""
+    if isinstance(oportunidades, dict):
+        return [dict(dados, symbol=par) for par, dados in oportunidades.items()]
+    return list(oportunidades)
+
+
+def planejar_execucao(oportunidades, quantidades, quantidade_padrao, slippage_tolerance,
+                      capital_manager=None, spread_alvo=0.0, taxa_rebate=TAXA_REBATE_MAKER,
+                      capital_total=None, max_pares=None, exigir_lucro=True):
+    """
+    Decide todas as entradas do ciclo em uma única passada vetorizada.
+
+    Para cada par, com as mesmas regras do TradeEngine:
+      - preco_compra = bid + slippage/2 e preco_venda = ask - slippage/2
+      - notional = preco_compra * quantidade
+      - rebate_esperado = taxa_rebate * (notional de compra + notional de venda), via rebate_esperado()
+      - pnl_esperado = (preco_venda - preco_compra) * quantidade + rebate_esperado
+      - viável se notional cabe na folga do par no CapitalManager e, com
+        exigir_lucro (modo real), spread >= spread_alvo e pnl_esperado > 0
+
+    O plano é ordenado por pnl_esperado decrescente; com `capital_total` as entradas
+    são aceitas em ordem enquanto cabem no que sobra do total: uma entrada que não
+    cabe é recusada e as seguintes, menores, ainda podem entrar.
+
+    Retorna (plano, tabela): `plano` só com as entradas viáveis (até `max_pares`)
+    e `tabela` com todos os pares, incluindo o motivo de cada recusa.
+    """
+    linhas = _normalizar(oportunidades)
+    if not linhas:
+        return [], []
+
+    pares = [linha["symbol"] for linha in linhas]
+    bid = np.array([float(linha["bid"]) for linha in linhas])
+    ask = np.array([float(linha["ask"]) for linha in linhas])
+    spread = np.array([float(linha["spread"]) for linha in linhas])
+    quantidade = np.array([float(quantidades.get(par, quantidade_padrao)) for par in pares])
+
+    meio_slippage = slippage_tolerance / 2
+    preco_compra = bid + meio_slippage
+    preco_venda = ask - meio_slippage
+    notional = preco_compra * quantidade
+    rebate = rebate_esperado(preco_compra, preco_venda, quantidade, taxa_rebate)
+    pnl = (preco_venda - preco_compra) * quantidade + rebate
+
+    if capital_manager is not None:
+        folga = np.array(capital_manager.folgas(pares), dtype=float)
+    else:
+        folga = np.full(len(pares), np.inf)
+
+    todos = np.ones(len(pares), dtype=bool)
+    spread_ok = spread >= spread_alvo if exigir_lucro else todos
+    lucrativo = pnl > 0 if exigir_lucro else todos
+    capital_ok = notional <= folga
+    viavel = spread_ok & lucrativo & capital_ok
+
+    # Ranking por P&L esperado (estável para empates)
+    ordem = np.argsort(-pnl, kind="stable")
+    dentro_total = np.ones(len(pares), dtype=bool)
+    if capital_total is not None:
+        # Passada gulosa (só sobre os viáveis): pula o que não cabe e continua
+        acumulado = 0.0
+        for i in ordem[viavel[ordem]]:
+            if acumulado + notional[i] <= capital_total:
+                acumulado += notional[i]
+            else:
+                dentro_total[i] = False
+        viavel &= dentro_total
+
+    tabela = []
+    for i in ordem:
+        if not spread_ok[i]:
+            motivo = "spread"
+        elif not lucrativo[i]:
+            motivo = "pnl"
+        elif not capital_ok[i]:
+            motivo = "capital_par"
+        elif not dentro_total[i]:
+            motivo = "capital_total"
+        else:
+            motivo = None
+        tabela.append(dict(
+            linhas[i],
+            quantidade=float(quantidade[i]),
+            preco_compra=float(preco_compra[i]),
+            preco_venda=float(preco_venda[i]),
+            notional=float(notional[i]),
+            rebate_esperado=float(rebate[i]),
+            pnl_esperado=float(pnl[i]),
+            viavel=bool(viavel[i]),
+            motivo_recusa=motivo
+        ))
+
+    plano = [linha for linha in tabela if linha["viavel"]]
+    if max_pares:
+        plano = plano[:max_pares]
+    return plano, tabela
@@ -1,7 +1,10 @@
 from src.core.order_tracker import OrderTracker
+from src.core.planejador import rebate_esperado
 
 class TradeEngine:
-    def __init__(self, executor, db_repo, logger, dry_run=True, slippage_tolerance=0.01, capital_manager=None, event_logger=None):
+    def __init__(self, executor, db_repo, logger, dry_run=True, slippage_tolerance=0.01, capital_manager=None, event_logger=None,
+                 book_feed=None, max_idade_book=2.0, idade_max_snapshot=1.0, config=None,
+                 order_watcher=None, tempo_max_espera_ordem=15):
         self.executor = executor
         self.db = db_repo
         self.log = logger
@@ -11,9 +14,43 @@ class TradeEngine:
         if event_logger is None:
             raise ValueError("event_logger não pode ser None")
         self.event_logger = event_logger
+        self.book_feed = book_feed
+        self.max_idade_book = max_idade_book
+        self.idade_max_snapshot = idade_max_snapshot
+        # ConfigService: snapshot em memória, recarregado só quando o config.json muda
+        if config is None:
+            from src.utils.config_service import config_compartilhada
+            config = config_compartilhada()
+        self.config = config
+        # Ida e volta com ordens limit (config "ordens_limit"); o watcher compartilhado
+        # acompanha as ordens de todos os ciclos com uma consulta por tick
+        self.tracker = OrderTracker(executor, logger, db_repo, capital_manager=capital_manager,
+                                    tempo_max_espera=tempo_max_espera_ordem, watcher=order_watcher)
 
-    def executar_ciclo(self, symbol, quantidade, book_data, spread_alvo=0.02):
+    def executar_ciclo(self, symbol, quantidade, book_data, spread_alvo=0.02, plano=None):
+        """
+        `plano` (opcional) é a linha de planejar_execucao para o par: quantidade e
+        preços já decididos em lote são usados em vez de recalculados aqui.
+        Com book feed o topo é relido e os preços recalculados, pois o plano pode estar velho.
+        O capital é reservado atomicamente (tentar_reservar) e a reserva é liberada em
+        qualquer saída do ciclo, inclusive por exceção.
+        """
+        reserva = None
         try:
+            if self.book_feed is not None:
+                # Relê o topo do book em memória: é mais recente que o snapshot do scanner
+                idade = self.book_feed.idade(symbol)
+                if idade is None or idade > self.max_idade_book:
+                    self.log.warn(f"{symbol} | Book desatualizado no feed (idade={idade}) - ciclo ignorado")
+                    return
+                topo = self.book_feed.top_of_book(symbol)
+                book_data = {
+                    "bid": topo["bid"],
+                    "ask": topo["ask"],
+                    "spread": topo["spread"],
+                    "timestamp": topo["timestamp"]
+                }
+
             ask = book_data["ask"]
             bid = book_data["bid"]
             spread = book_data["spread"]
@@ -26,27 +63,32 @@ class TradeEngine:
             elif self.dry_run and spread < spread_alvo:
                 self.log.info(f"[DRY RUN] {symbol} | Simulando com spread baixo ({spread:.5f}) para teste")
 
-            # Usa quantidade personalizada se disponível, senão usa a padrão
-            from src.utils.config_loader import carregar_config
-            config = carregar_config()
-            quantidades_personalizadas = config.get("quantidades_personalizadas", {})
-            quantidade_real = float(quantidades_personalizadas.get(symbol, quantidade))
+            if plano is not None:
+                quantidade_real = plano["quantidade"]
+            else:
+                # Usa quantidade personalizada se disponível, senão usa a padrão
+                quantidades_personalizadas = self.config.atual().get("quantidades_personalizadas", {})
+                quantidade_real = float(quantidades_personalizadas.get(symbol, quantidade))
             
             self.log.info(f"[CICLO] {symbol} | Quantidade: {quantidade_real} (padrão: {quantidade})")
 
-            preco_compra = bid + (self.slippage_tolerance / 2)
-            preco_venda = ask - (self.slippage_tolerance / 2)
+            if plano is not None and self.book_feed is None:
+                preco_compra = plano["preco_compra"]
+                preco_venda = plano["preco_venda"]
+            else:
+                preco_compra = bid + (self.slippage_tolerance / 2)
+                preco_venda = ask - (self.slippage_tolerance / 2)
             custo_total = preco_compra * quantidade_real
 
-            if self.capital_manager and not self.capital_manager.pode_usar_capital(symbol, custo_total):
-                self.log.warn(f"{symbol} | Sem capital disponível para nova entrada.")
-                return
-
             if self.capital_manager:
-                self.capital_manager.reservar_capital(symbol, custo_total)
+                # Verificação e reserva numa única operação: ciclos concorrentes não estouram o limite
+                reserva = self.capital_manager.tentar_reservar(symbol, custo_total)
+                if reserva is None:
+                    self.log.warn(f"{symbol} | Sem capital disponível para nova entrada.")
+                    return
 
             if self.dry_run:
-                rebate_estimado = quantidade_real * 0.0001
+                rebate_estimado = rebate_esperado(preco_compra, preco_venda, quantidade_real)
                 pnl_estimado = (preco_venda - preco_compra) * quantidade_real + rebate_estimado
 
                 self.log.info(f"[DRY RUN] {symbol} | Comprar a {preco_compra:.4f}, Vender a {preco_venda:.4f} | Qtd: {quantidade_real}")
@@ -60,16 +102,32 @@ class TradeEngine:
                 self.event_logger.log_evento("sell", symbol, f"Vender a {preco_venda:.4f} | P&L: {pnl_estimado:.6f}")
 
 
-                if self.capital_manager:
-                    self.capital_manager.liberar_capital(symbol, custo_total)
+                if reserva is not None:
+                    reserva.liberar()
 
             else:
                 # Execução real usando os novos métodos
                 investment = quantidade_real * preco_compra
                 
                 # Executa compra
-                crypto = symbol.split('/')[0]
-                buy_result = self.executor.execute_buy(crypto, investment)
+                crypto, quote = symbol.split('/')
+                saldos = getattr(self.executor, "saldos", None)
+                if saldos is not None and saldos.livre(quote) < investment:
+                    self.log.warn(f"{symbol} | Saldo {quote} insuficiente para {investment:.4f}")
+                    if reserva is not None:
+                        reserva.liberar()
+                    return
+                if self.config.atual().get("ordens_limit", False):
+                    # Maker nos dois lados: o tracker libera a reserva ao final
+                    self.tracker.executar_ordem_completa(symbol, quantidade_real, preco_compra, preco_venda, reserva=reserva)
+                    return
+                # Reaproveita o book do scanner; o executor só busca ticker se ele estiver velho
+                timestamp_book = book_data.get("timestamp")
+                buy_result = self.executor.execute_buy(
+                    crypto, investment, quote=quote,
+                    snapshot={"price": ask, "timestamp": timestamp_book},
+                    idade_maxima=self.idade_max_snapshot
+                )
                 
                 if buy_result:
                     self.log.info(f"✅ Compra executada: {buy_result}")
@@ -79,14 +137,18 @@ class TradeEngine:
                     self.event_logger.log_evento("buy", symbol, f"Compra executada a {buy_result['price']:.4f}")
                     
                     # Executa venda
-                    sell_result = self.executor.execute_sell(crypto, buy_result['amount'], entry_price=buy_result['price'])
+                    sell_result = self.executor.execute_sell(
+                        crypto, buy_result['amount'], quote=quote, entry_price=buy_result['price'],
+                        snapshot={"price": bid, "timestamp": timestamp_book},
+                        idade_maxima=self.idade_max_snapshot
+                    )
                     
                     if sell_result:
                         self.log.info(f"✅ Venda executada: {sell_result}")
                         
                         # Calcula P&L e rebate
                         pnl = sell_result.get('pnl_value', 0)
-                        rebate = buy_result['amount'] * 0.0001  # Rebate estimado
+                        rebate = rebate_esperado(buy_result['price'], sell_result['price'], buy_result['amount'])  # Rebate estimado
                         
                         # Salva trade de venda
                         self.db.save_trade(symbol, "sell", sell_result['price'], sell_result['amount'], rebate=rebate, pnl=pnl)
@@ -97,13 +159,10 @@ class TradeEngine:
                     self.log.error(f"❌ Falha na compra de {symbol}")
                 
                 # Libera capital
-                if self.capital_manager:
-                    self.capital_manager.liberar_capital(symbol, custo_total)
+                if reserva is not None:
+                    reserva.liberar()
 
         except Exception as e:
             self.log.error(f"Erro no ciclo de {symbol}: {str(e)}")
-            if self.capital_manager:
-                try:
-                    self.capital_manager.liberar_capital(symbol, float(preco_compra) * quantidade_real)
-                except:
-                    pass
+            if reserva is not None:
+                reserva.liberar()
@@ -1,14 +1,22 @@
 import time
 import os
+import threading
 from dotenv import load_dotenv
 from src.repository.database_repository import DatabaseRepository
+from src.repository.manutencao import ManutencaoBanco
 from src.services.log_service import LogService
 from src.services.exchange_executor import ExchangeExecutor
 from src.services.event_logger import EventLogger
 from src.core.trade_engine import TradeEngine
+from src.core.executor_ciclos import ExecutorCiclos
+from src.core.order_watcher import OrderWatcher
 from src.controle.capital_manager import CapitalManager
-from src.scanners.spread_scanner import escanear_spreads
-from src.utils.config_loader import carregar_config
+from src.scanners.spread_scanner import escanear_spreads, escanear_spreads_feed
+from src.scanners.opportunity_scorer import melhores_oportunidades
+from src.core.planejador import planejar_execucao
+from src.services.book_feed import BookFeed, FonteWebSocketBinance
+from src.services.book_recorder import GravadorBooks
+from src.utils.config_service import ConfigService
 
 load_dotenv()
 
@@ -21,7 +29,8 @@ API_SECRET = os.getenv("BINANCE_API_SECRET")
 def main():
     # Carrega config.json
     DATA_DIR = os.getenv("DATA_DIR", "./data")  # Valor padrão se não estiver definido
-    config = carregar_config()
+    config_service = ConfigService()
+    config = config_service.atual()
     #PAIRS = config["pares"]
     QUANTIDADE = config["quantidade_padrao"]
     SPREAD_ALVO = config["spread_alvo"]
@@ -29,24 +38,79 @@ def main():
     INTERVALO = config["intervalo_execucao"]
     LIMITES = config["limites_capital"]
     DRY_RUN = config["dry_run"]
-    db = DatabaseRepository(f"{DATA_DIR}/scalping.db")
-    logger = LogService(db, f"{DATA_DIR}/bot_scalping.log")
+    SCAN_CONCORRENTE = config.get("scanner_concorrente", True)
+    SCAN_WORKERS = config.get("scanner_max_workers", 8)
+    USAR_BOOK_FEED = config.get("usar_book_feed", False)
+    MAX_IDADE_BOOK = config.get("max_idade_book", 2.0)
+    IDADE_MAX_SNAPSHOT = config.get("idade_max_snapshot", 1.0)
+    MAX_PARES_POR_CICLO = config.get("max_pares_por_ciclo")
+    PREENCHIMENTO_MINIMO = config.get("preenchimento_minimo", 1.0)
+    INTERVALO_METRICAS = config.get("intervalo_metricas_endpoint", 60)
+    CICLOS_CONCORRENTES = config.get("ciclos_concorrentes", True)
+    MAX_CICLOS_SIMULTANEOS = config.get("max_ciclos_simultaneos", 4)
+    GRAVAR_BOOKS = config.get("gravar_books", False)
+    PASTA_BOOKS = config.get("pasta_books", os.path.join(DATA_DIR, "books"))
+    INTERVALO_MANUTENCAO = config.get("intervalo_manutencao_horas", 24) * 3600
+    # Write-behind: logs, eventos e trades gravados em lote por uma thread, sem commit no caminho do ciclo
+    db = DatabaseRepository(f"{DATA_DIR}/scalping.db", write_behind=config.get("db_write_behind", True))
+    # Logging assíncrono: o ciclo só empilha a mensagem; uma thread escreve console/arquivo/banco em lote
+    logger = LogService(
+        db, f"{DATA_DIR}/bot_scalping.log",
+        assincrono=config.get("log_assincrono", True),
+        nivel_console=config.get("log_nivel_console", "INFO"),
+        nivel_arquivo=config.get("log_nivel_arquivo", "INFO"),
+        nivel_db=config.get("log_nivel_db", "WARN"),
+        capacidade=config.get("log_capacidade", 10000),
+        max_bytes=config.get("log_max_bytes", 10 * 1024 * 1024),
+        backups=config.get("log_backups", 5),
+    )
     event_logger = EventLogger(db)
-    executor = ExchangeExecutor(API_KEY, API_SECRET)
-    capital_manager = CapitalManager(LIMITES)
+    executor = ExchangeExecutor(API_KEY, API_SECRET, markets_cache=f"{DATA_DIR}/markets_cache.json")
+    executor.mercados.carregar()  # Warm start: lê do cache em disco se ainda válido
+    if not DRY_RUN:
+        executor.saldos.reconciliar()  # Semente do livro-razão de saldos
+    capital_manager = CapitalManager(LIMITES, limite_global=config.get("limite_capital_global"))
 
-    from src.top_gainers import get_top_gainers
+    from functools import partial
+    from src.top_gainers import TopGainersCache, fetch_from_binance
 
-    # 🔥 Busca dinâmicamente os top gainers
-    top_pares = get_top_gainers(n=10)
+    # 🔥 Busca dinâmicamente os top gainers (atualizados em background a cada TTL)
+    cache_gainers = TopGainersCache(n=10, fetcher=partial(fetch_from_binance, executor=executor))
+    cache_gainers.iniciar_agendamento()
+    top_pares = cache_gainers.obter(10, bloquear=True)  # Só a partida espera a rede
     symbols = [s for s, _ in top_pares]
 
     if not symbols:
         print("⚠️ Nenhum par identificado como top gainer. Usando fallback do config.json")
-        symbols = config["pares"]
+        symbols = list(config["pares"])
 
     PAIRS = symbols
 
+    book_feed = None
+    if USAR_BOOK_FEED:
+        url_feed = config.get("book_feed_url")
+        fonte = FonteWebSocketBinance(PAIRS, url=url_feed) if url_feed else FonteWebSocketBinance(PAIRS)
+        book_feed = BookFeed(fonte)
+        book_feed.inscrever(PAIRS)
+        book_feed.iniciar()
+        logger.info(f"📶 Book feed iniciado para {len(PAIRS)} pares")
+
+    # Grava todo book lido pelo scanner REST em colunas binárias (análise e backtest)
+    gravador_books = None
+    if GRAVAR_BOOKS:
+        gravador_books = GravadorBooks(PASTA_BOOKS)
+        gravador_books.iniciar()
+        logger.info(f"💾 Gravação de books ativada em {PASTA_BOOKS}")
+
+    # Um único watcher acompanha as ordens limit de todos os ciclos (uma consulta por tick)
+    order_watcher = OrderWatcher(
+        executor,
+        intervalo=config.get("intervalo_watcher", 1.0),
+        tempo_max_espera=config.get("tempo_max_espera_ordem", 15),
+        logger=logger
+    )
+    order_watcher.iniciar()
+
     engine = TradeEngine(
         executor=executor,
         db_repo=db,
@@ -54,47 +118,183 @@ def main():
         dry_run=DRY_RUN,
         slippage_tolerance=SLIPPAGE,
         capital_manager=capital_manager,
-        event_logger=event_logger
+        event_logger=event_logger,
+        book_feed=book_feed,
+        max_idade_book=MAX_IDADE_BOOK,
+        idade_max_snapshot=IDADE_MAX_SNAPSHOT,
+        config=config_service,
+        order_watcher=order_watcher,
+        tempo_max_espera_ordem=config.get("tempo_max_espera_ordem", 15)
     )
 
+    # Ciclos de pares diferentes em paralelo (um por par por vez); None = execução sequencial
+    executor_ciclos = ExecutorCiclos(MAX_CICLOS_SIMULTANEOS, logger) if CICLOS_CONCORRENTES else None
+
     logger.info("🚀 Bot Scalping Rebate iniciado com inteligência de pares.")
     logger.info(f"📊 Monitorando {len(PAIRS)} pares | Spread alvo: {SPREAD_ALVO:.6%}")
 
+    ultimo_dump_metricas = time.time()
+
+    # Retenção/arquivamento de logs e eventos em background, em lotes curtos (repository/manutencao.py)
+    manutencao = ManutencaoBanco(
+        db,
+        retencao_logs_dias=config.get("retencao_logs_dias", 7),
+        retencao_eventos_dias=config.get("retencao_eventos_dias", 30),
+        pasta_arquivo=config.get("pasta_arquivo", os.path.join(DATA_DIR, "arquivo")),
+        pausa_lote=0.05
+    )
+    ultima_manutencao = time.time()
+    thread_manutencao = None
+
+    def rodar_manutencao():
+        try:
+            r = manutencao.rodar()
+            logger.info(f"🧽 Manutenção do banco: {r['logs']['arquivadas']} logs e {r['eventos']['arquivadas']} eventos arquivados | "
+                        f"{r['paginas_liberadas']} páginas liberadas em {r['segundos']:.1f}s")
+        except Exception as e:
+            logger.error(f"❌ Falha na manutenção do banco: {e}")
+
+    def gravar_metricas_endpoint():
+        linhas = executor.metricas.snapshot(resetar=True)
+        if linhas:
+            db.salvar_metricas_endpoint(linhas)
+            mais_lentos = ", ".join(
+                f"{l['endpoint']} {l['symbol']} p95={l['p95'] * 1000:.0f}ms ({l['chamadas']}x)" for l in linhas[:3]
+            )
+            logger.info(f"🧭 Métricas de endpoint gravadas ({len(linhas)} séries) | Mais custosos: {mais_lentos}")
+
     try:
         while True:
             inicio_ciclo = time.time()
+            contadores_inicio = dict(executor.contadores)
+            # Snapshot em memória; só relê o arquivo quando o config.json muda
+            novo_config = config_service.atual()
+            if novo_config.versao != config.versao:
+                config = novo_config
+                QUANTIDADE = config["quantidade_padrao"]
+                SPREAD_ALVO = config["spread_alvo"]
+                INTERVALO = config["intervalo_execucao"]
+                MAX_PARES_POR_CICLO = config.get("max_pares_por_ciclo")
+                PREENCHIMENTO_MINIMO = config.get("preenchimento_minimo", 1.0)
+                capital_manager.atualizar_limites(config["limites_capital"], config.get("limite_capital_global"))
+                logger.info(f"⚙️ Configuração recarregada (versão {config.versao}) | Spread alvo: {SPREAD_ALVO:.6%}")
+            if book_feed is None:
+                # Leitura em memória: nunca bloqueia o loop (refresh em background)
+                novos_pares = [s for s, _ in cache_gainers.obter(10)]
+                if novos_pares and novos_pares != PAIRS:
+                    logger.info(f"🔄 Universo de pares atualizado: {novos_pares}")
+                    PAIRS = novos_pares
             logger.info("🔍 Escaneando pares com spread suficiente...")
             
             #oportunidades = escanear_spreads(executor.exchange, PAIRS, SPREAD_ALVO, verbose=True)
-            oportunidades = escanear_spreads(
-                executor.exchange,
-                PAIRS,
-                SPREAD_ALVO,
-                verbose=True,
-                modo_flexivel=True  # <- Ativa modo de testes
-            )
+            inicio_scan = time.time()
+            if book_feed is not None:
+                oportunidades = escanear_spreads_feed(
+                    book_feed,
+                    PAIRS,
+                    SPREAD_ALVO,
+                    verbose=True,
+                    modo_flexivel=True,
+                    max_idade=MAX_IDADE_BOOK
+                )
+            else:
+                oportunidades = escanear_spreads(
+                    executor,
+                    PAIRS,
+                    SPREAD_ALVO,
+                    verbose=True,
+                    modo_flexivel=True,  # <- Ativa modo de testes
+                    concorrente=SCAN_CONCORRENTE,
+                    max_workers=SCAN_WORKERS,
+                    mercados=executor.mercados,
+                    gravador=gravador_books
+                )
+            logger.info(f"📡 Scan de {len(PAIRS)} pares concluído em {time.time() - inicio_scan:.2f}s")
 
             if oportunidades:
                 logger.info(f"💡 Encontradas {len(oportunidades)} oportunidades")
                 quantidades_personalizadas = config.get("quantidades_personalizadas", {})
-                
-                for symbol, op in oportunidades.items():
-                    quantidade = quantidades_personalizadas.get(symbol, QUANTIDADE)
+
+                ranking = melhores_oportunidades(
+                    oportunidades,
+                    quantidades_personalizadas,
+                    QUANTIDADE,
+                    preenchimento_minimo=PREENCHIMENTO_MINIMO
+                )
+                # Preços, notional, P&L esperado e capital de todos os pares em uma passada
+                plano, tabela_plano = planejar_execucao(
+                    ranking,
+                    quantidades_personalizadas,
+                    QUANTIDADE,
+                    SLIPPAGE,
+                    capital_manager=capital_manager,
+                    spread_alvo=SPREAD_ALVO,
+                    capital_total=capital_manager.folga_global(),
+                    max_pares=MAX_PARES_POR_CICLO,
+                    exigir_lucro=not DRY_RUN
+                )
+                recusas = {}
+                for linha in tabela_plano:
+                    if linha["motivo_recusa"]:
+                        recusas[linha["motivo_recusa"]] = recusas.get(linha["motivo_recusa"], 0) + 1
+                logger.info(f"🏆 {len(plano)} pares no plano de execução ({len(ranking)} com liquidez) | Recusas: {recusas or 'nenhuma'}")
+
+                for op in plano:
+                    symbol = op["symbol"]
+                    quantidade = op["quantidade"]
                     book_data = {
                         "bid": op["bid"],
                         "ask": op["ask"],
-                        "spread": op["spread"]
+                        "spread": op["spread"],
+                        "timestamp": op["timestamp"]
                     }
+                    resumo = (f"Spread: {op['spread']:.3%} | Spread ponderado: {op['spread_ponderado']:.3%} | "
+                              f"P&L esperado: {op['pnl_esperado']:.6f}")
+
+                    if executor_ciclos is not None:
+                        if not executor_ciclos.submeter(symbol, engine.executar_ciclo, symbol, quantidade, book_data, SPREAD_ALVO, plano=op):
+                            logger.info(f"⏭️ {symbol} | Ciclo anterior em andamento ou limite de {MAX_CICLOS_SIMULTANEOS} ciclos simultâneos atingido")
+                            continue
+                        logger.info(f"⚡ Ciclo agendado para: {symbol} ({resumo})")
+                        event_logger.log_evento("ciclo_iniciado", symbol, f"Iniciando ciclo para {symbol}")
+                        continue
 
-                    logger.info(f"⚡ Executando ciclo para: {symbol} (Spread: {op['spread']:.3%})")
+                    logger.info(f"⚡ Executando ciclo para: {symbol} ({resumo})")
                     event_logger.log_evento("ciclo_iniciado", symbol, f"Iniciando ciclo para {symbol}")
-                    engine.executar_ciclo(symbol, quantidade, book_data, SPREAD_ALVO)
+                    engine.executar_ciclo(symbol, quantidade, book_data, SPREAD_ALVO, plano=op)
 
                     time.sleep(0.5)  # pausa reduzida entre execuções
             else:
                 logger.info("⏳ Nenhuma oportunidade encontrada neste ciclo")
 
             tempo_ciclo = time.time() - inicio_ciclo
+            evitados = executor.contadores['tickers_evitados'] - contadores_inicio['tickers_evitados']
+            buscados = executor.contadores['tickers_buscados'] - contadores_inicio['tickers_buscados']
+            if evitados or buscados:
+                logger.info(f"📉 Tickers evitados no ciclo: {evitados} | buscados: {buscados}")
+            m = executor.agendador.metricas()
+            logger.info(
+                f"🚦 Agendador | fila: {m['fila']} (máx {m['fila_max']}) | peso usado: {m['peso_total']} | "
+                f"espera média: {m['espera_media'] * 1000:.1f}ms (máx {m['espera_max'] * 1000:.1f}ms) | "
+                f"recusadas: {m['rejeitadas']} | penalidades: {m['penalidades']}"
+            )
+            if time.time() - ultimo_dump_metricas >= INTERVALO_METRICAS:
+                gravar_metricas_endpoint()
+                ultimo_dump_metricas = time.time()
+            if INTERVALO_MANUTENCAO and time.time() - ultima_manutencao >= INTERVALO_MANUTENCAO:
+                if thread_manutencao is None or not thread_manutencao.is_alive():
+                    thread_manutencao = threading.Thread(target=rodar_manutencao, name="db-manutencao", daemon=True)
+                    thread_manutencao.start()
+                ultima_manutencao = time.time()
+            capital = capital_manager.snapshot()
+            limite_global = capital["limite_global"]
+            logger.info(
+                f"💰 Capital em uso: {capital['total_em_uso']:.4f}"
+                f"{f' / {limite_global:.4f}' if limite_global is not None else ''} | "
+                f"reservas ativas: {capital['reservas_ativas']} | recusas: {capital['recusas']}"
+            )
+            if executor_ciclos is not None:
+                logger.info(f"🧵 Ciclos em andamento: {executor_ciclos.em_andamento() or 'nenhum'} | Concluídos: {executor_ciclos.concluidos}")
             logger.info(f"⏱️ Ciclo concluído em {tempo_ciclo:.2f}s | Aguardando {INTERVALO}s...")
             time.sleep(INTERVALO)
 
@@ -102,6 +302,32 @@ def main():
         logger.warn("⛔ Execução interrompida pelo usuário (CTRL+C).")
 
     finally:
+        if executor_ciclos is not None:
+            # Deixa os ciclos em andamento terminarem antes de cancelar ordens e fechar o banco
+            executor_ciclos.encerrar(timeout=60)
+        order_watcher.parar()
+        if not DRY_RUN and config.get("cancelar_ordens_ao_encerrar", True):
+            # O universo de pares muda durante a sessão: cancela também onde o bot operou antes
+            simbolos = list(dict.fromkeys(list(PAIRS) + executor.simbolos_da_sessao()))
+            lote = executor.cancelar_todas_em_paralelo(simbolos)
+            falhas = [s for s, r in lote["resultados"].items() if not r["ok"]]
+            logger.info(f"🧹 Ordens abertas canceladas em {len(simbolos)} pares em {lote['tempo_total']:.2f}s | Falhas: {falhas or 'nenhuma'}")
+        if book_feed is not None:
+            book_feed.parar()
+        if gravador_books is not None:
+            gravador_books.parar()
+            logger.info(f"💾 Books gravados: {gravador_books.gravados} | Descartados: {gravador_books.descartados}")
+        cache_gainers.fechar()
+        gravar_metricas_endpoint()
+        if thread_manutencao is not None:
+            thread_manutencao.join()
+        if db.write_behind:
+            logger.info(f"🗄️ Fila do banco: {db.pendentes()} pendentes | {db.contadores['gravadas']} linhas em {db.contadores['lotes']} lotes | fila cheia: {db.contadores['fila_cheia']}x")
+        if logger.assincrono:
+            logger.info(f"📝 Logs: {logger.contadores['gravados']} linhas em {logger.contadores['lotes']} lotes | "
+                        f"descartados: {logger.total_descartados()} | rotações: {logger.contadores['rotacoes']}")
+        # Drena os logs antes do banco fechar; depois disso o logger só escreve no console
+        logger.fechar()
         db.close()
         logger.info("✅ Banco de dados fechado com sucesso.")
 
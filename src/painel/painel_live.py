@@ -5,6 +5,7 @@ from rich.console import Group, Console
 from rich.layout import Layout
 from rich.text import Text
 from time import sleep, time
+from datetime import datetime
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
@@ -25,7 +26,7 @@ def criar_tabela_trades(trades):
     table.add_column("P&L", justify="right")
     table.add_column("Timestamp", justify="center")
 
-    for trade in trades[-10:]:
+    for trade in trades:
         table.add_row(
             str(trade[0]), trade[1], trade[2],
             f"{trade[3]:.4f}", f"{trade[4]:.4f}",
@@ -41,11 +42,13 @@ def painel_loop(intervalo=5):
     
     with Live(refresh_per_second=2, screen=True) as live:
         while True:
-            trades = db.fetch_trades()
-            pnl_total = sum(t[6] for t in trades)
-            rebate_total = sum(t[5] for t in trades)
+            # Totais mantidos pelo banco a cada trade: leitura de poucas linhas, sem varrer o histórico
+            resumo = db.resumo_agregado()
+            hoje = db.agregados_por_balde("dia", desde=datetime.utcnow().strftime("%Y-%m-%d"))
+            pnl_hoje = hoje[0][1] if hoje else 0.0
+            trades = db.ultimos_trades(10)
 
-            header = Panel(Text(f"⏱️ Tempo: {int(time() - start_time)}s  |  💰 P&L Total: {pnl_total:.4f}  |  🎁 Rebates: {rebate_total:.4f}", justify='center', style="bold green"))
+            header = Panel(Text(f"⏱️ Tempo: {int(time() - start_time)}s  |  💰 P&L Total: {resumo['pnl']:.4f}  |  🎁 Rebates: {resumo['rebate']:.4f}  |  📅 P&L Hoje: {pnl_hoje:.4f}  |  🔁 Trades: {resumo['trades']}", justify='center', style="bold green"))
 
             body = criar_tabela_trades(trades)
             layout = Group(header, body)
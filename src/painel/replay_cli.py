@@ -5,7 +5,8 @@ import json
 
 def exibir_replay():
     db = DatabaseRepository()
-    eventos = db.conn.execute("SELECT * FROM eventos ORDER BY timestamp ASC").fetchall()
+    # Só as 50 linhas exibidas saem do banco (índice por id, sem ler a tabela inteira)
+    eventos = db.ultimos_eventos(50)
     console = Console()
     table = Table(title="📜 Replay de Sessões")
 
@@ -15,7 +16,7 @@ def exibir_replay():
     table.add_column("Mensagem", justify="left")
     table.add_column("Timestamp", justify="center")
 
-    for ev in eventos[-50:]:
+    for ev in eventos:
         table.add_row(str(ev[0]), ev[1], ev[2], ev[3], ev[5])
 
     console.print(table)
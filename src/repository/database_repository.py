@@ -1,14 +1,89 @@
+import itertools
+import json
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+CAPACIDADE_FILA_PADRAO = 10000
+INTERVALO_LOTE_PADRAO = 0.005  # janela do group commit (segundos)
+MAX_LOTE_PADRAO = 500
+TAMANHO_PAGINA_PADRAO = 500
+_MAIOR_ID = 2 ** 63 - 1
+_MAIOR_TIMESTAMP = "9999-12-31 23:59:59"
+
+# Índices das consultas por par/tempo (o rowid vai implícito no fim de cada índice)
+INDICES = (
+    "CREATE INDEX IF NOT EXISTS idx_trades_symbol_timestamp ON trades (symbol, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_eventos_par_timestamp ON eventos (par, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_ordens_abertas_symbol_created ON ordens_abertas (symbol, created_at)",
+)
+
+# Agregados de trades: escala -> expressão SQLite do início do balde a partir do timestamp
+ESCALAS_AGREGADO = {
+    "total": "''",
+    "dia": "strftime('%Y-%m-%d', {ts})",
+    "hora": "strftime('%Y-%m-%d %H:00', {ts})",
+    "minuto": "strftime('%Y-%m-%d %H:%M', {ts})",
+}
+_SOMAR_AGREGADO = """
+    ON CONFLICT (escala, balde, symbol) DO UPDATE SET
+        pnl = pnl + excluded.pnl,
+        rebate = rebate + excluded.rebate,
+        volume = volume + excluded.volume,
+        trades = trades + excluded.trades
+"""
+
+_FIM = object()
+
+
+def _agora_texto():
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+
 class DatabaseRepository:    
-    def __init__(self, db_path="/home/tiozinho-gamer/domains/defi-scalping/data/scalping.db"):
+    def __init__(self, db_path="/home/tiozinho-gamer/domains/defi-scalping/data/scalping.db", relogio=None,
+                 write_behind=False, capacidade_fila=CAPACIDADE_FILA_PADRAO, intervalo_lote=INTERVALO_LOTE_PADRAO,
+                 max_lote=MAX_LOTE_PADRAO):
+        """
+        write_behind=True: trades, logs, eventos e métricas vão para uma fila limitada e
+        uma thread de gravação junta o que chegar em `intervalo_lote` (até `max_lote`
+        linhas) numa única transação, com o banco em modo WAL. Quem chama não espera
+        disco; só espera a fila andar quando ela está cheia (backpressure).
+        close() grava tudo o que ainda estiver na fila antes de fechar.
+        Ordens abertas continuam síncronas: são lidas de volta logo depois de gravadas.
+        """
         print(f"[DB] Iniciando conexão com {db_path}")
-        self.conn = sqlite3.connect(db_path)
+        # relogio (simulacao/backtest) define o timestamp dos trades; None = hora atual
+        self.relogio = relogio
+        # Conexão compartilhada entre as threads dos ciclos concorrentes: acesso serializado pelo lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        # Só vale para bancos novos (antes da primeira tabela): permite o incremental_vacuum da manutenção
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
         self._create_tables()
 
+        self.write_behind = write_behind
+        self.intervalo_lote = intervalo_lote
+        self.max_lote = max_lote
+        self.contadores = {"enfileiradas": 0, "gravadas": 0, "lotes": 0, "fila_cheia": 0, "erros": 0}
+        self._fila = None
+        self._escritor = None
+        self._fechando = False
+        # Enfileirar e passar a "fechando" são atômicos entre si: nada entra na fila depois do sentinela
+        self._lock_fila = threading.Lock()
+        if write_behind:
+            with self._lock:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("PRAGMA synchronous=NORMAL")
+            self._fila = queue.Queue(maxsize=capacidade_fila)
+            self._escritor = threading.Thread(target=self._loop_escritor, name="db-writer", daemon=True)
+            self._escritor.start()
+
     def _create_tables(self):
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS trades (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,52 +116,405 @@ class DatabaseRepository:
                 )
             """)
 
-    def save_trade(self, symbol, side, price, quantity, rebate, pnl):
-        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        with self.conn:
             self.conn.execute("""
-                INSERT INTO trades (symbol, side, price, quantity, rebate, pnl, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (symbol, side, price, quantity, rebate, pnl, timestamp))
+                CREATE TABLE IF NOT EXISTS ordens_abertas (
+                    id TEXT PRIMARY KEY,
+                    symbol TEXT,
+                    side TEXT,
+                    price REAL,
+                    quantity REAL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
 
-    def save_log(self, level, message):
-        with self.conn:
             self.conn.execute("""
-                INSERT INTO logs (level, message) VALUES (?, ?)
-            """, (level, message))
+                CREATE TABLE IF NOT EXISTS metricas_endpoint (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    endpoint TEXT,
+                    symbol TEXT,
+                    chamadas INTEGER,
+                    erros INTEGER,
+                    peso INTEGER,
+                    tempo_total REAL,
+                    p50 REAL,
+                    p95 REAL,
+                    p99 REAL,
+                    max REAL,
+                    inicio_janela DATETIME,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Resumos diários de logs/eventos que saíram do banco principal (repository/manutencao.py)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS logs_diario (
+                    dia TEXT,
+                    level TEXT,
+                    linhas INTEGER,
+                    primeiro DATETIME,
+                    ultimo DATETIME,
+                    PRIMARY KEY (dia, level)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS eventos_diario (
+                    dia TEXT,
+                    tipo_evento TEXT,
+                    par TEXT,
+                    linhas INTEGER,
+                    primeiro DATETIME,
+                    ultimo DATETIME,
+                    PRIMARY KEY (dia, tipo_evento, par)
+                )
+            """)
+
+            for indice in INDICES:
+                self.conn.execute(indice)
+
+            self._criar_agregados()
+
+    def _criar_agregados(self):
+        """
+        Totais por par e por balde de tempo (minuto, hora, dia e 'total'), mantidos por
+        um trigger na mesma transação do INSERT em trades, seja qual for o caminho da
+        gravação (síncrono, write-behind, backtest). Trades anteriores ao trigger são
+        incorporados aqui, a partir do último id processado.
+        """
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS agregados (
+                escala TEXT,
+                balde TEXT,
+                symbol TEXT,
+                pnl REAL DEFAULT 0,
+                rebate REAL DEFAULT 0,
+                volume REAL DEFAULT 0,
+                trades INTEGER DEFAULT 0,
+                PRIMARY KEY (escala, balde, symbol)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS agregados_estado (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                ultimo_id INTEGER
+            )
+        """)
+        self.conn.execute("INSERT OR IGNORE INTO agregados_estado (id, ultimo_id) VALUES (1, 0)")
+        # Antes do trigger existir: senão o primeiro INSERT novo pularia o histórico
+        self._sincronizar_agregados()
+
+        valores = ",\n".join(
+            f"('{escala}', {expressao.format(ts='NEW.timestamp')}, NEW.symbol, COALESCE(NEW.pnl, 0), "
+            f"COALESCE(NEW.rebate, 0), COALESCE(NEW.price * NEW.quantity, 0), 1)"
+            for escala, expressao in ESCALAS_AGREGADO.items()
+        )
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_trades_agregados AFTER INSERT ON trades
+            BEGIN
+                INSERT INTO agregados (escala, balde, symbol, pnl, rebate, volume, trades)
+                VALUES {valores}
+                {_SOMAR_AGREGADO};
+                UPDATE agregados_estado SET ultimo_id = NEW.id WHERE id = 1;
+            END
+        """)
+
+    def _sincronizar_agregados(self):
+        ultimo_id = self.conn.execute("SELECT ultimo_id FROM agregados_estado WHERE id = 1").fetchone()[0]
+        maior_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM trades").fetchone()[0]
+        if maior_id <= ultimo_id:
+            return 0
+        for escala, expressao in ESCALAS_AGREGADO.items():
+            balde = expressao.format(ts="timestamp")
+            # "WHERE true": desambigua o ON CONFLICT de um INSERT ... SELECT
+            self.conn.execute(f"""
+                INSERT INTO agregados (escala, balde, symbol, pnl, rebate, volume, trades)
+                SELECT '{escala}', {balde}, symbol, COALESCE(SUM(pnl), 0), COALESCE(SUM(rebate), 0),
+                       COALESCE(SUM(price * quantity), 0), COUNT(*)
+                FROM trades WHERE id > ? AND id <= ? AND true
+                GROUP BY {balde}, symbol
+                {_SOMAR_AGREGADO}
+            """, (ultimo_id, maior_id))
+        self.conn.execute("UPDATE agregados_estado SET ultimo_id = ? WHERE id = 1", (maior_id,))
+        return maior_id - ultimo_id
+
+    def reconstruir_agregados(self):
+        """Recalcula os agregados do zero a partir da tabela trades"""
+        self.flush()
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM agregados")
+            self.conn.execute("UPDATE agregados_estado SET ultimo_id = 0 WHERE id = 1")
+            self._sincronizar_agregados()
+
+    # ---------- write-behind ----------
+
+    def _enfileirar(self, sql, parametros):
+        """Chamado com _lock_fila; contadores de quem produz só mudam aqui"""
+        self.contadores["enfileiradas"] += 1
+        try:
+            self._fila.put_nowait((sql, parametros))
+        except queue.Full:
+            # Backpressure: espera a thread de gravação abrir espaço
+            self.contadores["fila_cheia"] += 1
+            self._fila.put((sql, parametros))
+
+    def _escrever(self, sql, parametros):
+        """INSERT síncrono ou, em write-behind, enfileirado para a thread de gravação"""
+        if self._fila is not None:
+            with self._lock_fila:
+                if not self._fechando:
+                    self._enfileirar(sql, parametros)
+                    return
+        with self._lock, self.conn:
+            self.conn.execute(sql, parametros)
+
+    def _escrever_varias(self, sql, lista_parametros):
+        if self._fila is not None:
+            with self._lock_fila:
+                if not self._fechando:
+                    for parametros in lista_parametros:
+                        self._enfileirar(sql, parametros)
+                    return
+        with self._lock, self.conn:
+            self.conn.executemany(sql, lista_parametros)
+
+    def _loop_escritor(self):
+        while True:
+            lote = [self._fila.get()]
+            # Group commit: junta o que chegar dentro da janela numa transação só
+            limite = time.monotonic() + self.intervalo_lote
+            while len(lote) < self.max_lote and lote[-1] is not _FIM:
+                restante = limite - time.monotonic()
+                try:
+                    lote.append(self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            linhas = [item for item in lote if item is not _FIM]
+            try:
+                if linhas:
+                    self._gravar_lote(linhas)
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+            if lote[-1] is _FIM:
+                return
+
+    def _gravar_lote(self, linhas):
+        try:
+            with self._lock, self.conn:
+                for sql, grupo in itertools.groupby(linhas, key=lambda linha: linha[0]):
+                    self.conn.executemany(sql, [parametros for _, parametros in grupo])
+        except Exception as e:
+            # Uma linha ruim não pode derrubar o lote inteiro: regrava uma a uma
+            print(f"[DB] ❌ Erro ao gravar lote de {len(linhas)} linhas: {e}. Gravando individualmente...")
+            gravadas = 0
+            for sql, parametros in linhas:
+                try:
+                    with self._lock, self.conn:
+                        self.conn.execute(sql, parametros)
+                    gravadas += 1
+                except Exception as erro:
+                    self.contadores["erros"] += 1
+                    print(f"[DB] ❌ Linha descartada: {erro}")
+            self.contadores["gravadas"] += gravadas
+        else:
+            self.contadores["gravadas"] += len(linhas)
+        self.contadores["lotes"] += 1
+
+    def flush(self):
+        """Espera a fila de write-behind esvaziar (no modo síncrono não faz nada)"""
+        if self._fila is not None and self._escritor.is_alive():
+            self._fila.join()
+
+    def pendentes(self):
+        return self._fila.qsize() if self._fila is not None else 0
+
+    @contextmanager
+    def transacao(self):
+        """Transação curta na conexão compartilhada (lock + commit/rollback), para jobs como a manutenção"""
+        with self._lock, self.conn:
+            yield self.conn
+
+    # ---------- escrita ----------
+
+    def save_trade(self, symbol, side, price, quantity, rebate, pnl):
+        agora = self.relogio.agora_utc() if self.relogio else datetime.utcnow()
+        timestamp = agora.strftime('%Y-%m-%d %H:%M:%S')
+        self._escrever("""
+            INSERT INTO trades (symbol, side, price, quantity, rebate, pnl, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (symbol, side, price, quantity, rebate, pnl, timestamp))
+
+    def save_log(self, level, message):
+        # Timestamp da chamada, não da gravação (em write-behind a linha chega depois)
+        self._escrever("""
+            INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)
+        """, (level, message, _agora_texto()))
+
+    def save_logs(self, linhas):
+        """Lote do LogService: [(level, message, timestamp)] numa transação só"""
+        self._escrever_varias("""
+            INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)
+        """, linhas)
 
     def fetch_trades(self, symbol=None):
-        cursor = self.conn.cursor()
+        """Todos os trades (do par, se informado) em ordem de id; para tabelas grandes use iterar_trades"""
+        return list(self.iterar_trades(symbol=symbol))
+
+    # ---------- consultas paginadas (keyset) ----------
+
+    def _paginar(self, sql, parametros, chave, extrair_chave, tamanho_pagina, limite=None):
+        """
+        Iterador preguiçoso: cada página é uma consulta curta que continua de onde a
+        anterior parou (WHERE chave > última), então o custo por página não cresce
+        com a tabela e o lock não fica preso entre páginas.
+        """
+        self.flush()
+        restante = limite
+        while restante is None or restante > 0:
+            tamanho = tamanho_pagina if restante is None else min(tamanho_pagina, restante)
+            with self._lock:
+                pagina = self.conn.execute(sql, (*parametros, *chave, tamanho)).fetchall()
+            yield from pagina
+            if len(pagina) < tamanho:
+                return
+            if restante is not None:
+                restante -= len(pagina)
+            chave = extrair_chave(pagina[-1])
+
+    def iterar_trades(self, desde_id=0, symbol=None, tamanho_pagina=TAMANHO_PAGINA_PADRAO):
+        """Trades com id > desde_id, em ordem de id (para acompanhar a tabela incrementalmente)"""
+        # "+symbol" tira o índice por par da disputa: a busca anda pela chave primária a partir de desde_id
+        filtro = "+symbol = ? AND " if symbol else ""
+        return self._paginar(
+            f"SELECT * FROM trades WHERE {filtro}id > ? ORDER BY id LIMIT ?",
+            (symbol,) if symbol else (), (desde_id,), lambda linha: (linha[0],), tamanho_pagina
+        )
+
+    def _recentes(self, tabela, coluna_par, par, limite, tamanho_pagina):
+        """Mais recentes primeiro; com par, percorre o índice (par, timestamp) de trás para frente"""
+        if par is None:
+            return self._paginar(
+                f"SELECT * FROM {tabela} WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (), (_MAIOR_ID,), lambda linha: (linha[0],), tamanho_pagina, limite
+            )
+        return self._paginar(
+            f"SELECT * FROM {tabela} WHERE {coluna_par} = ? AND (timestamp, id) < (?, ?) "
+            f"ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (par,), (_MAIOR_TIMESTAMP, _MAIOR_ID), lambda linha: (linha[-1], linha[0]), tamanho_pagina, limite
+        )
+
+    def iterar_eventos_recentes(self, par=None, limite=None, tamanho_pagina=TAMANHO_PAGINA_PADRAO):
+        """Eventos (do par, se informado) do mais recente para o mais antigo"""
+        return self._recentes("eventos", "par", par, limite, tamanho_pagina)
+
+    def ultimos_eventos(self, k=50, par=None):
+        """Os últimos k eventos (do par, se informado) em ordem cronológica"""
+        return list(self.iterar_eventos_recentes(par, limite=k, tamanho_pagina=k or 1))[::-1]
+
+    def ultimos_trades(self, k=10, symbol=None):
+        """Os últimos k trades (do par, se informado) em ordem cronológica"""
+        return list(self._recentes("trades", "symbol", symbol, k, k or 1))[::-1]
+
+    # ---------- agregados ----------
+
+    def resumo_agregado(self, symbol=None):
+        """Totais acumulados (do par, se informado): pnl, rebate, volume e trades, sem varrer trades"""
+        self.flush()
+        filtro = " AND symbol = ?" if symbol else ""
+        with self._lock:
+            pnl, rebate, volume, trades = self.conn.execute(
+                f"SELECT COALESCE(SUM(pnl), 0), COALESCE(SUM(rebate), 0), COALESCE(SUM(volume), 0), "
+                f"COALESCE(SUM(trades), 0) FROM agregados WHERE escala = 'total' AND balde = ''{filtro}",
+                (symbol,) if symbol else ()
+            ).fetchone()
+        return {"pnl": pnl, "rebate": rebate, "volume": volume, "trades": trades}
+
+    def resumo_por_par(self):
+        """symbol -> {"pnl", "rebate", "volume", "trades"} acumulados"""
+        self.flush()
+        with self._lock:
+            linhas = self.conn.execute(
+                "SELECT symbol, pnl, rebate, volume, trades FROM agregados WHERE escala = 'total' ORDER BY symbol"
+            ).fetchall()
+        return {s: {"pnl": p, "rebate": r, "volume": v, "trades": t} for s, p, r, v, t in linhas}
+
+    def agregados_por_balde(self, escala, symbol=None, desde=None):
+        """
+        Linhas (balde, pnl, rebate, volume, trades) da escala 'minuto', 'hora' ou 'dia',
+        somando os pares (ou só o par informado), em ordem de balde a partir de `desde`.
+        """
+        if escala not in ESCALAS_AGREGADO or escala == "total":
+            raise ValueError(f"Escala inválida: {escala}")
+        self.flush()
+        condicoes, parametros = ["escala = ?"], [escala]
         if symbol:
-            cursor.execute("SELECT * FROM trades WHERE symbol = ?", (symbol,))
-        else:
-            cursor.execute("SELECT * FROM trades")
-        return cursor.fetchall()
+            condicoes.append("symbol = ?")
+            parametros.append(symbol)
+        if desde:
+            condicoes.append("balde >= ?")
+            parametros.append(desde)
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT balde, SUM(pnl), SUM(rebate), SUM(volume), SUM(trades) FROM agregados "
+                f"WHERE {' AND '.join(condicoes)} GROUP BY balde ORDER BY balde", parametros
+            ).fetchall()
 
-    def listar_ordens_abertas(self):
-        with self.conn:
+    def listar_ordens_abertas(self, symbol=None):
+        with self._lock, self.conn:
+            if symbol:
+                return self.conn.execute(
+                    "SELECT * FROM ordens_abertas WHERE symbol = ? ORDER BY created_at", (symbol,)
+                ).fetchall()
             return self.conn.execute("SELECT * FROM ordens_abertas").fetchall()
 
     def remover_ordem_aberta(self, ordem_id):
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute("DELETE FROM ordens_abertas WHERE id = ?", (ordem_id,))
 
     def salvar_ordem_aberta(self, ordem_id, symbol, side, price, quantity):
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute("""
                 INSERT INTO ordens_abertas (id, symbol, side, price, quantity)
                 VALUES (?, ?, ?, ?, ?)
             """, (ordem_id, symbol, side, price, quantity))
 
     def registrar_evento(self, tipo_evento, par, mensagem, detalhe=None):
-        import json
         detalhe_str = json.dumps(detalhe) if detalhe else None
-        with self.conn:
-            self.conn.execute("""
-                INSERT INTO eventos (tipo_evento, par, mensagem, detalhe_json)
-                VALUES (?, ?, ?, ?)
-            """, (tipo_evento, par, mensagem, detalhe_str))
+        self._escrever("""
+            INSERT INTO eventos (tipo_evento, par, mensagem, detalhe_json, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (tipo_evento, par, mensagem, detalhe_str, _agora_texto()))
 
+    def salvar_metricas_endpoint(self, linhas):
+        """Grava uma janela do RegistroMetricas (uma linha por endpoint/símbolo, latências em segundos)"""
+        self._escrever_varias("""
+            INSERT INTO metricas_endpoint
+                (endpoint, symbol, chamadas, erros, peso, tempo_total, p50, p95, p99, max, inicio_janela)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (l["endpoint"], l["symbol"], l["chamadas"], l["erros"], l["peso"], l["tempo_total"],
+             l["p50"], l["p95"], l["p99"], l["max"],
+             datetime.utcfromtimestamp(l["desde"]).strftime('%Y-%m-%d %H:%M:%S'))
+            for l in linhas
+        ])
 
     def close(self):
-        self.conn.close()
+        # A partir daqui as escritas são síncronas; o sentinela só é lido depois de tudo o que já está na fila
+        with self._lock_fila:
+            self._fechando = True
+        if self._escritor is not None and self._escritor.is_alive():
+            self._fila.put(_FIM)
+            self._escritor.join()
+        if self._fila is not None:
+            # Se a thread de gravação morreu antes do sentinela, o que sobrou é gravado aqui
+            sobras = []
+            while True:
+                try:
+                    item = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _FIM:
+                    sobras.append(item)
+            if sobras:
+                self._gravar_lote(sobras)
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Exportação colunar de trades, eventos e logs para análise.
+
+Lê o banco em páginas por id (memória limitada a um chunk por vez) e grava cada
+chunk como uma parte colunar:
+  - Parquet (pasta/tabela/parte_<primeiro>_<ultimo>.parquet) se o pyarrow estiver instalado
+  - senão, um .npy por coluna (pasta/tabela/parte_<primeiro>_<ultimo>/<coluna>.npy),
+    que abre com np.load(..., mmap_mode="r") sem cópia
+
+Texto tem largura variável: string no Parquet e, nos .npy, um par <coluna>.bytes.npy
+(UTF-8 concatenado) + <coluna>.offsets.npy (início de cada valor), para que uma única
+mensagem longa não infle a coluna inteira. Timestamps viram datetime64[s].
+O último id exportado de cada tabela fica em pasta/estado.json: cada execução só
+exporta as linhas novas e, se for interrompida, continua da última parte completa.
+
+Uso (a partir da raiz):
+    python run.py exportar --destino ./data/export
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from repository.database_repository import DatabaseRepository
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+PASTA_EXPORT_PADRAO = "./data/export"
+TAMANHO_CHUNK_PADRAO = 50000
+ARQUIVO_ESTADO = "estado.json"
+FORMATO_PARQUET = "parquet"
+FORMATO_NPY = "npy"
+
+TEXTO = "texto"
+DATA = "data"
+
+# tabela -> [(coluna, tipo)]; tipo é um dtype numérico do NumPy, TEXTO ou DATA
+TABELAS = {
+    "trades": [("id", np.int64), ("symbol", TEXTO), ("side", TEXTO), ("price", np.float64),
+               ("quantity", np.float64), ("rebate", np.float64), ("pnl", np.float64), ("timestamp", DATA)],
+    "eventos": [("id", np.int64), ("tipo_evento", TEXTO), ("par", TEXTO), ("mensagem", TEXTO),
+                ("detalhe_json", TEXTO), ("timestamp", DATA)],
+    "logs": [("id", np.int64), ("level", TEXTO), ("message", TEXTO), ("timestamp", DATA)],
+}
+
+
+def formato_disponivel():
+    return FORMATO_PARQUET if pa is not None else FORMATO_NPY
+
+
+def _coluna(valores, tipo):
+    if tipo is TEXTO:
+        # Lista de str: um array NumPy de texto teria a largura do maior valor em todas as linhas
+        return ["" if v is None else str(v) for v in valores]
+    if tipo is DATA:
+        return np.array(valores, dtype="datetime64[s]")
+    if np.issubdtype(tipo, np.floating):
+        return np.array([np.nan if v is None else v for v in valores], dtype=tipo)
+    return np.array(valores, dtype=tipo)
+
+
+def _codificar_texto(valores):
+    """[str] -> (bytes UTF-8 concatenados como uint8, offsets int64 com n + 1 posições)"""
+    codificados = [v.encode("utf-8") for v in valores]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in codificados], out=offsets[1:])
+    return np.frombuffer(b"".join(codificados), dtype=np.uint8), offsets
+
+
+def _decodificar_texto(dados, offsets):
+    bruto = dados.tobytes()
+    return np.array([bruto[inicio:fim].decode("utf-8") for inicio, fim in zip(offsets[:-1], offsets[1:])],
+                    dtype=object)
+
+
+class ExportadorColunar:
+    def __init__(self, db, pasta_destino=PASTA_EXPORT_PADRAO, tamanho_chunk=TAMANHO_CHUNK_PADRAO, formato=None):
+        if formato == FORMATO_PARQUET and pa is None:
+            raise RuntimeError("Exportação em Parquet requer o pacote pyarrow (pip install pyarrow)")
+        self.db = db
+        self.pasta_destino = pasta_destino
+        self.tamanho_chunk = tamanho_chunk
+        self.formato = formato or formato_disponivel()
+        self._caminho_estado = os.path.join(pasta_destino, ARQUIVO_ESTADO)
+
+    # ---------- estado incremental ----------
+
+    def estado(self):
+        """tabela -> último id exportado"""
+        if not os.path.exists(self._caminho_estado):
+            return {}
+        with open(self._caminho_estado, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _salvar_estado(self, estado):
+        temporario = self._caminho_estado + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estado, f, indent=2)
+        os.replace(temporario, self._caminho_estado)
+
+    # ---------- exportação ----------
+
+    def _chunks(self, tabela, desde_id):
+        """Páginas por id: só um chunk em memória por vez, e o lock do banco é solto entre elas"""
+        colunas = ", ".join(nome for nome, _ in TABELAS[tabela])
+        while True:
+            with self.db.transacao() as conn:
+                linhas = conn.execute(
+                    f"SELECT {colunas} FROM {tabela} WHERE id > ? ORDER BY id LIMIT ?", (desde_id, self.tamanho_chunk)
+                ).fetchall()
+            if not linhas:
+                return
+            yield linhas
+            desde_id = linhas[-1][0]
+            if len(linhas) < self.tamanho_chunk:
+                return
+
+    def _gravar_parte(self, tabela, linhas):
+        especificacao = TABELAS[tabela]
+        colunas = {nome: _coluna([linha[i] for linha in linhas], tipo) for i, (nome, tipo) in enumerate(especificacao)}
+        pasta_tabela = os.path.join(self.pasta_destino, tabela)
+        os.makedirs(pasta_tabela, exist_ok=True)
+        nome = f"parte_{linhas[0][0]:012d}_{linhas[-1][0]:012d}"
+
+        # Grava com nome temporário e renomeia: uma parte pela metade nunca aparece para quem lê
+        if self.formato == FORMATO_PARQUET:
+            destino = os.path.join(pasta_tabela, nome + ".parquet")
+            pq.write_table(pa.table({nome: pa.array(valores) for nome, valores in colunas.items()}), destino + ".tmp")
+            os.replace(destino + ".tmp", destino)
+        else:
+            destino = os.path.join(pasta_tabela, nome)
+            temporario = destino + ".tmp"
+            shutil.rmtree(temporario, ignore_errors=True)
+            os.makedirs(temporario)
+            for coluna, valores in colunas.items():
+                if isinstance(valores, list):
+                    dados, offsets = _codificar_texto(valores)
+                    np.save(os.path.join(temporario, coluna + ".bytes.npy"), dados)
+                    np.save(os.path.join(temporario, coluna + ".offsets.npy"), offsets)
+                else:
+                    np.save(os.path.join(temporario, coluna + ".npy"), valores)
+            shutil.rmtree(destino, ignore_errors=True)
+            os.replace(temporario, destino)
+        return destino
+
+    def exportar(self, tabelas=None):
+        """Exporta as linhas novas de cada tabela. Retorna tabela -> {"linhas", "partes", "ultimo_id"}"""
+        os.makedirs(self.pasta_destino, exist_ok=True)
+        self.db.flush()
+        estado = self.estado()
+        relatorio = {}
+        for tabela in tabelas or TABELAS:
+            ultimo_id = estado.get(tabela, 0)
+            resultado = relatorio[tabela] = {"linhas": 0, "partes": 0, "ultimo_id": ultimo_id}
+            for linhas in self._chunks(tabela, ultimo_id):
+                self._gravar_parte(tabela, linhas)
+                estado[tabela] = resultado["ultimo_id"] = linhas[-1][0]
+                self._salvar_estado(estado)
+                resultado["linhas"] += len(linhas)
+                resultado["partes"] += 1
+        return relatorio
+
+
+def carregar_colunas(pasta_destino, tabela, colunas=None):
+    """
+    Junta as partes exportadas de uma tabela em arrays NumPy (coluna -> array), em ordem de id.
+    Colunas numéricas das partes .npy são abertas com mmap; texto vem como array de objetos str.
+    Parquet requer pyarrow.
+    """
+    pasta_tabela = os.path.join(pasta_destino, tabela)
+    nomes = colunas or [nome for nome, _ in TABELAS[tabela]]
+    if not os.path.isdir(pasta_tabela):
+        return {nome: np.empty(0) for nome in nomes}
+
+    partes = {nome: [] for nome in nomes}
+    tipos = dict(TABELAS[tabela])
+    for parte in sorted(os.listdir(pasta_tabela)):
+        caminho = os.path.join(pasta_tabela, parte)
+        if parte.endswith(".tmp"):
+            continue
+        if parte.endswith(".parquet"):
+            if pq is None:
+                raise RuntimeError("Leitura de Parquet requer o pacote pyarrow (pip install pyarrow)")
+            tabela_arrow = pq.read_table(caminho, columns=nomes)
+            for nome in nomes:
+                valores = tabela_arrow.column(nome).to_numpy()
+                # Parquet não tem unidade de segundos: volta como ms
+                partes[nome].append(valores.astype("datetime64[s]") if tipos[nome] is DATA else valores)
+        elif os.path.isdir(caminho):
+            for nome in nomes:
+                base = os.path.join(caminho, nome)
+                if os.path.exists(base + ".offsets.npy"):
+                    partes[nome].append(_decodificar_texto(np.load(base + ".bytes.npy", mmap_mode="r"),
+                                                           np.load(base + ".offsets.npy")))
+                else:
+                    partes[nome].append(np.load(base + ".npy", mmap_mode="r"))
+
+    def juntar(arrays):
+        if not arrays:
+            return np.empty(0)
+        return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+    return {nome: juntar(arrays) for nome, arrays in partes.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportação colunar incremental de trades, eventos e logs")
+    parser.add_argument("--db", help="banco principal (padrão: DATA_DIR/scalping.db)")
+    parser.add_argument("--destino", default=PASTA_EXPORT_PADRAO, help="pasta da exportação")
+    parser.add_argument("--tabela", action="append", choices=list(TABELAS), help="repetível (padrão: todas)")
+    parser.add_argument("--formato", choices=(FORMATO_PARQUET, FORMATO_NPY), help="padrão: parquet se houver pyarrow")
+    parser.add_argument("--chunk", type=int, default=TAMANHO_CHUNK_PADRAO, help="linhas por parte")
+    args = parser.parse_args(argv)
+
+    caminho_db = args.db or f"{os.getenv('DATA_DIR', './data')}/scalping.db"
+    db = DatabaseRepository(caminho_db)
+    try:
+        exportador = ExportadorColunar(db, args.destino, tamanho_chunk=args.chunk, formato=args.formato)
+        relatorio = exportador.exportar(args.tabela)
+    finally:
+        db.close()
+    for tabela, r in relatorio.items():
+        print(f"[EXPORT] {tabela}: {r['linhas']} linhas novas em {r['partes']} partes ({exportador.formato}) | "
+              f"último id: {r['ultimo_id']}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Manutenção do banco do bot: retenção, resumo diário e arquivamento de logs/eventos.
+
+Linhas mais velhas que a retenção saem do banco principal em lotes curtos:
+  1. são copiadas para um arquivo SQLite por dia (pasta_arquivo/arquivo_YYYY-MM-DD.db),
+     com o mesmo id (INSERT OR IGNORE: rodar de novo após uma falha não duplica nada)
+  2. numa única transação curta no banco principal, entram no resumo diário
+     (logs_diario / eventos_diario) e são apagadas
+  3. as páginas liberadas voltam ao sistema com PRAGMA incremental_vacuum, em blocos
+
+Cada lote segura o lock de escrita só pelo tempo do seu DELETE; entre lotes o bot grava normalmente.
+
+Uso (a partir da raiz):
+    python run.py manutencao --logs-dias 7 --eventos-dias 30
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from repository.database_repository import DatabaseRepository
+
+RETENCAO_LOGS_DIAS = 7
+RETENCAO_EVENTOS_DIAS = 30
+PASTA_ARQUIVO_PADRAO = "./data/arquivo"
+TAMANHO_LOTE_PADRAO = 5000
+PAGINAS_VACUUM_PADRAO = 1000
+
+# tabela -> (colunas, colunas do resumo diário além do dia, tabela de resumo)
+TABELAS = {
+    "logs": (("id", "level", "message", "timestamp"), ("level",), "logs_diario"),
+    "eventos": (("id", "tipo_evento", "par", "mensagem", "detalhe_json", "timestamp"), ("tipo_evento", "par"),
+                "eventos_diario"),
+}
+
+SCHEMA_ARQUIVO = (
+    "CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY, level TEXT, message TEXT, timestamp DATETIME)",
+    "CREATE TABLE IF NOT EXISTS eventos (id INTEGER PRIMARY KEY, tipo_evento TEXT, par TEXT, mensagem TEXT, "
+    "detalhe_json TEXT, timestamp DATETIME)",
+)
+
+
+class ManutencaoBanco:
+    def __init__(self, db, retencao_logs_dias=RETENCAO_LOGS_DIAS, retencao_eventos_dias=RETENCAO_EVENTOS_DIAS,
+                 pasta_arquivo=PASTA_ARQUIVO_PADRAO, tamanho_lote=TAMANHO_LOTE_PADRAO,
+                 paginas_vacuum=PAGINAS_VACUUM_PADRAO, pausa_lote=0.0):
+        """
+        db: DatabaseRepository do banco principal.
+        retencao_*_dias: None mantém a tabela inteira.
+        pausa_lote: segundos de folga entre lotes para o bot gravar.
+        """
+        self.db = db
+        self.retencao = {"logs": retencao_logs_dias, "eventos": retencao_eventos_dias}
+        self.pasta_arquivo = pasta_arquivo
+        self.tamanho_lote = tamanho_lote
+        self.paginas_vacuum = paginas_vacuum
+        self.pausa_lote = pausa_lote
+        self._arquivos = {}  # dia -> conexão do arquivo
+
+    # ---------- arquivo por dia ----------
+
+    def _arquivo(self, dia):
+        conn = self._arquivos.get(dia)
+        if conn is None:
+            os.makedirs(self.pasta_arquivo, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.pasta_arquivo, f"arquivo_{dia}.db"))
+            with conn:
+                for sql in SCHEMA_ARQUIVO:
+                    conn.execute(sql)
+            self._arquivos[dia] = conn
+        return conn
+
+    def _fechar_arquivos(self):
+        for conn in self._arquivos.values():
+            conn.close()
+        self._arquivos.clear()
+
+    # ---------- retenção ----------
+
+    def _lote(self, tabela, colunas, desde_id, corte):
+        """
+        Próximas linhas por id; para na primeira que ainda está dentro da retenção.
+        Linhas sem timestamp não têm dia de arquivo nem de resumo: ficam no banco e
+        a passada segue depois delas.
+        Retorna (antigas, último id percorrido, linhas sem timestamp, terminou).
+        """
+        with self.db.transacao() as conn:
+            linhas = conn.execute(
+                f"SELECT {', '.join(colunas)} FROM {tabela} WHERE id > ? ORDER BY id LIMIT ?",
+                (desde_id, self.tamanho_lote)
+            ).fetchall()
+        antigas = []
+        ultimo_id = desde_id
+        sem_data = 0
+        for linha in linhas:
+            if linha[-1] is None:
+                sem_data += 1
+            elif linha[-1] >= corte:
+                return antigas, ultimo_id, sem_data, True
+            else:
+                antigas.append(linha)
+            ultimo_id = linha[0]
+        return antigas, ultimo_id, sem_data, len(linhas) < self.tamanho_lote
+
+    def _resumir(self, linhas, chaves):
+        """dia + chaves -> [linhas, primeiro, ultimo]"""
+        resumo = {}
+        for linha in linhas:
+            timestamp = linha[-1]
+            chave = (timestamp[:10],) + tuple(linha[i] for i in chaves)
+            atual = resumo.get(chave)
+            if atual is None:
+                resumo[chave] = [1, timestamp, timestamp]
+            else:
+                atual[0] += 1
+                atual[1] = min(atual[1], timestamp)
+                atual[2] = max(atual[2], timestamp)
+        return resumo
+
+    def arquivar(self, tabela, agora=None):
+        """
+        Arquiva, resume e apaga as linhas de `tabela` mais velhas que a retenção.
+        Percorre por id (ordem de inserção, sem precisar de índice por tempo) e para
+        na primeira linha que ainda está dentro da retenção. Linhas com timestamp
+        NULL são mantidas e contadas em `sem_data`, sem interromper a passada.
+        """
+        dias_retencao = self.retencao[tabela]
+        relatorio = {"arquivadas": 0, "lotes": 0, "dias": [], "sem_data": 0}
+        if dias_retencao is None:
+            return relatorio
+        colunas, colunas_resumo, tabela_resumo = TABELAS[tabela]
+        agora = agora or datetime.utcnow()
+        corte = (agora - timedelta(days=dias_retencao)).strftime('%Y-%m-%d %H:%M:%S')
+        indices_resumo = tuple(colunas.index(c) for c in colunas_resumo)
+        marcadores = ", ".join("?" for _ in colunas)
+        chaves_resumo = ", ".join(("dia",) + colunas_resumo)
+        dias = set()
+
+        ultimo_id = 0
+        terminou = False
+        while not terminou:
+            linhas, ate_id, sem_data, terminou = self._lote(tabela, colunas, ultimo_id, corte)
+            relatorio["sem_data"] += sem_data
+            if not linhas:
+                # Lote só com linhas sem timestamp: segue para o próximo
+                ultimo_id = ate_id
+                continue
+
+            por_dia = {}
+            for linha in linhas:
+                por_dia.setdefault(linha[-1][:10], []).append(linha)
+            for dia, do_dia in por_dia.items():
+                with self._arquivo(dia) as arquivo:
+                    arquivo.executemany(f"INSERT OR IGNORE INTO {tabela} VALUES ({marcadores})", do_dia)
+            dias.update(por_dia)
+
+            resumo = self._resumir(linhas, indices_resumo)
+            with self.db.transacao() as conn:
+                conn.executemany(f"""
+                    INSERT INTO {tabela_resumo} ({chaves_resumo}, linhas, primeiro, ultimo)
+                    VALUES ({", ".join("?" for _ in range(len(colunas_resumo) + 4))})
+                    ON CONFLICT ({chaves_resumo}) DO UPDATE SET
+                        linhas = linhas + excluded.linhas,
+                        primeiro = MIN(primeiro, excluded.primeiro),
+                        ultimo = MAX(ultimo, excluded.ultimo)
+                """, [chave + tuple(valores) for chave, valores in resumo.items()])
+                conn.execute(f"DELETE FROM {tabela} WHERE id > ? AND id <= ? AND timestamp IS NOT NULL",
+                             (ultimo_id, ate_id))
+
+            ultimo_id = ate_id
+            relatorio["arquivadas"] += len(linhas)
+            relatorio["lotes"] += 1
+            if self.pausa_lote:
+                time.sleep(self.pausa_lote)
+
+        relatorio["dias"] = sorted(dias)
+        return relatorio
+
+    # ---------- vacuum ----------
+
+    def vacuum_incremental(self):
+        """Devolve as páginas livres em blocos de `paginas_vacuum`. Retorna quantas foram liberadas"""
+        with self.db.transacao() as conn:
+            modo = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if modo != 2:
+            # Banco criado antes do auto_vacuum incremental: só um VACUUM completo converte
+            print("[MANUTENÇÃO] ⚠️ Banco sem auto_vacuum incremental; rode com --converter-vacuum numa janela parada")
+            return 0
+        liberadas = 0
+        while True:
+            with self.db.transacao() as conn:
+                livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not livres:
+                    break
+                passo = min(livres, self.paginas_vacuum)
+                conn.execute(f"PRAGMA incremental_vacuum({passo})").fetchall()
+            liberadas += passo
+            if self.pausa_lote:
+                time.sleep(self.pausa_lote)
+        return liberadas
+
+    def converter_para_vacuum_incremental(self):
+        """VACUUM completo (trava o banco enquanto roda): só para bancos antigos, uma vez"""
+        self.db.flush()
+        with self.db.transacao() as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+
+    # ---------- job ----------
+
+    def rodar(self, agora=None):
+        inicio = time.time()
+        self.db.flush()
+        try:
+            relatorio = {tabela: self.arquivar(tabela, agora) for tabela in TABELAS}
+        finally:
+            self._fechar_arquivos()
+        relatorio["paginas_liberadas"] = self.vacuum_incremental()
+        relatorio["segundos"] = time.time() - inicio
+        return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retenção, resumo diário e arquivamento de logs/eventos")
+    parser.add_argument("--db", help="banco principal (padrão: DATA_DIR/scalping.db)")
+    parser.add_argument("--logs-dias", type=float, help="retenção de logs em dias (padrão: config.json)")
+    parser.add_argument("--eventos-dias", type=float, help="retenção de eventos em dias (padrão: config.json)")
+    parser.add_argument("--arquivo", help="pasta dos arquivos por dia (padrão: config.json)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="linhas por transação")
+    parser.add_argument("--converter-vacuum", action="store_true",
+                        help="converte um banco antigo para auto_vacuum incremental (VACUUM completo)")
+    args = parser.parse_args(argv)
+
+    try:
+        from utils.config_loader import carregar_config
+        config = carregar_config()
+    except Exception:
+        config = {}
+
+    caminho_db = args.db or f"{os.getenv('DATA_DIR', './data')}/scalping.db"
+    db = DatabaseRepository(caminho_db)
+    manutencao = ManutencaoBanco(
+        db,
+        retencao_logs_dias=args.logs_dias if args.logs_dias is not None else config.get("retencao_logs_dias", RETENCAO_LOGS_DIAS),
+        retencao_eventos_dias=args.eventos_dias if args.eventos_dias is not None else config.get("retencao_eventos_dias", RETENCAO_EVENTOS_DIAS),
+        pasta_arquivo=args.arquivo or config.get("pasta_arquivo", PASTA_ARQUIVO_PADRAO),
+        tamanho_lote=args.lote,
+    )
+    try:
+        if args.converter_vacuum:
+            print("[MANUTENÇÃO] Convertendo para auto_vacuum incremental (VACUUM completo)...")
+            manutencao.converter_para_vacuum_incremental()
+        r = manutencao.rodar()
+    finally:
+        db.close()
+    print(f"[MANUTENÇÃO] Logs arquivados: {r['logs']['arquivadas']} | Eventos arquivados: {r['eventos']['arquivadas']} | "
+          f"Dias: {sorted(set(r['logs']['dias']) | set(r['eventos']['dias'])) or 'nenhum'} | "
+          f"Páginas liberadas: {r['paginas_liberadas']} | {r['segundos']:.2f}s")
+    return r
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import numpy as np
+
+PROFUNDIDADE_PADRAO = 5
+TOLERANCIA = 1e-9
+
+
+def _montar_niveis(oportunidades, pares, profundidade):
+    """
+    Converte os níveis de book de todos os pares em matrizes (pares x níveis).
+    Níveis ausentes ficam com preço e quantidade zero, o que os anula nos cálculos.
+    """
+    n = len(pares)
+    bid_px = np.zeros((n, profundidade))
+    bid_qty = np.zeros((n, profundidade))
+    ask_px = np.zeros((n, profundidade))
+    ask_qty = np.zeros((n, profundidade))
+
+    for i, par in enumerate(pares):
+        op = oportunidades[par]
+        bids = op.get("bids") or [[op["bid"], 0.0]]
+        asks = op.get("asks") or [[op["ask"], 0.0]]
+        for j, nivel in enumerate(bids[:profundidade]):
+            bid_px[i, j] = nivel[0]
+            bid_qty[i, j] = nivel[1]
+        for j, nivel in enumerate(asks[:profundidade]):
+            ask_px[i, j] = nivel[0]
+            ask_qty[i, j] = nivel[1]
+
+    return bid_px, bid_qty, ask_px, ask_qty
+
+
+def _preencher(precos, qtds, alvo):
+    """
+    Simula o consumo de `alvo` unidades nível a nível, para todos os pares de uma vez.
+    Retorna (quantidade preenchida, preço médio ponderado).
+    """
+    acumulado = np.cumsum(qtds, axis=1)
+    anterior = acumulado - qtds
+    consumido = np.clip(alvo[:, None] - anterior, 0.0, qtds)
+    preenchido = consumido.sum(axis=1)
+    notional = (consumido * precos).sum(axis=1)
+    vwap = np.divide(notional, preenchido, out=np.zeros_like(notional), where=preenchido > 0)
+    return preenchido, vwap
+
+
+def pontuar_oportunidades(oportunidades, quantidades, quantidade_padrao, profundidade=PROFUNDIDADE_PADRAO):
+    """
+    Pontua todas as oportunidades do scanner em uma única passada vetorizada.
+
+    Para cada par calcula, com a quantidade de `quantidades` (ou `quantidade_padrao`):
+      - spread_ponderado: (VWAP ask - VWAP bid) / mid consumindo a quantidade no book
+      - microprice: média do bid/ask ponderada pelo tamanho do lado oposto no topo
+      - desequilibrio: (qtd bids - qtd asks) / (qtd bids + qtd asks) nos níveis lidos
+      - notional_executavel: quantidade executável nos dois lados * mid
+      - preenchimento: fração da quantidade desejada que o book comporta
+      - score: spread_ponderado * preenchimento
+
+    Retorna uma lista de dicts ordenada por score decrescente (mantendo bid, ask,
+    spread e timestamp originais para alimentar o TradeEngine).
+    """
+    pares = list(oportunidades.keys())
+    if not pares:
+        return []
+
+    bid_px, bid_qty, ask_px, ask_qty = _montar_niveis(oportunidades, pares, profundidade)
+    alvo = np.array([float(quantidades.get(par, quantidade_padrao)) for par in pares])
+
+    melhor_bid = bid_px[:, 0]
+    melhor_ask = ask_px[:, 0]
+    mid = (melhor_bid + melhor_ask) / 2
+
+    preenchido_bid, vwap_bid = _preencher(bid_px, bid_qty, alvo)
+    preenchido_ask, vwap_ask = _preencher(ask_px, ask_qty, alvo)
+
+    executavel = np.minimum(preenchido_bid, preenchido_ask)
+    preenchimento = np.divide(executavel, alvo, out=np.zeros_like(alvo), where=alvo > 0)
+    tem_liquidez = (preenchido_bid > 0) & (preenchido_ask > 0) & (mid > 0)
+
+    spread_ponderado = np.where(tem_liquidez, (vwap_ask - vwap_bid) / np.where(mid > 0, mid, 1.0), 0.0)
+
+    qtd_topo = bid_qty[:, 0] + ask_qty[:, 0]
+    microprice = np.divide(
+        melhor_bid * ask_qty[:, 0] + melhor_ask * bid_qty[:, 0], qtd_topo,
+        out=mid.copy(), where=qtd_topo > 0
+    )
+
+    total_bid = bid_qty.sum(axis=1)
+    total_ask = ask_qty.sum(axis=1)
+    total = total_bid + total_ask
+    desequilibrio = np.divide(total_bid - total_ask, total, out=np.zeros_like(total), where=total > 0)
+
+    notional_executavel = executavel * mid
+    score = spread_ponderado * preenchimento
+
+    ordem = np.argsort(-score, kind="stable")
+
+    tabela = []
+    for i in ordem:
+        par = pares[i]
+        op = oportunidades[par]
+        tabela.append({
+            "symbol": par,
+            "bid": op["bid"],
+            "ask": op["ask"],
+            "spread": op["spread"],
+            "timestamp": op.get("timestamp"),
+            "quantidade": float(alvo[i]),
+            "spread_ponderado": float(spread_ponderado[i]),
+            "microprice": float(microprice[i]),
+            "desequilibrio": float(desequilibrio[i]),
+            "notional_executavel": float(notional_executavel[i]),
+            "preenchimento": float(preenchimento[i]),
+            "score": float(score[i])
+        })
+    return tabela
+
+
+def melhores_oportunidades(oportunidades, quantidades, quantidade_padrao, max_pares=None,
+                           preenchimento_minimo=1.0, profundidade=PROFUNDIDADE_PADRAO):
+    """
+    Atalho para o loop principal: pontua, descarta pares sem liquidez suficiente
+    para a quantidade configurada e devolve os `max_pares` melhores.
+    """
+    tabela = pontuar_oportunidades(oportunidades, quantidades, quantidade_padrao, profundidade)
+    tabela = [linha for linha in tabela if linha["preenchimento"] >= preenchimento_minimo - TOLERANCIA]
+    if max_pares:
+        tabela = tabela[:max_pares]
+    return tabela
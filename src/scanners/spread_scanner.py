@@ -1,51 +1,194 @@
 from typing import List, Dict
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from services.exchange_executor import ExchangeExecutor
 from utils.config_loader import carregar_config
 
-def escanear_spreads(exchange, pares, spread_minimo, verbose=False, modo_flexivel=False):
+MAX_WORKERS_PADRAO = 8
+
+
+def _ler_book(exchange, par, verbose=False):
+    """
+    Busca o order book de um par e devolve bid/ask/spread com o timestamp da leitura
+    e os níveis completos (bids/asks) para o scoring por profundidade.
+    Retorna None se o book vier vazio.
+    """
+    book = exchange.fetch_order_book(par, limit=5)
+    timestamp = time.time()
+    if not book['bids'] or not book['asks']:
+        if verbose:
+            print(f"[SCANNER] {par} | Sem dados suficientes no order book")
+        return None
+
+    bid = book['bids'][0][0]
+    ask = book['asks'][0][0]
+    spread = (ask - bid) / bid
+
+    if verbose:
+        print(f"[SCANNER] {par} | Bid: {bid:.8f} | Ask: {ask:.8f} | Spread: {spread:.5%}")
+
+    return {
+        "bid": bid,
+        "ask": ask,
+        "spread": spread,
+        "timestamp": timestamp,
+        "bids": book['bids'][:5],
+        "asks": book['asks'][:5]
+    }
+
+
+def _filtrar(oportunidades, par, dados, spread_minimo, verbose, modo_flexivel):
+    spread = dados["spread"]
+    if spread >= spread_minimo or modo_flexivel:
+        oportunidades[par] = dados
+        if verbose and spread < spread_minimo and modo_flexivel:
+            print(f"[SCANNER] ⚠️ {par} | Spread {spread:.5%} < alvo, mas incluso por modo_flexivel")
+
+
+def _pares_negociaveis(pares, mercados, verbose=False):
+    """Remove pares que não existem ou estão inativos no índice de mercados"""
+    if mercados is None:
+        return list(pares)
+    validos = []
+    for par in pares:
+        if mercados.contem(par):
+            validos.append(par)
+        elif verbose:
+            print(f"[SCANNER] ⚠️ {par} | Mercado inexistente ou inativo, ignorado")
+    return validos
+
+
+def escanear_spreads(exchange, pares, spread_minimo, verbose=False, modo_flexivel=False,
+                     concorrente=False, max_workers=MAX_WORKERS_PADRAO, mercados=None, gravador=None):
     """
     Escaneia spreads de forma otimizada.
     Se modo_flexivel=True, retorna todos os pares com dados, independente do spread.
+    Se concorrente=True, busca todos os books em paralelo (no máximo max_workers
+    requisições simultâneas) em vez de um par por vez.
+    Se mercados (MarketMetadata) for informado, pares inexistentes/inativos nem são consultados.
+    `exchange` pode ser o cliente ccxt ou o próprio ExchangeExecutor; neste caso as leituras
+    passam pelo agendador de requisições compartilhado (prioridade de scan).
+    Cada oportunidade traz o timestamp (epoch) em que o book foi lido.
+    Se gravador (GravadorBooks) for informado, todo book lido é gravado, inclusive
+    os que não viram oportunidade.
     """
+    pares = _pares_negociaveis(pares, mercados, verbose)
+
+    if concorrente:
+        return escanear_spreads_concorrente(
+            exchange, pares, spread_minimo,
+            verbose=verbose, modo_flexivel=modo_flexivel, max_workers=max_workers, gravador=gravador
+        )
+
     oportunidades = {}
+    inicio = time.time()
 
     if verbose:
         print(f"[SCANNER] Iniciando escaneamento de {len(pares)} pares...")
 
     for i, par in enumerate(pares):
         try:
-            if i > 0:
+            if i > 0 and not hasattr(exchange, "agendador"):
+                # Sem agendador compartilhado, espaça as requisições manualmente
                 time.sleep(0.1)
 
-            book = exchange.fetch_order_book(par, limit=5)
-            if not book['bids'] or not book['asks']:
-                if verbose:
-                    print(f"[SCANNER] {par} | Sem dados suficientes no order book")
+            dados = _ler_book(exchange, par, verbose)
+            if dados is None:
                 continue
+            if gravador is not None:
+                gravador.registrar(par, dados["timestamp"], dados["bids"], dados["asks"])
 
-            bid = book['bids'][0][0]
-            ask = book['asks'][0][0]
-            spread = (ask - bid) / bid
+            _filtrar(oportunidades, par, dados, spread_minimo, verbose, modo_flexivel)
 
+        except Exception as e:
             if verbose:
-                print(f"[SCANNER] {par} | Bid: {bid:.8f} | Ask: {ask:.8f} | Spread: {spread:.5%}")
+                print(f"[SCANNER] ❌ Erro ao escanear {par}: {str(e)}")
+            continue
 
-            if spread >= spread_minimo or modo_flexivel:
-                oportunidades[par] = {
-                    "bid": bid,
-                    "ask": ask,
-                    "spread": spread
-                }
-                if verbose and spread < spread_minimo and modo_flexivel:
-                    print(f"[SCANNER] ⚠️ {par} | Spread {spread:.5%} < alvo, mas incluso por modo_flexivel")
+    if verbose:
+        print(f"[SCANNER] Encontradas {len(oportunidades)} oportunidades em {time.time() - inicio:.2f}s")
 
-        except Exception as e:
+    return oportunidades
+
+
+def escanear_spreads_feed(feed, pares, spread_minimo, verbose=False, modo_flexivel=False, max_idade=2.0):
+    """
+    Monta as oportunidades a partir do BookFeed em memória, sem nenhuma requisição REST.
+    Pares sem dados ou com book mais velho que max_idade segundos são ignorados.
+    """
+    oportunidades = {}
+    agora = time.time()
+
+    for par in pares:
+        topo = feed.top_of_book(par)
+        if topo is None:
             if verbose:
-                print(f"[SCANNER] ❌ Erro ao escanear {par}: {str(e)}")
+                print(f"[SCANNER] {par} | Sem dados no book feed")
+            continue
+
+        idade = agora - topo["timestamp"]
+        if idade > max_idade:
+            if verbose:
+                print(f"[SCANNER] ⚠️ {par} | Book desatualizado ({idade:.2f}s > {max_idade:.2f}s)")
             continue
 
+        dados = {
+            "bid": topo["bid"],
+            "ask": topo["ask"],
+            "spread": topo["spread"],
+            "timestamp": topo["timestamp"]
+        }
+        livro = feed.livro(par)
+        if livro is not None:
+            dados["bids"] = livro["bids"]
+            dados["asks"] = livro["asks"]
+        if verbose:
+            print(f"[SCANNER] {par} | Bid: {dados['bid']:.8f} | Ask: {dados['ask']:.8f} | Spread: {dados['spread']:.5%} | Idade: {idade:.3f}s")
+
+        _filtrar(oportunidades, par, dados, spread_minimo, verbose, modo_flexivel)
+
     if verbose:
-        print(f"[SCANNER] Encontradas {len(oportunidades)} oportunidades")
+        print(f"[SCANNER] Encontradas {len(oportunidades)} oportunidades (book feed)")
 
     return oportunidades
+
+
+def escanear_spreads_concorrente(exchange, pares, spread_minimo, verbose=False, modo_flexivel=False,
+                                 max_workers=MAX_WORKERS_PADRAO, gravador=None):
+    """
+    Versão concorrente do scanner: dispara todas as leituras de book em um pool
+    limitado de threads, de modo que o tempo total fica perto de uma ida e volta
+    à exchange em vez de crescer com o número de pares.
+    O limite de requisições simultâneas é max_workers; o peso das requisições é
+    controlado pelo agendador do ExchangeExecutor (ou pelo rate limit do ccxt).
+    """
+    oportunidades = {}
+    inicio = time.time()
+    lock = threading.Lock()
+
+    if verbose:
+        print(f"[SCANNER] Iniciando escaneamento concorrente de {len(pares)} pares (workers={max_workers})...")
+
+    def _tarefa(par):
+        try:
+            dados = _ler_book(exchange, par, verbose)
+            if dados is None:
+                return
+            if gravador is not None:
+                gravador.registrar(par, dados["timestamp"], dados["bids"], dados["asks"])
+            with lock:
+                _filtrar(oportunidades, par, dados, spread_minimo, verbose, modo_flexivel)
+        except Exception as e:
+            if verbose:
+                print(f"[SCANNER] ❌ Erro ao escanear {par}: {str(e)}")
+
+    if pares:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pares)))) as pool:
+            list(pool.map(_tarefa, pares))
+
+    if verbose:
+        print(f"[SCANNER] Encontradas {len(oportunidades)} oportunidades em {time.time() - inicio:.2f}s")
+
+    # Mantém a ordem dos pares de entrada
+    return {par: oportunidades[par] for par in pares if par in oportunidades}
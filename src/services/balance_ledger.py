@@ -0,0 +1,151 @@
+import threading
+import time
+
+INTERVALO_RECONCILIACAO_PADRAO = 300  # segundos
+MAX_ORDENS_APLICADAS = 10000  # fills já aplicados lembrados por ordem (os mais antigos saem)
+
+
+class BalanceLedger:
+    """
+    Livro-razão local de saldos livres.
+    É semeado uma vez com fetch_balance, atualizado a partir das nossas próprias
+    ordens (acks, fills e cancelamentos) e reconciliado com a exchange
+    periodicamente ou quando alguém sinaliza divergência.
+    Leituras são buscas em memória.
+    """
+
+    def __init__(self, buscar_saldo, intervalo_reconciliacao=INTERVALO_RECONCILIACAO_PADRAO):
+        self.buscar_saldo = buscar_saldo
+        self.intervalo_reconciliacao = intervalo_reconciliacao
+        self._livre = {}
+        self._reservas = {}  # order_id -> (asset, valor)
+        self._aplicado = {}  # order_id -> (filled, custo, {moeda: fee}) já somados ao saldo
+        self._lock = threading.RLock()
+        self._ultima_reconciliacao = None
+        self._divergente = False
+        self.reconciliacoes = 0
+
+    # ---------- reconciliação ----------
+
+    def reconciliar(self):
+        """Substitui o saldo local pelo da exchange (uma chamada fetch_balance)"""
+        balance = self.buscar_saldo()
+        livre = {asset: float(valor) for asset, valor in (balance.get('free') or {}).items() if valor}
+        with self._lock:
+            if self._ultima_reconciliacao is not None:
+                for asset in set(livre) | set(self._livre):
+                    local = self._livre.get(asset, 0.0)
+                    remoto = livre.get(asset, 0.0)
+                    if abs(local - remoto) > max(1e-12, abs(remoto) * 1e-6):
+                        print(f"[SALDO] ⚠️ Divergência em {asset}: local={local:.8f} exchange={remoto:.8f}")
+            self._livre = livre
+            self._ultima_reconciliacao = time.time()
+            self._divergente = False
+            self.reconciliacoes += 1
+
+    def marcar_divergencia(self):
+        """Força reconciliação na próxima leitura (ex.: erro de saldo insuficiente)"""
+        self._divergente = True
+
+    def _reconciliar_se_necessario(self):
+        if (self._ultima_reconciliacao is None or self._divergente or
+                time.time() - self._ultima_reconciliacao >= self.intervalo_reconciliacao):
+            self.reconciliar()
+
+    # ---------- leitura ----------
+
+    def livre(self, asset):
+        self._reconciliar_se_necessario()
+        return self._livre.get(asset, 0.0)
+
+    def todos(self):
+        self._reconciliar_se_necessario()
+        with self._lock:
+            return dict(self._livre)
+
+    # ---------- atualização por ordens ----------
+
+    def _somar(self, asset, valor):
+        self._livre[asset] = self._livre.get(asset, 0.0) + valor
+
+    def registrar_ordem(self, order_id, symbol, side, price, quantity):
+        """Ack de ordem limit: bloqueia o saldo que a ordem usa"""
+        base, quote = symbol.split('/')
+        asset, valor = (quote, price * quantity) if side.lower() == 'buy' else (base, quantity)
+        with self._lock:
+            self._somar(asset, -valor)
+            self._reservas[order_id] = (asset, valor)
+
+    def liberar_ordem(self, order_id):
+        """Cancelamento: devolve o saldo ainda bloqueado pela ordem"""
+        with self._lock:
+            reserva = self._reservas.pop(order_id, None)
+            if reserva:
+                asset, valor = reserva
+                self._somar(asset, valor)
+
+    def aplicar_ordem(self, order):
+        """
+        Aplica o fill de uma ordem ccxt (filled, average/price, fee).
+        Se a ordem tinha saldo bloqueado, a reserva é convertida no fill.
+        Idempotente por id: ler de novo a mesma ordem só aplica o que executou desde a última leitura.
+        """
+        filled = float(order.get('filled') or 0)
+        symbol = order.get('symbol')
+        if not symbol or '/' not in symbol:
+            return
+        preco = float(order.get('average') or order.get('price') or 0)
+        base, quote = symbol.split('/')
+        side = (order.get('side') or '').lower()
+        order_id = order.get('id')
+        custo = float(order.get('cost') or filled * preco) if filled > 0 else 0.0
+        fees = {}
+        for fee in order.get('fees') or ([order['fee']] if order.get('fee') else []):
+            if fee and fee.get('cost') and fee.get('currency'):
+                fees[fee['currency']] = fees.get(fee['currency'], 0.0) + float(fee['cost'])
+
+        with self._lock:
+            # Desfaz a reserva e aplica o que realmente executou
+            self.liberar_ordem(order_id)
+            filled_antes, custo_antes, fees_antes = self._aplicado.pop(order_id, (0.0, 0.0, {}))
+            if order_id is not None:
+                fees_total = {m: max(fees.get(m, 0.0), fees_antes.get(m, 0.0), key=abs) for m in set(fees) | set(fees_antes)}
+                self._aplicado[order_id] = (max(filled, filled_antes), max(custo, custo_antes), fees_total)
+                if len(self._aplicado) > MAX_ORDENS_APLICADAS:
+                    self._aplicado.pop(next(iter(self._aplicado)))
+
+            # Só a parte nova (uma leitura repetida ou mais velha não soma nada)
+            if filled > filled_antes:
+                novo_filled = filled - filled_antes
+                novo_custo = max(0.0, custo - custo_antes)
+                if side == 'buy':
+                    self._somar(base, novo_filled)
+                    self._somar(quote, -novo_custo)
+                elif side == 'sell':
+                    self._somar(base, -novo_filled)
+                    self._somar(quote, novo_custo)
+
+            for moeda, valor in fees.items():
+                antes = fees_antes.get(moeda, 0.0)
+                if abs(valor) > abs(antes):
+                    # Fee positivo é cobrado; rebate (maker negativo) volta para o saldo
+                    self._somar(moeda, -(valor - antes))
+
+            for asset in (base, quote):
+                if self._livre.get(asset, 0.0) < 0:
+                    # Saldo local negativo é sinal claro de divergência
+                    self._divergente = True
+
+    def aplicar_cancelamento(self, order_id, resposta):
+        """
+        Resposta de cancelamento: aplica o que a ordem executou antes do cancel
+        (filled/cost da resposta) pelo mesmo caminho idempotente de aplicar_ordem.
+        Sem essa informação, devolve a reserva inteira e pede reconciliação.
+        """
+        if isinstance(resposta, dict) and resposta.get('filled') is not None and resposta.get('symbol'):
+            self.aplicar_ordem({**resposta, 'id': resposta.get('id') or order_id})
+            return
+        with self._lock:
+            if order_id in self._reservas:
+                self.liberar_ordem(order_id)
+                self._divergente = True
@@ -0,0 +1,242 @@
+import json
+import threading
+import time
+
+PROFUNDIDADE_PADRAO = 5
+URL_STREAM_BINANCE = "wss://stream.binance.com:9443/stream"
+
+
+def _par_para_stream(par):
+    """BTC/USDT -> btcusdt"""
+    return par.replace("/", "").lower()
+
+
+class FonteReplay:
+    """
+    Fonte de mensagens gravadas (uma mensagem JSON por linha, no formato dos
+    streams da Binance). Aceita o caminho de um arquivo ou uma lista de dicts.
+    Se intervalo > 0, espera esse tempo entre mensagens para imitar o ritmo real.
+    """
+
+    def __init__(self, origem, intervalo=0):
+        self.origem = origem
+        self.intervalo = intervalo
+        self._fechada = False
+
+    def __iter__(self):
+        origem = self.origem
+        if isinstance(origem, str):
+            with open(origem, "r", encoding="utf-8") as f:
+                for linha in f:
+                    if self._fechada:
+                        return
+                    linha = linha.strip()
+                    if linha:
+                        yield json.loads(linha)
+                        self._esperar()
+        else:
+            for msg in origem:
+                if self._fechada:
+                    return
+                yield msg
+                self._esperar()
+
+    def _esperar(self):
+        if self.intervalo:
+            time.sleep(self.intervalo)
+
+    def fechar(self):
+        self._fechada = True
+
+
+class FonteWebSocketBinance:
+    """
+    Fonte que lê o stream combinado da Binance (bookTicker + depth5).
+    A url pode apontar para um servidor local que fale o mesmo protocolo.
+    Requer o pacote websocket-client.
+    """
+
+    def __init__(self, pares, url=URL_STREAM_BINANCE, timeout=10):
+        try:
+            import websocket
+        except ImportError:
+            raise RuntimeError("FonteWebSocketBinance requer o pacote websocket-client (pip install websocket-client)")
+        self._websocket = websocket
+        self.pares = list(pares)
+        self.url = url
+        self.timeout = timeout
+        self._ws = None
+        self._fechada = False
+
+    def _url_streams(self):
+        streams = []
+        for par in self.pares:
+            nome = _par_para_stream(par)
+            streams.append(f"{nome}@bookTicker")
+            streams.append(f"{nome}@depth5@100ms")
+        return f"{self.url}?streams={'/'.join(streams)}"
+
+    def __iter__(self):
+        self._ws = self._websocket.create_connection(self._url_streams(), timeout=self.timeout)
+        try:
+            while not self._fechada:
+                bruto = self._ws.recv()
+                if bruto:
+                    yield json.loads(bruto)
+        finally:
+            self._ws.close()
+
+    def fechar(self):
+        self._fechada = True
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+
+class BookFeed:
+    """
+    Mantém em memória o topo do book (e até 5 níveis de profundidade) de cada par
+    inscrito, atualizado por uma fonte de streaming.
+    Leituras são buscas O(1) em dicionário, sem ida à rede.
+    Mensagens aceitas (formato Binance, direto ou embrulhado em {"stream", "data"}):
+      - bookTicker:   {"s", "b", "B", "a", "A"}
+      - depth parcial: {"lastUpdateId", "bids", "asks"} (par vem do nome do stream)
+    Diferenças (depthUpdate) não são aceitas: sem snapshot REST e checagem de U/u o
+    book local divergiria; os snapshots parciais depth5 já trazem os níveis completos.
+    """
+
+    def __init__(self, fonte=None, profundidade=PROFUNDIDADE_PADRAO, intervalo_reconexao=2):
+        self.fonte = fonte
+        self.profundidade = profundidade
+        self.intervalo_reconexao = intervalo_reconexao
+        self._topos = {}    # par -> {"bid", "ask", "bid_qty", "ask_qty", "spread", "timestamp"}
+        self._livros = {}   # par -> {"bids": [[preco, qtd]], "asks": [[preco, qtd]], "timestamp"}
+        self._ids = {}      # BTCUSDT / btcusdt -> BTC/USDT
+        self._lock = threading.Lock()
+        self._thread = None
+        self._rodando = False
+        self.mensagens_processadas = 0
+
+    # ---------- inscrição ----------
+
+    def inscrever(self, pares):
+        with self._lock:
+            for par in pares:
+                nome = _par_para_stream(par)
+                self._ids[nome] = par
+                self._ids[nome.upper()] = par
+
+    @property
+    def pares(self):
+        return sorted(set(self._ids.values()))
+
+    # ---------- ciclo de vida ----------
+
+    def iniciar(self):
+        if self.fonte is None:
+            raise ValueError("BookFeed sem fonte configurada")
+        if self._thread and self._thread.is_alive():
+            return
+        self._rodando = True
+        self._thread = threading.Thread(target=self._consumir, name="book-feed", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=5):
+        self._rodando = False
+        if self.fonte is not None:
+            self.fonte.fechar()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _consumir(self):
+        while self._rodando:
+            try:
+                for msg in self.fonte:
+                    if not self._rodando:
+                        break
+                    self.aplicar_mensagem(msg)
+                # Fonte finita (replay) terminou
+                if isinstance(self.fonte, FonteReplay):
+                    break
+            except Exception as e:
+                print(f"[BOOK FEED] ❌ Erro no stream: {e}. Reconectando em {self.intervalo_reconexao}s...")
+                time.sleep(self.intervalo_reconexao)
+        self._rodando = False
+
+    # ---------- aplicação de mensagens ----------
+
+    def aplicar_mensagem(self, msg, timestamp=None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        stream = None
+        if "data" in msg and "stream" in msg:
+            stream = msg["stream"]
+            msg = msg["data"]
+
+        if "lastUpdateId" in msg and "bids" in msg:
+            par = self._ids.get(stream.split("@")[0]) if stream else None
+            if not par:
+                return
+            self._aplicar_livro(par, msg["bids"], msg["asks"], timestamp)
+        elif "b" in msg and "a" in msg and "s" in msg and msg.get("e") is None:
+            if not self._aplicar_book_ticker(msg, timestamp):
+                return
+        else:
+            return
+
+        # Só conta o que foi aplicado (pares não inscritos e mensagens desconhecidas ficam de fora)
+        self.mensagens_processadas += 1
+
+    def _aplicar_book_ticker(self, msg, timestamp):
+        par = self._ids.get(msg["s"])
+        if not par:
+            return False
+        self._atualizar_topo(par, float(msg["b"]), float(msg["B"]), float(msg["a"]), float(msg["A"]), timestamp)
+        return True
+
+    def _aplicar_livro(self, par, bids, asks, timestamp):
+        bids = [[float(p), float(q)] for p, q in bids[:self.profundidade]]
+        asks = [[float(p), float(q)] for p, q in asks[:self.profundidade]]
+        with self._lock:
+            self._livros[par] = {"bids": bids, "asks": asks, "timestamp": timestamp}
+        if bids and asks:
+            self._atualizar_topo(par, bids[0][0], bids[0][1], asks[0][0], asks[0][1], timestamp)
+
+    def _atualizar_topo(self, par, bid, bid_qty, ask, ask_qty, timestamp):
+        if bid <= 0:
+            return
+        # Troca atômica do dict inteiro: leitores nunca veem um topo pela metade
+        self._topos[par] = {
+            "bid": bid,
+            "ask": ask,
+            "bid_qty": bid_qty,
+            "ask_qty": ask_qty,
+            "spread": (ask - bid) / bid,
+            "timestamp": timestamp
+        }
+
+    # ---------- leitura ----------
+
+    def top_of_book(self, par):
+        """Retorna {"bid", "ask", "bid_qty", "ask_qty", "spread", "timestamp"} ou None"""
+        return self._topos.get(par)
+
+    def livro(self, par):
+        """Retorna {"bids", "asks", "timestamp"} com até `profundidade` níveis, ou None"""
+        return self._livros.get(par)
+
+    def idade(self, par, agora=None):
+        """Segundos desde a última atualização do par (None se nunca recebeu dados)"""
+        topo = self._topos.get(par)
+        if topo is None:
+            return None
+        return (agora if agora is not None else time.time()) - topo["timestamp"]
+
+    def esta_atualizado(self, par, max_idade, agora=None):
+        idade = self.idade(par, agora)
+        return idade is not None and idade <= max_idade
+
+    def idades(self, agora=None):
+        agora = agora if agora is not None else time.time()
+        return {par: agora - topo["timestamp"] for par, topo in list(self._topos.items())}
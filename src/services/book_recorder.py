@@ -0,0 +1,386 @@
+import heapq
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+NIVEIS_PADRAO = 5
+CAPACIDADE_PADRAO = 100_000   # snapshots em memória antes de descartar os mais antigos
+INTERVALO_FLUSH = 1.0         # segundos entre gravações em lote
+LINHAS_POR_BLOCO = 1024       # granularidade do índice de tempo
+ARQUIVO_SYMBOLS = "symbols.json"
+ARQUIVO_META = "meta.json"
+ARQUIVO_INDICE = "indice.f8"
+
+# coluna -> (arquivo, dtype, largura em níveis: 1 = escalar por linha)
+COLUNAS = {
+    "timestamp": ("timestamp.f8", np.float64, False),
+    "symbol_id": ("symbol_id.u2", np.uint16, False),
+    "bid_px": ("bid_px.f8", np.float64, True),
+    "bid_qty": ("bid_qty.f8", np.float64, True),
+    "ask_px": ("ask_px.f8", np.float64, True),
+    "ask_qty": ("ask_qty.f8", np.float64, True),
+}
+
+
+def _dia_utc(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _nome_pasta(symbol):
+    """BTC/USDT -> BTCUSDT"""
+    return symbol.replace("/", "").replace(":", "")
+
+
+def _largura(coluna, niveis):
+    return niveis if COLUNAS[coluna][2] else 1
+
+
+def _tamanho_linha(coluna, niveis):
+    return np.dtype(COLUNAS[coluna][1]).itemsize * _largura(coluna, niveis)
+
+
+def _ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gravar_json(caminho, dados):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2)
+    os.replace(temporario, caminho)
+
+
+class _ArquivosPar:
+    """Handles de append das colunas de um (dia, par), abertos uma vez e reaproveitados"""
+
+    def __init__(self, pasta, symbol, dia, niveis):
+        self.pasta = pasta
+        self.dia = dia
+        self.niveis = niveis
+        os.makedirs(pasta, exist_ok=True)
+
+        caminho_meta = os.path.join(pasta, ARQUIVO_META)
+        meta = _ler_json(caminho_meta, None)
+        if meta is None:
+            _gravar_json(caminho_meta, {
+                "symbol": symbol,
+                "dia": dia,
+                "niveis": niveis,
+                "linhas_por_bloco": LINHAS_POR_BLOCO,
+                "colunas": {nome: np.dtype(dtype).str for nome, (_, dtype, _) in COLUNAS.items()},
+            })
+        elif meta["niveis"] != niveis:
+            raise ValueError(f"{pasta} foi gravado com {meta['niveis']} níveis, não {niveis}")
+
+        self.linhas = self._reparar()
+        self.handles = {nome: open(os.path.join(pasta, arquivo), "ab") for nome, (arquivo, _, _) in COLUNAS.items()}
+        self.indice = open(os.path.join(pasta, ARQUIVO_INDICE), "ab")
+
+    def _reparar(self):
+        """Corta linhas pela metade deixadas por uma gravação interrompida: todas as colunas ficam com o mesmo tamanho"""
+        linhas = None
+        for nome, (arquivo, _, _) in COLUNAS.items():
+            caminho = os.path.join(self.pasta, arquivo)
+            tamanho = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+            n = tamanho // _tamanho_linha(nome, self.niveis)
+            linhas = n if linhas is None else min(linhas, n)
+        for nome, (arquivo, _, _) in COLUNAS.items():
+            caminho = os.path.join(self.pasta, arquivo)
+            if os.path.exists(caminho) and os.path.getsize(caminho) != linhas * _tamanho_linha(nome, self.niveis):
+                os.truncate(caminho, linhas * _tamanho_linha(nome, self.niveis))
+        self._reparar_indice(linhas)
+        return linhas
+
+    def _reparar_indice(self, linhas):
+        """
+        Índice com uma entrada por bloco: sobra é cortada e, se faltarem entradas
+        (bytes perdidos depois das colunas), elas são refeitas a partir de timestamp.f8
+        """
+        caminho_indice = os.path.join(self.pasta, ARQUIVO_INDICE)
+        blocos = -(-linhas // LINHAS_POR_BLOCO)
+        tamanho = os.path.getsize(caminho_indice) if os.path.exists(caminho_indice) else 0
+        completos = min(tamanho // 8, blocos)
+        if tamanho != completos * 8:
+            os.truncate(caminho_indice, completos * 8)
+        if completos < blocos:
+            timestamps = np.memmap(os.path.join(self.pasta, COLUNAS["timestamp"][0]), dtype=np.float64,
+                                   mode="r", shape=(linhas,))
+            faltantes = np.array(timestamps[completos * LINHAS_POR_BLOCO::LINHAS_POR_BLOCO], dtype=np.float64)
+            del timestamps
+            with open(caminho_indice, "ab") as f:
+                f.write(faltantes.tobytes())
+
+    def anexar(self, colunas):
+        quantidade = len(colunas["timestamp"])
+        for nome, handle in self.handles.items():
+            handle.write(colunas[nome].tobytes())
+        # Índice esparso: timestamp da primeira linha de cada bloco
+        primeira = -(-self.linhas // LINHAS_POR_BLOCO) * LINHAS_POR_BLOCO
+        if primeira < self.linhas + quantidade:
+            inicios = colunas["timestamp"][primeira - self.linhas::LINHAS_POR_BLOCO]
+            self.indice.write(np.ascontiguousarray(inicios, dtype=np.float64).tobytes())
+        self.linhas += quantidade
+
+    def flush(self):
+        for handle in self.handles.values():
+            handle.flush()
+        self.indice.flush()
+
+    def fechar(self):
+        for handle in self.handles.values():
+            handle.close()
+        self.indice.close()
+
+
+class GravadorBooks:
+    """
+    Grava cada snapshot de book (top-N) em arquivos binários colunares de largura
+    fixa, um conjunto por dia (UTC) e par:
+
+        base_dir/symbols.json                 symbol -> symbol_id (uint16)
+        base_dir/2024-05-01/BTCUSDT/meta.json
+        base_dir/2024-05-01/BTCUSDT/timestamp.f8   float64 (n)
+        base_dir/2024-05-01/BTCUSDT/symbol_id.u2   uint16 (n)
+        base_dir/2024-05-01/BTCUSDT/bid_px.f8      float64 (n x niveis), idem bid_qty/ask_px/ask_qty
+        base_dir/2024-05-01/BTCUSDT/indice.f8      timestamp da 1ª linha de cada bloco de 1024
+
+    Níveis ausentes ficam como NaN. registrar() só enfileira a referência ao book
+    (O(1), sem I/O nem conversão) num buffer limitado; se o buffer encher, os
+    snapshots mais antigos são descartados e contados em `descartados`.
+    A conversão para colunas e o append ficam com a thread de gravação, em lotes.
+    Os timestamps de cada par devem ser crescentes (ordem de leitura do scanner).
+    """
+
+    def __init__(self, base_dir, niveis=NIVEIS_PADRAO, capacidade=CAPACIDADE_PADRAO, intervalo=INTERVALO_FLUSH):
+        self.base_dir = base_dir
+        self.niveis = niveis
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._lock_gravacao = threading.Lock()
+        self._arquivos = {}  # (dia, symbol) -> _ArquivosPar
+        self._evento = threading.Event()
+        self._thread = None
+        self._rodando = False
+        self.gravados = 0
+        self.descartados = 0
+        self.lotes = 0
+
+        os.makedirs(base_dir, exist_ok=True)
+        self._caminho_symbols = os.path.join(base_dir, ARQUIVO_SYMBOLS)
+        self._symbol_ids = _ler_json(self._caminho_symbols, {})
+
+    # ---------- caminho do scanner ----------
+
+    def registrar(self, symbol, timestamp, bids, asks):
+        """Enfileira um snapshot; nunca bloqueia em disco"""
+        with self._lock:
+            if len(self._buffer) >= self.capacidade:
+                self._buffer.popleft()
+                self.descartados += 1
+            self._buffer.append((timestamp, symbol, bids, asks))
+
+    def pendentes(self):
+        return len(self._buffer)
+
+    # ---------- ciclo de vida ----------
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._rodando = True
+        self._thread = threading.Thread(target=self._loop, name="book-recorder", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=10):
+        self._rodando = False
+        self._evento.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+        with self._lock_gravacao:
+            for arquivos in self._arquivos.values():
+                arquivos.fechar()
+            self._arquivos.clear()
+
+    def _loop(self):
+        while self._rodando:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[BOOK RECORDER] ❌ Erro ao gravar books: {e}")
+
+    # ---------- gravação ----------
+
+    def flush(self):
+        """Grava tudo o que está no buffer. Retorna o número de snapshots gravados"""
+        with self._lock:
+            lote = list(self._buffer)
+            self._buffer.clear()
+        if not lote:
+            return 0
+
+        with self._lock_gravacao:
+            grupos = {}
+            for item in lote:
+                grupos.setdefault((_dia_utc(item[0]), item[1]), []).append(item)
+
+            novos_symbols = False
+            for (dia, symbol), itens in grupos.items():
+                if symbol not in self._symbol_ids:
+                    self._symbol_ids[symbol] = len(self._symbol_ids)
+                    novos_symbols = True
+                arquivos = self._arquivos_para(dia, symbol)
+                itens.sort(key=lambda item: item[0])
+                arquivos.anexar(self._colunas(itens, self._symbol_ids[symbol]))
+
+            if novos_symbols:
+                _gravar_json(self._caminho_symbols, self._symbol_ids)
+            for arquivos in self._arquivos.values():
+                arquivos.flush()
+            self._fechar_dias_anteriores(max(dia for dia, _ in grupos))
+
+            self.gravados += len(lote)
+            self.lotes += 1
+        return len(lote)
+
+    def _arquivos_para(self, dia, symbol):
+        chave = (dia, symbol)
+        arquivos = self._arquivos.get(chave)
+        if arquivos is None:
+            pasta = os.path.join(self.base_dir, dia, _nome_pasta(symbol))
+            arquivos = self._arquivos[chave] = _ArquivosPar(pasta, symbol, dia, self.niveis)
+        return arquivos
+
+    def _fechar_dias_anteriores(self, dia_atual):
+        """Virada do dia: os handles do dia anterior não recebem mais linhas"""
+        for chave in [c for c in self._arquivos if c[0] < dia_atual]:
+            self._arquivos.pop(chave).fechar()
+
+    def _colunas(self, itens, symbol_id):
+        n, niveis = len(itens), self.niveis
+        colunas = {
+            "timestamp": np.fromiter((item[0] for item in itens), dtype=np.float64, count=n),
+            "symbol_id": np.full(n, symbol_id, dtype=np.uint16),
+        }
+        for lado, indice in (("bid", 2), ("ask", 3)):
+            px = np.full((n, niveis), np.nan)
+            qty = np.full((n, niveis), np.nan)
+            for linha, item in enumerate(itens):
+                for nivel, (preco, quantidade, *_) in enumerate(item[indice][:niveis]):
+                    px[linha, nivel] = preco
+                    qty[linha, nivel] = quantidade
+            colunas[f"{lado}_px"] = px
+            colunas[f"{lado}_qty"] = qty
+        return colunas
+
+
+class LeitorBooks:
+    """
+    Lê os arquivos do GravadorBooks como np.memmap (sem cópia). Linhas incompletas
+    de uma gravação em andamento são ignoradas: vale o menor número de linhas entre
+    as colunas.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+
+    def symbols(self):
+        """symbol -> symbol_id"""
+        return _ler_json(os.path.join(self.base_dir, ARQUIVO_SYMBOLS), {})
+
+    def dias(self):
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d)))
+
+    def pares(self, dia):
+        pasta_dia = os.path.join(self.base_dir, dia)
+        pares = []
+        for nome in sorted(os.listdir(pasta_dia)):
+            meta = _ler_json(os.path.join(pasta_dia, nome, ARQUIVO_META), None)
+            if meta:
+                pares.append(meta["symbol"])
+        return pares
+
+    def _pasta(self, dia, symbol):
+        return os.path.join(self.base_dir, dia, _nome_pasta(symbol))
+
+    def carregar(self, dia, symbol):
+        """Retorna {coluna: array} com timestamp/symbol_id (n) e bid_px/bid_qty/ask_px/ask_qty (n x niveis)"""
+        pasta = self._pasta(dia, symbol)
+        meta = _ler_json(os.path.join(pasta, ARQUIVO_META), None)
+        if meta is None:
+            raise FileNotFoundError(f"Sem books gravados para {symbol} em {dia}")
+        niveis = meta["niveis"]
+
+        linhas = None
+        for nome, (arquivo, _, _) in COLUNAS.items():
+            caminho = os.path.join(pasta, arquivo)
+            n = os.path.getsize(caminho) // _tamanho_linha(nome, niveis) if os.path.exists(caminho) else 0
+            linhas = n if linhas is None else min(linhas, n)
+
+        colunas = {}
+        for nome, (arquivo, dtype, por_nivel) in COLUNAS.items():
+            forma = (linhas, niveis) if por_nivel else (linhas,)
+            if linhas == 0:
+                colunas[nome] = np.empty(forma, dtype=dtype)
+            else:
+                colunas[nome] = np.memmap(os.path.join(pasta, arquivo), dtype=dtype, mode="r", shape=forma)
+        return colunas
+
+    def _indice(self, dia, symbol, linhas):
+        caminho = os.path.join(self._pasta(dia, symbol), ARQUIVO_INDICE)
+        if not os.path.exists(caminho) or os.path.getsize(caminho) < 8:
+            return np.empty(0)
+        indice = np.fromfile(caminho, dtype=np.float64)
+        return indice[:-(-linhas // LINHAS_POR_BLOCO)]
+
+    def intervalo(self, dia, symbol, inicio=None, fim=None):
+        """
+        Fatia [inicio, fim) das colunas de um par, sem cópia. O índice de blocos
+        limita a busca binária aos blocos que cobrem o intervalo.
+        """
+        colunas = self.carregar(dia, symbol)
+        timestamps = colunas["timestamp"]
+        linhas = len(timestamps)
+        indice = self._indice(dia, symbol, linhas)
+
+        def posicao(valor):
+            bloco = max(int(np.searchsorted(indice, valor, side="left")) - 1, 0)
+            de = bloco * LINHAS_POR_BLOCO
+            ate = min(de + 2 * LINHAS_POR_BLOCO, linhas) if len(indice) else linhas
+            return de + int(np.searchsorted(timestamps[de:ate], valor, side="left"))
+
+        de = posicao(inicio) if inicio is not None else 0
+        ate = posicao(fim) if fim is not None else linhas
+        return {nome: coluna[de:ate] for nome, coluna in colunas.items()}
+
+    def _snapshots_par(self, dia, symbol, inicio, fim):
+        colunas = self.intervalo(dia, symbol, inicio, fim)
+        linhas = zip(colunas["timestamp"].tolist(), colunas["bid_px"].tolist(), colunas["bid_qty"].tolist(),
+                     colunas["ask_px"].tolist(), colunas["ask_qty"].tolist())
+        for timestamp, bid_px, bid_qty, ask_px, ask_qty in linhas:
+            # NaN != NaN: níveis ausentes ficam de fora
+            bids = [[p, q] for p, q in zip(bid_px, bid_qty) if p == p]
+            asks = [[p, q] for p, q in zip(ask_px, ask_qty) if p == p]
+            yield {"timestamp": timestamp, "symbol": symbol, "bids": bids, "asks": asks}
+
+    def snapshots(self, dias=None, symbols=None, inicio=None, fim=None):
+        """Snapshots no formato do backtest ({"timestamp", "symbol", "bids", "asks"}), em ordem de tempo"""
+        for dia in dias or self.dias():
+            fontes = [
+                self._snapshots_par(dia, symbol, inicio, fim)
+                for symbol in self.pares(dia) if symbols is None or symbol in symbols
+            ]
+            yield from heapq.merge(*fontes, key=lambda s: s["timestamp"])
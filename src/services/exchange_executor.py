@@ -1,14 +1,35 @@
 import ccxt
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from services.market_metadata import MarketMetadata, InfoMercado, info_de_market, ajustar_ao_passo
+from services.balance_ledger import BalanceLedger
+from services.metricas_endpoint import registro_compartilhado
+from services.rate_limiter import (
+    agendador_compartilhado, PESOS_ENDPOINT, PRIORIDADES_ENDPOINT, PRIORIDADE_CONSULTA, segundos_retry_after
+)
+
+IDADE_MAXIMA_SNAPSHOT = 1.0  # segundos
+MAX_WORKERS_LOTE = 8
+
+
+def _par_da_chamada(args):
+    """Símbolo da chamada ccxt (primeiro argumento no formato BASE/QUOTE), se houver"""
+    for arg in args:
+        if isinstance(arg, str) and '/' in arg:
+            return arg
+    return None
+
 
 class ExchangeExecutor:
-    def __init__(self, api_key, secret, exchange_name='binance'):
+    def __init__(self, api_key, secret, exchange_name='binance', markets_cache=None, agendador=None, metricas=None):
         exchange_class = getattr(ccxt, exchange_name)
         self.exchange = exchange_class({
             'apiKey': api_key,
             'secret': secret,
-            'enableRateLimit': True,
-            'rateLimit': 100,  # Reduzido para melhor performance
+            'enableRateLimit': False,  # Controle de taxa feito pelo agendador compartilhado
             'timeout': 10000,  # Timeout de 10 segundos
             'options': {
                 'defaultType': 'spot',  # Especifica tipo de mercado
@@ -16,61 +37,267 @@ class ExchangeExecutor:
                 'warnOnFetchOpenOrdersWithoutSymbol': False,  # Suprime aviso de rate limiting
             }
         })
+        # Agendador de requisições compartilhado por todos os chamadores (peso + prioridade)
+        self.agendador = agendador or agendador_compartilhado()
+        # Latência, erros e peso por endpoint/símbolo de todas as chamadas à exchange
+        self.metricas = metricas or registro_compartilhado()
+        # Índice de mercados compartilhado por executor, scanner e ajuste de quantidade
+        self.mercados = MarketMetadata(
+            self.exchange,
+            caminho_cache=markets_cache or os.getenv(
+                "MARKETS_CACHE", f"{os.getenv('DATA_DIR', './data')}/markets_cache.json"),
+            carregador=lambda: self._chamar('load_markets', self.exchange.load_markets, True)
+        )
+        # Saldos livres mantidos localmente (fetch_balance só na semente e nas reconciliações)
+        self.saldos = BalanceLedger(lambda: self._chamar('fetch_balance', self.exchange.fetch_balance, {'recvWindow': 60000}))
+        self.contadores = {'tickers_buscados': 0, 'tickers_evitados': 0}
+        self._lock_contadores = threading.Lock()
+        # Pares em que o bot enviou ordens limit nesta sessão (cancelamento no encerramento)
+        self._simbolos_sessao = set()
+
+    def _chamar(self, endpoint, funcao, *args, prioridade=None, **kwargs):
+        """
+        Ponto único de saída para a exchange: toda chamada passa pelo agendador
+        com o peso e a prioridade do endpoint e tem a latência registrada
+        (sem contar a espera na fila do agendador).
+        """
+        peso = PESOS_ENDPOINT.get(endpoint, 1)
+        if prioridade is None:
+            prioridade = PRIORIDADES_ENDPOINT.get(endpoint, PRIORIDADE_CONSULTA)
+        self.agendador.adquirir(peso, prioridade)
+        erro = False
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        except (ccxt.RateLimitExceeded, ccxt.DDoSProtection) as e:
+            # 429/418: pausa todas as requisições do processo pelo tempo do Retry-After
+            erro = True
+            self.agendador.penalizar(self._retry_after(e))
+            raise
+        except Exception:
+            erro = True
+            raise
+        finally:
+            self.metricas.registrar(endpoint, _par_da_chamada(args), time.perf_counter() - inicio, peso, erro)
+
+    def _retry_after(self, excecao):
+        """
+        Segundos de pausa pedidos pela exchange. O ccxt não anexa a resposta à exceção,
+        mas guarda os cabeçalhos da última resposta em last_response_headers.
+        """
+        headers = getattr(excecao, 'headers', None) or getattr(self.exchange, 'last_response_headers', None)
+        return segundos_retry_after(headers if hasattr(headers, 'items') else None)
+
+    # ---------- leituras de mercado (scanner / top gainers) ----------
+
+    def fetch_order_book(self, symbol, limit=5):
+        return self._chamar('fetch_order_book', self.exchange.fetch_order_book, symbol, limit=limit)
+
+    def fetch_ticker(self, symbol):
+        return self._chamar('fetch_ticker', self.exchange.fetch_ticker, symbol)
+
+    def fetch_tickers(self, symbols=None):
+        return self._chamar('fetch_tickers', self.exchange.fetch_tickers, symbols)
+
+    def load_markets(self):
+        self.mercados.carregar()
+        return self.exchange.markets
+
+    def _contar(self, chave):
+        with self._lock_contadores:
+            self.contadores[chave] += 1
+
+    def _preco_atual(self, symbol, snapshot=None, idade_maxima=IDADE_MAXIMA_SNAPSHOT):
+        """
+        Usa o preço do snapshot do chamador (ex.: book do scanner) se ele tiver no máximo
+        `idade_maxima` segundos; caso contrário busca o ticker na exchange.
+        snapshot = {"price": float, "timestamp": epoch}
+        """
+        if snapshot and snapshot.get('price') and snapshot.get('timestamp') is not None:
+            if time.time() - snapshot['timestamp'] <= idade_maxima:
+                self._contar('tickers_evitados')
+                return snapshot['price']
+        self._contar('tickers_buscados')
+        return self.fetch_ticker(symbol)['last']
+
+    def _registrar_simbolo(self, symbol):
+        # Antes do envio: uma ordem aceita pela exchange com timeout na resposta também conta
+        with self._lock_contadores:
+            self._simbolos_sessao.add(symbol)
+
+    def simbolos_da_sessao(self):
+        """Pares que receberam ordens limit desde que o executor foi criado"""
+        with self._lock_contadores:
+            return sorted(self._simbolos_sessao)
 
     def place_limit_order(self, symbol, side, price, quantity):
         if side.lower() == "buy":
-            return self.exchange.create_limit_buy_order(symbol, quantity, price)
+            criar = self.exchange.create_limit_buy_order
         elif side.lower() == "sell":
-            return self.exchange.create_limit_sell_order(symbol, quantity, price)
+            criar = self.exchange.create_limit_sell_order
         else:
             raise ValueError("Side must be 'buy' or 'sell'")
+        self._registrar_simbolo(symbol)
+        order = self._chamar('create_order', criar, symbol, quantity, price)
+        self.saldos.registrar_ordem(order.get('id'), symbol, side, price, quantity)
+        return order
 
     def cancel_order(self, order_id, symbol):
-        return self.exchange.cancel_order(order_id, symbol)
+        result = self._chamar('cancel_order', self.exchange.cancel_order, order_id, symbol)
+        self.saldos.aplicar_cancelamento(order_id, result)
+        return result
 
     def fetch_order_status(self, order_id, symbol):
-        return self.exchange.fetch_order(order_id, symbol)
+        order = self._chamar('fetch_order', self.exchange.fetch_order, order_id, symbol)
+        if order.get('status') in ('closed', 'canceled', 'expired'):
+            self.saldos.aplicar_ordem(order)
+        return order
 
     def get_balance(self, asset=None):
-        balance = self.exchange.fetch_balance()
+        """Saldo livre do livro-razão local (sem chamada à exchange no caminho quente)"""
         if asset:
-            return balance['free'].get(asset, 0)
-        return balance['free']
+            return self.saldos.livre(asset)
+        return self.saldos.todos()
 
     def get_fee_info(self):
-        return self.exchange.fetch_trading_fee()
+        return self._chamar('fetch_trading_fee', self.exchange.fetch_trading_fee)
 
     def fetch_order_fills(self, order_id, symbol):
         """Retorna as informações detalhadas de preenchimento da ordem (rebate, fee, etc)"""
-        order = self.exchange.fetch_order(order_id, symbol)
+        order = self._chamar('fetch_order', self.exchange.fetch_order, order_id, symbol)
         return order.get("trades", []) or order.get("fills", [])
 
+    def fetch_open_orders(self, symbol=None):
+        """Ordens abertas de um símbolo ou, sem símbolo, da conta inteira (peso bem maior)"""
+        if symbol:
+            return self._chamar('fetch_open_orders', self.exchange.fetch_open_orders, symbol)
+        return self._chamar('fetch_open_orders_todos', self.exchange.fetch_open_orders)
+
     def listar_ordens_abertas(self):
         """Lista ordens abertas na conta"""
         try:
-            return self.exchange.fetch_open_orders()
+            return self._chamar('fetch_open_orders_todos', self.exchange.fetch_open_orders)
         except Exception as e:
             print(f"[ERRO] Falha ao listar ordens abertas: {e}")
             return []
 
+    # ---------- operações em lote ----------
+
+    def cancelar_todas(self, symbol):
+        """
+        Cancela todas as ordens abertas de um símbolo com uma única requisição
+        (DELETE openOrders na Binance). Retorna a lista de ordens canceladas.
+        """
+        if self.exchange.has.get('cancelAllOrders'):
+            canceladas = self._chamar('cancel_all_orders', self.exchange.cancel_all_orders, symbol) or []
+        else:
+            canceladas = []
+            for ordem in self._chamar('fetch_open_orders', self.exchange.fetch_open_orders, symbol):
+                canceladas.append(self._chamar('cancel_order', self.exchange.cancel_order, ordem['id'], symbol))
+        for ordem in canceladas:
+            if isinstance(ordem, dict):
+                self.saldos.aplicar_cancelamento(ordem.get('id'), ordem)
+        return canceladas
+
+    def cancelar_todas_em_paralelo(self, symbols, max_workers=MAX_WORKERS_LOTE):
+        """
+        Dispara cancelar_todas para vários símbolos ao mesmo tempo.
+        Retorna {"resultados": {symbol: {"ok", "canceladas", "erro", "tempo"}}, "tempo_total": s}
+        """
+        return self._em_paralelo(
+            list(dict.fromkeys(symbols)),
+            lambda symbol: len(self.cancelar_todas(symbol)),
+            "canceladas",
+            max_workers
+        )
+
+    def cancelar_ordens_em_lote(self, ordens, max_workers=MAX_WORKERS_LOTE):
+        """
+        Cancela uma lista de ordens [(order_id, symbol), ...] em paralelo.
+        Retorna {"resultados": {order_id: {"ok", "resultado", "erro", "tempo"}}, "tempo_total": s}
+        """
+        simbolos = dict(ordens)
+        return self._em_paralelo(
+            list(simbolos.keys()),
+            lambda order_id: self.cancel_order(order_id, simbolos[order_id]),
+            "resultado",
+            max_workers
+        )
+
+    def criar_ordens_em_lote(self, ordens, max_workers=MAX_WORKERS_LOTE):
+        """
+        Envia várias ordens limit [{"symbol", "side", "price", "quantity"}, ...].
+        Usa o endpoint de lote da exchange quando suportado (na Binance só para contratos);
+        senão envia em paralelo.
+        Retorna a lista de ordens (ou exceções) na mesma ordem da entrada.
+        """
+        self.mercados.carregar()
+        suporta_lote = self.exchange.has.get('createOrders') and all(
+            self.exchange.market(o['symbol']).get('contract') for o in ordens
+        )
+        if ordens and suporta_lote:
+            for o in ordens:
+                self._registrar_simbolo(o['symbol'])
+            try:
+                criadas = self._chamar('create_order', self.exchange.create_orders, [
+                    {
+                        'symbol': o['symbol'],
+                        'type': 'limit',
+                        'side': o['side'].lower(),
+                        'amount': o['quantity'],
+                        'price': o['price']
+                    }
+                    for o in ordens
+                ])
+                for o, criada in zip(ordens, criadas):
+                    self.saldos.registrar_ordem(criada.get('id'), o['symbol'], o['side'], o['price'], o['quantity'])
+                return criadas
+            except ccxt.NotSupported:
+                pass  # Tipo de ordem sem variante em lote: cai no envio paralelo
+
+        chaves = list(range(len(ordens)))
+        lote = self._em_paralelo(
+            chaves,
+            lambda i: self.place_limit_order(ordens[i]['symbol'], ordens[i]['side'], ordens[i]['price'], ordens[i]['quantity']),
+            "resultado",
+            max_workers
+        )
+        return [
+            lote["resultados"][i]["resultado"] if lote["resultados"][i]["ok"] else Exception(lote["resultados"][i]["erro"])
+            for i in chaves
+        ]
+
+    def _em_paralelo(self, chaves, funcao, campo, max_workers):
+        inicio = time.time()
+        resultados = {}
+
+        def _executar(chave):
+            t0 = time.time()
+            try:
+                return chave, {"ok": True, campo: funcao(chave), "erro": None, "tempo": time.time() - t0}
+            except Exception as e:
+                return chave, {"ok": False, campo: None, "erro": str(e), "tempo": time.time() - t0}
+
+        if chaves:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chaves)))) as pool:
+                resultados = dict(pool.map(_executar, chaves))
+
+        return {"resultados": resultados, "tempo_total": time.time() - inicio}
+
     def ajustar_quantidade_para_venda(self, amount, free_balance, market, current_price):
         """
         Ajusta o valor de venda respeitando o saldo disponível, stepSize, minQty, minNotional e precision.
+        `market` pode ser o InfoMercado do índice ou o dict de market do ccxt.
         """
-        from math import floor
-
-        limits = market.get('limits', {})
-        amount_limit = limits.get('amount', {})
-        cost_limit = limits.get('cost', {})
-        precision = market.get('precision', {}).get('amount', 8)
+        if not isinstance(market, InfoMercado):
+            market = info_de_market(market, getattr(self.exchange, 'precisionMode', 2))
 
-        step_size = amount_limit.get('step', 10 ** -precision)
-        min_qty = amount_limit.get('min', 0)
-        min_cost = cost_limit.get('min', 0)
+        step_size = market.step_size
+        precision = market.casas_quantidade
+        min_qty = market.min_qty
+        min_cost = market.min_notional
 
-        amount = min(amount, free_balance)
-        amount = floor(amount / step_size) * step_size
-        amount = float(f"{amount:.{precision}f}")
+        amount = ajustar_ao_passo(min(amount, free_balance), step_size, precision)
 
         if amount < min_qty:
             raise ValueError(f"Quantidade ajustada {amount} abaixo do mínimo permitido: {min_qty}")
@@ -81,9 +308,11 @@ class ExchangeExecutor:
 
         return amount
 
-    def execute_buy(self, crypto, investment, quote='USDT', strategy='scalping'):
+    def execute_buy(self, crypto, investment, quote='USDT', strategy='scalping',
+                    snapshot=None, idade_maxima=IDADE_MAXIMA_SNAPSHOT):
         """
         Executa uma ordem de compra genérica.
+        - Usa o preço do snapshot se recente (senão busca o ticker)
         - Verifica mínimos da exchange
         - Executa a ordem
         - Registra a posição
@@ -92,26 +321,27 @@ class ExchangeExecutor:
         try:
             # 1. Busca informações do mercado
             symbol = f"{crypto}/{quote}"
-            market = self.exchange.market(symbol)
-            ticker = self.exchange.fetch_ticker(symbol)
-            current_price = ticker['last']
+            market = self.mercados.info(symbol)
+            if market is None:
+                print(f"❌ [BUY] {crypto}: Mercado {symbol} não encontrado")
+                return None
+            current_price = self._preco_atual(symbol, snapshot, idade_maxima)
             print(f"[BUY] {crypto}: Preço atual: {current_price}")
 
             # 2. Verifica valor mínimo da exchange
-            min_cost = market['limits']['cost'].get('min', 0)
+            min_cost = market.min_notional
             if min_cost and investment < min_cost:
                 print(f"❌ [BUY] {crypto}: Investimento {quote} {investment:.2f} abaixo do mínimo da Binance {quote} {min_cost:.2f}")
                 return None
 
-            # 3. Calcula quantidade a comprar, respeitando precisão
-            amount = investment / current_price
-            precision = market['precision']['amount']
-            amount = float(('{:.' + str(precision) + 'f}').format(amount))
+            # 3. Calcula quantidade a comprar, para baixo até um múltiplo do step size
+            amount = ajustar_ao_passo(investment / current_price, market.step_size, market.casas_quantidade)
             print(f"[BUY] {crypto}: Quantidade calculada: {amount}")
 
             # 4. Executa ordem de compra
             try:
-                order = self.exchange.create_market_buy_order(symbol, amount, {'recvWindow': 60000})
+                order = self._chamar('create_order', self.exchange.create_market_buy_order, symbol, amount, {'recvWindow': 60000})
+                self.saldos.aplicar_ordem(order)
                 filled = order.get('filled', 0)
                 avg_price = order.get('average', current_price)
                 print(f"[BUY] {crypto}: Ordem executada. Filled: {filled}, Preço médio: {avg_price}")
@@ -132,6 +362,8 @@ class ExchangeExecutor:
                     
             except Exception as e:
                 # Trata erro de valor abaixo do mínimo (NOTIONAL)
+                if isinstance(e, ccxt.InsufficientFunds):
+                    self.saldos.marcar_divergencia()
                 if 'notional' in str(e).lower() or 'filter failure' in str(e).lower():
                     print(f"❌ [BUY] {crypto}: Valor abaixo do mínimo permitido para compra ({quote}). Erro: {e}")
                     return None
@@ -142,9 +374,11 @@ class ExchangeExecutor:
             print(f"[BUY] {crypto}: Erro geral na execução de compra: {e}")
             return None
 
-    def execute_sell(self, crypto, amount, quote='USDT', entry_price=None, strategy='scalping'):
+    def execute_sell(self, crypto, amount, quote='USDT', entry_price=None, strategy='scalping',
+                     snapshot=None, idade_maxima=IDADE_MAXIMA_SNAPSHOT):
         """
         Executa uma ordem de venda genérica.
+        - Usa o preço do snapshot se recente (senão busca o ticker)
         - Ajusta quantidade para limites da exchange
         - Executa a ordem
         - Calcula P&L se entry_price fornecido
@@ -152,14 +386,14 @@ class ExchangeExecutor:
         """
         try:
             symbol = f"{crypto}/{quote}"
-            market = self.exchange.market(symbol)
-            ticker = self.exchange.fetch_ticker(symbol)
-            current_price = ticker['last']
+            market = self.mercados.info(symbol)
+            if market is None:
+                print(f"❌ [SELL] {crypto}: Mercado {symbol} não encontrado")
+                return None
+            current_price = self._preco_atual(symbol, snapshot, idade_maxima)
             print(f"[SELL] {crypto}: Preço atual: {current_price}")
 
-            balance = self.exchange.fetch_balance({'recvWindow': 60000})
-            free_balance = balance.get('free', {})
-            free_available = float(free_balance.get(crypto, 0))
+            free_available = float(self.saldos.livre(crypto))
 
             try:
                 amount = self.ajustar_quantidade_para_venda(amount, free_available, market, current_price)
@@ -169,7 +403,14 @@ class ExchangeExecutor:
 
             print(f"[SELL] {crypto}: Quantidade final ajustada: {amount}")
 
-            order = self.exchange.create_market_sell_order(symbol, amount, {'recvWindow': 60000})
+            try:
+                order = self._chamar('create_order', self.exchange.create_market_sell_order, symbol, amount, {'recvWindow': 60000})
+            except ccxt.InsufficientFunds as e:
+                # Saldo local diverge da exchange: reconcilia na próxima leitura
+                self.saldos.marcar_divergencia()
+                print(f"❌ [SELL] {crypto}: Saldo insuficiente na exchange: {e}")
+                return None
+            self.saldos.aplicar_ordem(order)
             filled = order.get('filled', 0)
             avg_price = order.get('average', current_price)
             print(f"[SELL] {crypto}: Ordem executada. Filled: {filled}, Preço médio: {avg_price}")
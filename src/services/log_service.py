@@ -1,43 +1,219 @@
+from collections import deque
 from datetime import datetime
 import os
+import sys
+import threading
+import time
+
+# nível -> severidade (o threshold de cada destino deixa passar o próprio nível e os acima)
+NIVEIS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40, "CRITICAL": 50}
+
+CAPACIDADE_PADRAO = 10000
+INTERVALO_PADRAO = 0.2  # segundos entre lotes da thread de escrita
+MAX_BYTES_PADRAO = 10 * 1024 * 1024
+BACKUPS_PADRAO = 5
+
+
+def _severidade(nivel):
+    if nivel is None:
+        return None
+    try:
+        return NIVEIS[nivel.upper()]
+    except KeyError:
+        raise ValueError(f"Nível de log desconhecido: {nivel} (use {', '.join(NIVEIS)})")
+
 
 class LogService:
-    def __init__(self, repository, log_file="bot_scalping.log"):
+    def __init__(self, repository, log_file="bot_scalping.log", assincrono=False,
+                 nivel_console="INFO", nivel_arquivo="INFO", nivel_db="INFO",
+                 capacidade=CAPACIDADE_PADRAO, intervalo=INTERVALO_PADRAO,
+                 max_bytes=MAX_BYTES_PADRAO, backups=BACKUPS_PADRAO):
+        """
+        assincrono=True: info/warn/... só empilham (nível, hora, mensagem) num buffer
+        circular de `capacidade` registros; uma thread junta o que chegou a cada
+        `intervalo` e escreve em lote no console, no arquivo (handle mantido aberto)
+        e no banco. Com o buffer cheio o registro mais antigo é descartado e contado
+        em `descartados`. Chame fechar() no fim para drenar o que faltou.
+        assincrono=False: mesma saída, escrita na hora por quem chamou.
+
+        nivel_*: menor nível que vai para cada destino (None desliga o destino).
+        max_bytes: ao passar desse tamanho o arquivo gira para .1, .2, ... até `backups`.
+        """
         self.repo = repository
         self.log_file = log_file
-        
+        self.assincrono = assincrono
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.definir_niveis(nivel_console, nivel_arquivo, nivel_db)
+
+        self.descartados = {nivel: 0 for nivel in NIVEIS}
+        self.contadores = {"registrados": 0, "gravados": 0, "lotes": 0, "rotacoes": 0, "erros": 0}
+
         # Garante que o diretório existe
         log_dir = os.path.dirname(log_file)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
-    def _write_to_file(self, level, message):
-        """Escreve log no arquivo"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{level}] {timestamp} - {message}\n"
-        
-        try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-        except Exception as e:
-            print(f"Erro ao escrever no arquivo de log: {e}")
+        self._arquivo = None
+        self._fechado = False
+        self._buffer = deque()
+        self._lock_buffer = threading.Lock()
+        self._lock_escrita = threading.Lock()  # uma drenagem por vez (thread ou flush)
+        self._acordar = threading.Event()
+        self._thread = None
+        if assincrono:
+            self._thread = threading.Thread(target=self._loop, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def definir_niveis(self, nivel_console=None, nivel_arquivo=None, nivel_db=None):
+        self.nivel_console = _severidade(nivel_console)
+        self.nivel_arquivo = _severidade(nivel_arquivo)
+        self.nivel_db = _severidade(nivel_db)
+        niveis = [n for n in (self.nivel_console, self.nivel_arquivo, self.nivel_db) if n is not None]
+        # Abaixo do menor threshold o registro nem entra no buffer
+        self._nivel_minimo = min(niveis) if niveis else None
+
+    # ---------- caminho de quem loga ----------
+
+    def _registrar(self, level, message):
+        severidade = NIVEIS[level]
+        if self._nivel_minimo is None or severidade < self._nivel_minimo:
+            return
+        registro = (level, severidade, time.time(), message)
+        if not self.assincrono or self._fechado:
+            with self._lock_escrita:
+                self._gravar([registro])
+            return
+        with self._lock_buffer:
+            if len(self._buffer) >= self.capacidade:
+                descartado = self._buffer.popleft()
+                self.descartados[descartado[0]] += 1
+            self._buffer.append(registro)
+            self.contadores["registrados"] += 1
+            cheio = len(self._buffer) >= self.capacidade // 2
+        if cheio:
+            self._acordar.set()
+
+    def debug(self, message):
+        self._registrar("DEBUG", message)
 
     def info(self, message):
-        print(f"[INFO] {datetime.now()} - {message}")
-        self._write_to_file("INFO", message)
-        self.repo.save_log("INFO", message)
+        self._registrar("INFO", message)
 
     def warn(self, message):
-        print(f"[WARN] {datetime.now()} - {message}")
-        self._write_to_file("WARN", message)
-        self.repo.save_log("WARN", message)
+        self._registrar("WARN", message)
 
     def error(self, message):
-        print(f"[ERROR] {datetime.now()} - {message}")
-        self._write_to_file("ERROR", message)
-        self.repo.save_log("ERROR", message)
+        self._registrar("ERROR", message)
 
     def critical(self, message):
-        print(f"[CRITICAL] {datetime.now()} - {message}")
-        self._write_to_file("CRITICAL", message)
-        self.repo.save_log("CRITICAL", message)
+        self._registrar("CRITICAL", message)
+
+    # ---------- escrita em lote ----------
+
+    def _loop(self):
+        while not self._fechado:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            self.flush()
+
+    def flush(self):
+        """Escreve tudo que está no buffer (chamável de qualquer thread)"""
+        with self._lock_escrita:
+            with self._lock_buffer:
+                if not self._buffer:
+                    return
+                lote = list(self._buffer)
+                self._buffer.clear()
+            self._gravar(lote)
+
+    def _gravar(self, lote):
+        if self._fechado:
+            # Depois de fechar: arquivo fechado e banco possivelmente também, só console
+            self._console(lote)
+            return
+        self._console(lote)
+        self._para_arquivo(lote)
+        self._para_banco(lote)
+        self.contadores["gravados"] += len(lote)
+        self.contadores["lotes"] += 1
+
+    def _console(self, lote):
+        if self.nivel_console is None:
+            return
+        linhas = [f"[{level}] {datetime.fromtimestamp(ts)} - {message}\n"
+                  for level, severidade, ts, message in lote if severidade >= self.nivel_console]
+        if linhas:
+            sys.stdout.write("".join(linhas))
+            sys.stdout.flush()
+
+    def _para_arquivo(self, lote):
+        if self.nivel_arquivo is None:
+            return
+        linhas = [f"[{level}] {datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')} - {message}\n"
+                  for level, severidade, ts, message in lote if severidade >= self.nivel_arquivo]
+        if not linhas:
+            return
+        try:
+            if self._arquivo is None:
+                self._arquivo = open(self.log_file, "a", encoding="utf-8")
+            self._arquivo.write("".join(linhas))
+            self._arquivo.flush()
+            if self.max_bytes and self._arquivo.tell() >= self.max_bytes:
+                self._rotacionar()
+        except Exception as e:
+            self.contadores["erros"] += 1
+            print(f"Erro ao escrever no arquivo de log: {e}")
+
+    def _rotacionar(self):
+        """bot_scalping.log -> .1 -> .2 ... ; o mais velho além de `backups` é apagado"""
+        self._arquivo.close()
+        self._arquivo = None
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                origem = f"{self.log_file}.{i}"
+                if os.path.exists(origem):
+                    os.replace(origem, f"{self.log_file}.{i + 1}")
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+        self.contadores["rotacoes"] += 1
+
+    def _para_banco(self, lote):
+        if self.nivel_db is None:
+            return
+        linhas = [(level, message, datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'))
+                  for level, severidade, ts, message in lote if severidade >= self.nivel_db]
+        if not linhas:
+            return
+        try:
+            self.repo.save_logs(linhas)
+        except Exception as e:
+            self.contadores["erros"] += 1
+            print(f"Erro ao gravar logs no banco: {e}")
+
+    # ---------- ciclo de vida ----------
+
+    def pendentes(self):
+        return len(self._buffer)
+
+    def total_descartados(self):
+        return sum(self.descartados.values())
+
+    def fechar(self, timeout=5.0):
+        """Drena o buffer e fecha o arquivo. Chame antes de fechar o banco"""
+        if self._fechado:
+            return
+        self.flush()
+        with self._lock_escrita:
+            self._fechado = True
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # Um registro que entrou entre o flush e o fechamento ainda aparece no console
+        self.flush()
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_FLOOR
+from typing import NamedTuple, Optional
+
+VERSAO_CACHE = 1
+TTL_PADRAO = 6 * 60 * 60  # 6 horas
+CAMINHO_CACHE_PADRAO = "./data/markets_cache.json"
+
+# Valores de precisionMode do ccxt (ccxt.DECIMAL_PLACES / ccxt.TICK_SIZE)
+DECIMAL_PLACES = 2
+TICK_SIZE = 4
+
+
+class InfoMercado(NamedTuple):
+    symbol: str
+    tick_size: float
+    step_size: float
+    min_qty: float
+    min_notional: float
+    casas_preco: int
+    casas_quantidade: int
+    ativo: bool
+
+
+def _passo_e_casas(valor, precision_mode, padrao=8):
+    """Converte a precisão do ccxt em (passo, casas decimais), para qualquer precisionMode"""
+    if valor is None:
+        return 10 ** -padrao, padrao
+    if precision_mode == TICK_SIZE:
+        # Casas da representação decimal do passo: 0.005 -> 3 (log10 daria 2 e formataria fora do passo)
+        passo = float(valor)
+        casas = max(0, -Decimal(str(valor)).normalize().as_tuple().exponent)
+        return passo, casas
+    casas = int(valor)
+    return 10 ** -casas, casas
+
+
+def ajustar_ao_passo(valor, passo, casas):
+    """Arredonda para baixo até um múltiplo exato de `passo` (LOT_SIZE / PRICE_FILTER)"""
+    if not passo:
+        return valor
+    passo_decimal = Decimal(str(passo))
+    multiplos = (Decimal(str(valor)) / passo_decimal).to_integral_value(rounding=ROUND_FLOOR)
+    return float(round(multiplos * passo_decimal, casas))
+
+
+def info_de_market(market, precision_mode=DECIMAL_PLACES):
+    """Monta o InfoMercado compacto a partir do dict de market do ccxt"""
+    precision = market.get('precision', {}) or {}
+    limits = market.get('limits', {}) or {}
+    amount_limit = limits.get('amount', {}) or {}
+    cost_limit = limits.get('cost', {}) or {}
+
+    tick_size, casas_preco = _passo_e_casas(precision.get('price'), precision_mode)
+    step_size, casas_quantidade = _passo_e_casas(precision.get('amount'), precision_mode)
+    if amount_limit.get('step'):
+        step_size, casas_step = _passo_e_casas(amount_limit['step'], TICK_SIZE)
+        casas_quantidade = max(casas_quantidade, casas_step)
+
+    return InfoMercado(
+        symbol=market.get('symbol'),
+        tick_size=tick_size,
+        step_size=step_size,
+        min_qty=float(amount_limit.get('min') or 0),
+        min_notional=float(cost_limit.get('min') or 0),
+        casas_preco=casas_preco,
+        casas_quantidade=casas_quantidade,
+        ativo=market.get('active', True) is not False
+    )
+
+
+class MarketMetadata:
+    """
+    Carrega os mercados da exchange uma única vez e mantém um índice compacto por símbolo
+    (tick size, step size, mínimos e precisão).
+    Os mercados são salvos em disco (arquivo versionado com TTL) para partidas rápidas:
+    enquanto o arquivo for válido, nenhuma chamada a load_markets é feita.
+    """
+
+    def __init__(self, exchange, caminho_cache=CAMINHO_CACHE_PADRAO, ttl=TTL_PADRAO, carregador=None):
+        self.exchange = exchange
+        self.carregador = carregador or (lambda: exchange.load_markets(True))
+        self.caminho_cache = caminho_cache
+        self.ttl = ttl
+        self._indice = {}
+        self._carregado = False
+        self._lock = threading.Lock()
+        self.carregamentos_remotos = 0  # load_markets que foram de fato à exchange
+
+    # ---------- carga ----------
+
+    def _ler_cache(self):
+        if not self.caminho_cache or not os.path.exists(self.caminho_cache):
+            return None
+        try:
+            with open(self.caminho_cache, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except Exception as e:
+            print(f"[MARKETS] ⚠️ Cache de mercados ilegível: {e}")
+            return None
+
+        if dados.get("versao") != VERSAO_CACHE or dados.get("exchange") != getattr(self.exchange, "id", None):
+            return None
+        if time.time() - dados.get("salvo_em", 0) > self.ttl:
+            return None
+        return dados.get("markets")
+
+    def _salvar_cache(self, markets):
+        if not self.caminho_cache:
+            return
+        try:
+            pasta = os.path.dirname(self.caminho_cache)
+            if pasta and not os.path.exists(pasta):
+                os.makedirs(pasta)
+            temporario = f"{self.caminho_cache}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump({
+                    "versao": VERSAO_CACHE,
+                    "exchange": getattr(self.exchange, "id", None),
+                    "salvo_em": time.time(),
+                    "markets": markets
+                }, f, default=str)
+            os.replace(temporario, self.caminho_cache)
+        except Exception as e:
+            print(f"[MARKETS] ⚠️ Falha ao salvar cache de mercados: {e}")
+
+    def carregar(self, forcar=False):
+        """Carrega os mercados (do disco se válido, senão da exchange) e monta o índice"""
+        with self._lock:
+            if self._carregado and not forcar:
+                return
+
+            markets = None if forcar else self._ler_cache()
+            if markets is not None:
+                self.exchange.set_markets(markets)
+                print(f"[MARKETS] {len(markets)} mercados carregados do cache em disco")
+            else:
+                markets = self.carregador()
+                self.carregamentos_remotos += 1
+                self._salvar_cache(markets)
+                print(f"[MARKETS] {len(markets)} mercados carregados da exchange")
+
+            precision_mode = getattr(self.exchange, "precisionMode", DECIMAL_PLACES)
+            self._indice = {
+                symbol: info_de_market(market, precision_mode)
+                for symbol, market in markets.items()
+            }
+            self._carregado = True
+
+    # ---------- leitura ----------
+
+    def info(self, symbol) -> Optional[InfoMercado]:
+        if not self._carregado:
+            self.carregar()
+        return self._indice.get(symbol)
+
+    def contem(self, symbol):
+        info = self.info(symbol)
+        return info is not None and info.ativo
+
+    def symbols(self):
+        if not self._carregado:
+            self.carregar()
+        return list(self._indice.keys())
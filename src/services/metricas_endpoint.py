@@ -0,0 +1,134 @@
+import bisect
+import threading
+import time
+
+# Limites superiores dos baldes de latência (segundos): escala log de 0,5ms até ~60s
+LIMITES_BALDES = tuple(0.0005 * (1.25 ** i) for i in range(54))
+SEM_PAR = "-"
+
+
+class _Serie:
+    """Contadores e histograma de um par (endpoint, símbolo)"""
+
+    __slots__ = ("chamadas", "erros", "peso", "soma", "maximo", "baldes")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.peso = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.baldes = [0] * (len(LIMITES_BALDES) + 1)
+
+    def percentil(self, p):
+        if not self.chamadas:
+            return 0.0
+        alvo = p * self.chamadas
+        acumulado = 0
+        for indice, quantidade in enumerate(self.baldes):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                # Limite superior do balde, sem passar do maior valor já visto
+                limite = LIMITES_BALDES[indice] if indice < len(LIMITES_BALDES) else self.maximo
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class RegistroMetricas:
+    """
+    Registro em memória de latência, erros e peso por endpoint e símbolo.
+    O histograma usa baldes fixos em escala logarítmica: registrar é O(log n) e
+    sem alocação, e os percentis (p50/p95/p99) são aproximados pelo limite do balde.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self._desde = time.time()
+
+    def registrar(self, endpoint, symbol, duracao, peso=0, erro=False):
+        chave = (endpoint, symbol or SEM_PAR)
+        indice = bisect.bisect_left(LIMITES_BALDES, duracao)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = _Serie()
+            serie.chamadas += 1
+            serie.peso += peso
+            serie.soma += duracao
+            if duracao > serie.maximo:
+                serie.maximo = duracao
+            if erro:
+                serie.erros += 1
+            serie.baldes[indice] += 1
+
+    def snapshot(self, resetar=False):
+        """
+        Retorna uma linha por (endpoint, símbolo), da que mais consumiu tempo para a que menos.
+        Com resetar=True o registro é zerado (janelas para gravação periódica).
+        """
+        with self._lock:
+            series = self._series
+            desde = self._desde
+            if resetar:
+                self._series = {}
+                self._desde = time.time()
+
+        linhas = []
+        for (endpoint, symbol), serie in series.items():
+            linhas.append({
+                "endpoint": endpoint,
+                "symbol": symbol,
+                "chamadas": serie.chamadas,
+                "erros": serie.erros,
+                "peso": serie.peso,
+                "tempo_total": serie.soma,
+                "media": serie.soma / serie.chamadas if serie.chamadas else 0.0,
+                "p50": serie.percentil(0.50),
+                "p95": serie.percentil(0.95),
+                "p99": serie.percentil(0.99),
+                "max": serie.maximo,
+                "desde": desde,
+            })
+        linhas.sort(key=lambda l: l["tempo_total"], reverse=True)
+        return linhas
+
+    def por_endpoint(self):
+        """Agrega o snapshot atual por endpoint (somando todos os símbolos)"""
+        with self._lock:
+            agregadas = {}
+            for (endpoint, _), serie in self._series.items():
+                total = agregadas.setdefault(endpoint, _Serie())
+                total.chamadas += serie.chamadas
+                total.erros += serie.erros
+                total.peso += serie.peso
+                total.soma += serie.soma
+                total.maximo = max(total.maximo, serie.maximo)
+                total.baldes = [a + b for a, b in zip(total.baldes, serie.baldes)]
+
+        return {
+            endpoint: {
+                "chamadas": s.chamadas,
+                "erros": s.erros,
+                "peso": s.peso,
+                "tempo_total": s.soma,
+                "p50": s.percentil(0.50),
+                "p95": s.percentil(0.95),
+                "p99": s.percentil(0.99),
+                "max": s.maximo,
+            }
+            for endpoint, s in agregadas.items()
+        }
+
+
+_registro_compartilhado = None
+_lock_registro = threading.Lock()
+
+
+def registro_compartilhado():
+    """Instância única do processo (todos os ExchangeExecutor a usam por padrão)"""
+    global _registro_compartilhado
+    with _lock_registro:
+        if _registro_compartilhado is None:
+            _registro_compartilhado = RegistroMetricas()
+        return _registro_compartilhado
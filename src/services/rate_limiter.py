@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import threading
+import time
+
+# Prioridades (menor = mais urgente)
+PRIORIDADE_CANCELAMENTO = 0
+PRIORIDADE_ORDEM = 1
+PRIORIDADE_CONSULTA = 2
+PRIORIDADE_SCAN = 3
+
+# Limite de peso da Binance spot (REQUEST_WEIGHT por minuto), com margem de segurança
+LIMITE_PESO_MINUTO = 6000
+FATOR_SEGURANCA = 0.8
+MAX_FILA_PADRAO = 200
+PENALIDADE_PADRAO = 30  # segundos de pausa após 429/418
+
+# Peso de cada endpoint na Binance spot (aproximado para os parâmetros que usamos)
+PESOS_ENDPOINT = {
+    "fetch_order_book": 5,
+    "fetch_ticker": 2,
+    "fetch_tickers": 80,
+    "fetch_order": 4,
+    "fetch_open_orders": 6,
+    "fetch_open_orders_todos": 80,
+    "fetch_balance": 20,
+    "fetch_trading_fee": 20,
+    "load_markets": 20,
+    "create_order": 1,
+    "cancel_order": 1,
+    "cancel_all_orders": 1,
+}
+
+PRIORIDADES_ENDPOINT = {
+    "cancel_order": PRIORIDADE_CANCELAMENTO,
+    "cancel_all_orders": PRIORIDADE_CANCELAMENTO,
+    "create_order": PRIORIDADE_ORDEM,
+    "fetch_order_book": PRIORIDADE_SCAN,
+    "fetch_tickers": PRIORIDADE_SCAN,
+    "load_markets": PRIORIDADE_SCAN,
+}
+
+
+def segundos_retry_after(headers, padrao=PENALIDADE_PADRAO):
+    """
+    Pausa pedida pela exchange no cabeçalho Retry-After (segundos) de uma resposta
+    429/418; sem cabeçalho ou com valor ilegível usa `padrao`.
+    """
+    if not headers:
+        return padrao
+    valor = None
+    for chave, conteudo in headers.items():
+        if str(chave).lower() == "retry-after":
+            valor = conteudo
+            break
+    try:
+        segundos = float(valor)
+    except (TypeError, ValueError):
+        return padrao
+    return segundos if segundos > 0 else padrao
+
+
+class FilaCheiaError(Exception):
+    """Backpressure: a fila do agendador está cheia para requisições de baixa prioridade"""
+    pass
+
+
+class AgendadorRequisicoes:
+    """
+    Agendador único de requisições à exchange, compartilhado por scanner, tracker,
+    executor e top gainers.
+    - Token bucket medido em peso de requisição (reabastece capacidade/janela por segundo)
+    - Fila por prioridade: cancelamentos e ordens passam na frente de consultas e scans
+    - Backpressure: com a fila cheia, novas requisições de scan são recusadas (FilaCheiaError)
+    - Após 429/418 o chamador aciona penalizar() e tudo pausa pelo tempo indicado
+    """
+
+    def __init__(self, limite_peso=LIMITE_PESO_MINUTO, janela=60, fator_seguranca=FATOR_SEGURANCA,
+                 max_fila=MAX_FILA_PADRAO):
+        self.capacidade = limite_peso * fator_seguranca
+        self.taxa = self.capacidade / janela
+        self.max_fila = max_fila
+        self._tokens = self.capacidade
+        self._ultimo_abastecimento = time.monotonic()
+        self._pausado_ate = 0.0
+        self._fila = []
+        self._sequencia = itertools.count()
+        self._cond = threading.Condition()
+
+        # Métricas
+        self.requisicoes = 0
+        self.peso_total = 0
+        self.rejeitadas = 0
+        self.penalidades = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._fila_max = 0
+
+    def _abastecer(self, agora):
+        decorrido = agora - self._ultimo_abastecimento
+        if decorrido > 0:
+            self._tokens = min(self.capacidade, self._tokens + decorrido * self.taxa)
+            self._ultimo_abastecimento = agora
+
+    def adquirir(self, peso=1, prioridade=PRIORIDADE_CONSULTA):
+        """Bloqueia até haver peso disponível e ser a vez desta requisição"""
+        peso = min(peso, self.capacidade)
+        inicio = time.monotonic()
+        with self._cond:
+            if len(self._fila) >= self.max_fila and prioridade >= PRIORIDADE_SCAN:
+                self.rejeitadas += 1
+                raise FilaCheiaError(f"Fila de requisições cheia ({len(self._fila)})")
+
+            ticket = (prioridade, next(self._sequencia))
+            heapq.heappush(self._fila, ticket)
+            self._fila_max = max(self._fila_max, len(self._fila))
+
+            try:
+                while True:
+                    agora = time.monotonic()
+                    self._abastecer(agora)
+                    if self._fila[0] == ticket and agora >= self._pausado_ate and self._tokens >= peso:
+                        heapq.heappop(self._fila)
+                        self._tokens -= peso
+                        break
+
+                    if agora < self._pausado_ate:
+                        espera = self._pausado_ate - agora
+                    elif self._fila[0] == ticket:
+                        espera = (peso - self._tokens) / self.taxa
+                    else:
+                        espera = None  # aguarda a requisição da frente sair
+                    self._cond.wait(espera)
+            except BaseException:
+                # Interrompido na espera (ex.: KeyboardInterrupt): um ticket morto na frente
+                # da fila travaria todos os outros chamadores, inclusive os cancelamentos do encerramento
+                self._fila.remove(ticket)
+                heapq.heapify(self._fila)
+                self._cond.notify_all()
+                raise
+
+            esperado = time.monotonic() - inicio
+            self.requisicoes += 1
+            self.peso_total += peso
+            self._espera_total += esperado
+            self._espera_max = max(self._espera_max, esperado)
+            self._cond.notify_all()
+        return esperado
+
+    def executar(self, funcao, *args, peso=1, prioridade=PRIORIDADE_CONSULTA, **kwargs):
+        self.adquirir(peso, prioridade)
+        return funcao(*args, **kwargs)
+
+    def penalizar(self, segundos=PENALIDADE_PADRAO):
+        """Pausa todas as requisições (resposta 429/418 da exchange)"""
+        with self._cond:
+            self.penalidades += 1
+            self._tokens = 0
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self._cond.notify_all()
+
+    def metricas(self):
+        with self._cond:
+            self._abastecer(time.monotonic())
+            return {
+                "fila": len(self._fila),
+                "fila_max": self._fila_max,
+                "tokens_disponiveis": self._tokens,
+                "requisicoes": self.requisicoes,
+                "peso_total": self.peso_total,
+                "espera_media": self._espera_total / self.requisicoes if self.requisicoes else 0.0,
+                "espera_max": self._espera_max,
+                "rejeitadas": self.rejeitadas,
+                "penalidades": self.penalidades,
+                "pausado": time.monotonic() < self._pausado_ate,
+            }
+
+
+_agendador_compartilhado = None
+_lock_agendador = threading.Lock()
+
+
+def agendador_compartilhado():
+    """Instância única do processo (todos os ExchangeExecutor a usam por padrão)"""
+    global _agendador_compartilhado
+    with _lock_agendador:
+        if _agendador_compartilhado is None:
+            _agendador_compartilhado = AgendadorRequisicoes()
+        return _agendador_compartilhado
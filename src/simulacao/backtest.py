@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Backtest offline: reproduz books gravados contra a ExchangeSimulada com relógio
+simulado e passa as oportunidades pelo OrderTracker (ordens limit) ou pelo
+TradeEngine (ordens a mercado), sem nenhuma espera real.
+
+Os trades vão para um SQLite separado com o mesmo schema do bot (tabela trades).
+
+Uso (a partir de src/):
+    python -m simulacao.backtest books.jsonl --modo tracker --db ./data/backtest.db
+    python -m simulacao.backtest --sintetico 86400   # um dia de books sintéticos, 1/s
+    python -m simulacao.backtest --books ./data/books --dia 2024-05-01   # books do GravadorBooks
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from repository.database_repository import DatabaseRepository
+from controle.capital_manager import CapitalManager
+from core.order_tracker import OrderTracker
+from core.trade_engine import TradeEngine
+from simulacao.exchange_simulada import ExchangeSimulada
+from simulacao.loggers import LoggerSilencioso, EventLoggerSilencioso
+from simulacao.relogio import RelogioSimulado
+from services.book_recorder import LeitorBooks
+from utils.config_service import ConfigEstatica
+
+MODO_TRACKER = "tracker"
+MODO_ENGINE = "engine"
+CAMINHO_DB_PADRAO = "./data/backtest.db"
+# Snapshot só com topo e sem tamanho gravado: o topo é tratado como liquidez ilimitada
+QTD_TOPO_PADRAO = 1e6
+
+
+def _normalizar_snapshot(dados):
+    """
+    Aceita {"timestamp", "symbol", "bids", "asks"} ou só o topo
+    {"timestamp", "symbol", "bid", "ask", "bid_qty"?, "ask_qty"?}.
+    """
+    bids = dados.get("bids")
+    asks = dados.get("asks")
+    if not bids:
+        bids = [[dados["bid"], dados.get("bid_qty") or QTD_TOPO_PADRAO]]
+    if not asks:
+        asks = [[dados["ask"], dados.get("ask_qty") or QTD_TOPO_PADRAO]]
+    return {"timestamp": float(dados["timestamp"]), "symbol": dados["symbol"], "bids": bids, "asks": asks}
+
+
+def ler_snapshots_jsonl(caminho):
+    """Lê books gravados (um snapshot JSON por linha)"""
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if linha:
+                yield _normalizar_snapshot(json.loads(linha))
+
+
+def gerar_snapshots_sinteticos(symbols, passos, intervalo=1.0, inicio=0.0, preco_inicial=100.0,
+                               volatilidade=0.002, spread=0.004, niveis=5, seed=7):
+    """Passeio aleatório por símbolo, um snapshot de `niveis` níveis por passo (para medir o runner)"""
+    aleatorio = random.Random(seed)
+    mids = {symbol: preco_inicial for symbol in symbols}
+    for passo in range(passos):
+        timestamp = inicio + passo * intervalo
+        for symbol in symbols:
+            mid = mids[symbol] = mids[symbol] * (1 + aleatorio.gauss(0, volatilidade))
+            meio = mid * spread / 2
+            yield {
+                "timestamp": timestamp,
+                "symbol": symbol,
+                "bids": [[mid - meio - n * meio, 5.0] for n in range(niveis)],
+                "asks": [[mid + meio + n * meio, 5.0] for n in range(niveis)],
+            }
+
+
+class Backtest:
+    """
+    Avança o relógio simulado direto para o próximo book gravado (sem sleeps).
+    A cada book aplicado, se o spread do topo atingir `spread_alvo`, dispara:
+      - modo tracker: OrderTracker.executar_ordem_completa com os preços do TradeEngine
+        (bid + slippage/2 e ask - slippage/2); enquanto espera os fills, o tempo
+        simulado anda e os books seguintes continuam sendo aplicados
+      - modo engine: TradeEngine.executar_ciclo em modo real (ordens a mercado)
+    """
+
+    def __init__(self, snapshots, caminho_db=CAMINHO_DB_PADRAO, spread_alvo=0.003, slippage_tolerance=0.0,
+                 quantidade_padrao=0.001, quantidades=None, modo=MODO_TRACKER, saldos_iniciais=None,
+                 limites_capital=None, tempo_max_espera=15, intervalo_polling=1.0,
+                 taxa_maker=-0.0001, taxa_taker=0.001, limpar=True):
+        if modo not in (MODO_TRACKER, MODO_ENGINE):
+            raise ValueError(f"Modo de backtest inválido: {modo}")
+        self.snapshots = snapshots
+        self.caminho_db = caminho_db
+        self.spread_alvo = spread_alvo
+        self.slippage_tolerance = slippage_tolerance
+        self.quantidade_padrao = quantidade_padrao
+        self.quantidades = dict(quantidades or {})
+        self.modo = modo
+        self.saldos_iniciais = saldos_iniciais or {"USDT": 10000.0}
+        self.limites_capital = limites_capital
+        self.tempo_max_espera = tempo_max_espera
+        self.intervalo_polling = intervalo_polling
+        self.taxa_maker = taxa_maker
+        self.taxa_taker = taxa_taker
+        self.limpar = limpar
+
+    def _salvar_db(self, db):
+        """O backtest grava num banco em memória (sem I/O por trade) e copia para o arquivo no final"""
+        if self.caminho_db == ":memory:":
+            return
+        pasta = os.path.dirname(self.caminho_db)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        if self.limpar and os.path.exists(self.caminho_db):
+            os.remove(self.caminho_db)
+        destino = sqlite3.connect(self.caminho_db)
+        try:
+            db.conn.backup(destino)
+        finally:
+            destino.close()
+
+    def _montar_executor_de_ciclo(self, venue, db, relogio, capital):
+        log = LoggerSilencioso()
+        if self.modo == MODO_ENGINE:
+            config = ConfigEstatica({
+                "dry_run": False,
+                "quantidade_padrao": self.quantidade_padrao,
+                "spread_alvo": self.spread_alvo,
+                "slippage_tolerancia": self.slippage_tolerance,
+                "intervalo_execucao": 0,
+                "limites_capital": dict(self.limites_capital or {}),
+                "quantidades_personalizadas": self.quantidades,
+                "pares": [],
+            })
+            engine = TradeEngine(venue, db, log, dry_run=False, slippage_tolerance=self.slippage_tolerance,
+                                 capital_manager=capital, event_logger=EventLoggerSilencioso(), config=config)
+
+            def ciclo(symbol, quantidade, bid, ask, spread):
+                engine.executar_ciclo(symbol, quantidade,
+                                      {"bid": bid, "ask": ask, "spread": spread, "timestamp": relogio.agora()},
+                                      self.spread_alvo)
+            return ciclo
+
+        tracker = OrderTracker(venue, log, db, capital_manager=capital, tempo_max_espera=self.tempo_max_espera,
+                               relogio=relogio, intervalo_polling=self.intervalo_polling)
+        meio_slippage = self.slippage_tolerance / 2
+
+        def ciclo(symbol, quantidade, bid, ask, spread):
+            preco_compra = bid + meio_slippage
+            reserva = None
+            if capital:
+                # O OrderTracker libera a reserva ao final
+                reserva = capital.tentar_reservar(symbol, preco_compra * quantidade)
+                if reserva is None:
+                    return
+            tracker.executar_ordem_completa(symbol, quantidade, preco_compra, ask - meio_slippage, reserva=reserva)
+        return ciclo
+
+    def rodar(self):
+        snapshots = list(self.snapshots)
+        if not snapshots:
+            raise ValueError("Backtest sem books gravados")
+        inicio_simulado = min(s["timestamp"] for s in snapshots)
+
+        relogio = RelogioSimulado(inicio_simulado)
+        venue = ExchangeSimulada(saldos_iniciais=dict(self.saldos_iniciais), taxa_maker=self.taxa_maker,
+                                 taxa_taker=self.taxa_taker, relogio=relogio, intervalo_caminho=None)
+        venue.carregar_books(snapshots)
+        db = DatabaseRepository(":memory:", relogio=relogio)
+        capital = CapitalManager(dict(self.limites_capital)) if self.limites_capital else None
+        ciclo = self._montar_executor_de_ciclo(venue, db, relogio, capital)
+
+        decisoes = 0
+        inicio = time.perf_counter()
+        while True:
+            proximo = venue.proximo_timestamp()
+            if proximo is None:
+                break
+            relogio.avancar_para(proximo)
+            for symbol in dict.fromkeys(venue.sincronizar()):
+                bid, ask = venue.topo(symbol)
+                if not bid or not ask:
+                    continue
+                spread = (ask - bid) / bid
+                if spread < self.spread_alvo:
+                    continue
+                decisoes += 1
+                ciclo(symbol, self.quantidades.get(symbol, self.quantidade_padrao), bid, ask, spread)
+        decorrido = time.perf_counter() - inicio
+
+        resumo = db.resumo_agregado()
+        self._salvar_db(db)
+        db.close()
+
+        return {
+            "modo": self.modo,
+            "eventos": venue.books_aplicados,
+            "decisoes": decisoes,
+            "trades": resumo["trades"],
+            "pnl_total": resumo["pnl"],
+            "rebate_total": resumo["rebate"],
+            "segundos": decorrido,
+            "eventos_por_segundo": venue.books_aplicados / decorrido if decorrido else float("inf"),
+            "tempo_simulado": relogio.agora() - inicio_simulado,
+            "requisicoes": venue.requisicoes,
+            "saldos": venue.get_balance(),
+            "caminho_db": self.caminho_db,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest offline com books gravados")
+    parser.add_argument("arquivo", nargs="?", help="books gravados (JSONL, um snapshot por linha)")
+    parser.add_argument("--sintetico", type=int, default=0, help="gera N passos de books sintéticos em vez de ler arquivo")
+    parser.add_argument("--books", help="pasta do GravadorBooks (colunas binárias) em vez de JSONL")
+    parser.add_argument("--dia", action="append", help="dia (YYYY-MM-DD) gravado a reproduzir; repetível (padrão: todos)")
+    parser.add_argument("--modo", choices=(MODO_TRACKER, MODO_ENGINE), default=MODO_TRACKER)
+    parser.add_argument("--db", default=CAMINHO_DB_PADRAO, help="SQLite de saída (recriado a cada execução)")
+    parser.add_argument("--spread-alvo", type=float, help="padrão: config.json")
+    parser.add_argument("--slippage", type=float, help="padrão: config.json")
+    parser.add_argument("--quantidade", type=float, help="padrão: config.json")
+    parser.add_argument("--espera", type=float, default=15, help="tempo máximo de espera por fill (s simulados)")
+    args = parser.parse_args(argv)
+
+    try:
+        from utils.config_loader import carregar_config
+        config = carregar_config()
+    except Exception:
+        config = {}
+
+    if args.sintetico:
+        snapshots = gerar_snapshots_sinteticos(config.get("pares") or ["BTC/USDT"], args.sintetico)
+    elif args.books:
+        snapshots = LeitorBooks(args.books).snapshots(dias=args.dia)
+    elif args.arquivo:
+        snapshots = ler_snapshots_jsonl(args.arquivo)
+    else:
+        parser.error("informe o arquivo de books, --books PASTA ou --sintetico N")
+
+    backtest = Backtest(
+        snapshots,
+        caminho_db=args.db,
+        spread_alvo=args.spread_alvo if args.spread_alvo is not None else config.get("spread_alvo", 0.003),
+        slippage_tolerance=args.slippage if args.slippage is not None else config.get("slippage_tolerancia", 0.0),
+        quantidade_padrao=args.quantidade if args.quantidade is not None else config.get("quantidade_padrao", 0.001),
+        quantidades=config.get("quantidades_personalizadas"),
+        modo=args.modo,
+        limites_capital=config.get("limites_capital"),
+        tempo_max_espera=args.espera,
+    )
+    r = backtest.rodar()
+    print(f"[BACKTEST] {r['modo']} | {r['eventos']} books em {r['segundos']:.2f}s "
+          f"({r['eventos_por_segundo']:.0f} eventos/s) | tempo simulado: {r['tempo_simulado'] / 3600:.1f}h")
+    print(f"[BACKTEST] Decisões: {r['decisoes']} | Trades: {r['trades']} | P&L: {r['pnl_total']:.6f} | "
+          f"Rebate: {r['rebate_total']:.6f} | Resultado em {r['caminho_db']}")
+    return r
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline: roda ciclos do OrderTracker e do TradeEngine contra a
+ExchangeSimulada com relógio simulado e mede ciclos por segundo.
+
+Uso (a partir de src/):
+    python -m simulacao.benchmark --ciclos 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from repository.database_repository import DatabaseRepository
+from core.order_tracker import OrderTracker
+from simulacao.exchange_simulada import ExchangeSimulada
+from simulacao.loggers import LoggerSilencioso, EventLoggerSilencioso
+from simulacao.relogio import RelogioSimulado
+
+
+def gerar_caminho(passos, inicio=100.0, volatilidade=0.001, seed=7):
+    """Passeio aleatório multiplicativo reprodutível"""
+    aleatorio = random.Random(seed)
+    preco = inicio
+    caminho = []
+    for _ in range(passos):
+        caminho.append(preco)
+        preco *= 1 + aleatorio.gauss(0, volatilidade)
+    return caminho
+
+
+def _nova_venue(ciclos, symbol, latencia):
+    relogio = RelogioSimulado()
+    venue = ExchangeSimulada(saldos_iniciais={"USDT": 1e12, symbol.split("/")[0]: 0.0},
+                             relogio=relogio, latencia=latencia)
+    venue.carregar_caminho(symbol, gerar_caminho(ciclos * 40 + 10))
+    return venue, relogio
+
+
+def benchmark_tracker(ciclos=1000, symbol="BTC/USDT", quantidade=0.01, latencia=0.0):
+    """Ida e volta completa com ordens limit (compra no bid, venda no ask)"""
+    venue, relogio = _nova_venue(ciclos, symbol, latencia)
+    db = DatabaseRepository(":memory:")
+    tracker = OrderTracker(venue, LoggerSilencioso(), db, tempo_max_espera=15, relogio=relogio)
+
+    inicio = time.perf_counter()
+    for _ in range(ciclos):
+        book = venue.fetch_order_book(symbol)
+        tracker.executar_ordem_completa(symbol, quantidade, book["bids"][0][0], book["asks"][0][0])
+    decorrido = time.perf_counter() - inicio
+
+    trades = len(db.fetch_trades())
+    db.close()
+    return _resultado("tracker", ciclos, decorrido, venue, relogio, trades)
+
+
+def benchmark_engine(ciclos=1000, symbol="BTC/USDT", quantidade=0.01, latencia=0.0):
+    """Ciclos do TradeEngine em modo real (ordens a mercado) contra a venue simulada"""
+    from src.core.trade_engine import TradeEngine
+
+    venue, relogio = _nova_venue(ciclos, symbol, latencia)
+    db = DatabaseRepository(":memory:")
+    engine = TradeEngine(venue, db, LoggerSilencioso(), dry_run=False, slippage_tolerance=0.0,
+                         event_logger=EventLoggerSilencioso())
+
+    inicio = time.perf_counter()
+    for _ in range(ciclos):
+        book = venue.fetch_order_book(symbol)
+        bid, ask = book["bids"][0][0], book["asks"][0][0]
+        engine.executar_ciclo(symbol, quantidade,
+                              {"bid": bid, "ask": ask, "spread": (ask - bid) / bid, "timestamp": relogio.agora()},
+                              spread_alvo=0.0)
+        relogio.dormir(1)
+    decorrido = time.perf_counter() - inicio
+
+    trades = len(db.fetch_trades())
+    db.close()
+    return _resultado("engine", ciclos, decorrido, venue, relogio, trades)
+
+
+def _resultado(nome, ciclos, decorrido, venue, relogio, trades):
+    return {
+        "cenario": nome,
+        "ciclos": ciclos,
+        "segundos": decorrido,
+        "ciclos_por_segundo": ciclos / decorrido if decorrido else float("inf"),
+        "requisicoes": venue.requisicoes,
+        "trades": trades,
+        "tempo_simulado": relogio.agora(),
+        "saldos": venue.get_balance(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline contra a exchange simulada")
+    parser.add_argument("--ciclos", type=int, default=1000)
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência simulada por chamada (s)")
+    args = parser.parse_args()
+
+    for funcao in (benchmark_tracker, benchmark_engine):
+        r = funcao(ciclos=args.ciclos, latencia=args.latencia)
+        print(f"[BENCH] {r['cenario']:8s} | {r['ciclos']} ciclos em {r['segundos']:.2f}s "
+              f"({r['ciclos_por_segundo']:.0f} ciclos/s) | requisições: {r['requisicoes']} | "
+              f"trades: {r['trades']} | tempo simulado: {r['tempo_simulado']:.0f}s")
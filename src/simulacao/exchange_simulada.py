@@ -0,0 +1,441 @@
+import random
+import threading
+from collections import defaultdict
+
+import ccxt
+
+from simulacao.matching_engine import MatchingEngine
+from simulacao.relogio import RelogioReal
+
+DONO_BOT = "bot"
+DONO_LP = "lp"
+
+
+class ExchangeSimulada:
+    """
+    Exchange em processo com a mesma interface do ExchangeExecutor
+    (place_limit_order, cancel_order, fetch_order_status, fetch_order_book,
+    get_balance, execute_buy/execute_sell...), sobre um MatchingEngine com
+    prioridade preço-tempo.
+
+    A liquidez de mercado é sintética: para cada símbolo um caminho de preços
+    (mid) é reproduzido passo a passo e, a cada passo, um provedor de liquidez
+    recoloca `niveis_liquidez` níveis de cada lado ao redor do mid. Quando o
+    preço anda através das nossas ordens limit, elas são executadas como maker
+    e recebem o rebate (taxa_maker negativa).
+
+    Para backtest, carregar_books() troca o caminho sintético por books gravados:
+    cada snapshot vira a liquidez do símbolo quando o relógio chega no timestamp dele.
+
+    Com RelogioSimulado a latência e a espera entre passos não custam tempo real.
+    """
+
+    def __init__(self, saldos_iniciais=None, taxa_maker=-0.0001, taxa_taker=0.001,
+                 latencia=0.0, relogio=None, intervalo_caminho=1.0,
+                 niveis_liquidez=5, tamanho_nivel=10.0, spread_liquidez=0.002, seed=42):
+        self.motor = MatchingEngine()
+        self.relogio = relogio or RelogioReal()
+        self.taxa_maker = taxa_maker
+        self.taxa_taker = taxa_taker
+        self.latencia = latencia
+        self.intervalo_caminho = intervalo_caminho
+        self.niveis_liquidez = niveis_liquidez
+        self.tamanho_nivel = tamanho_nivel
+        self.spread_liquidez = spread_liquidez
+        self._aleatorio = random.Random(seed)
+
+        self._livre = defaultdict(float, saldos_iniciais or {"USDT": 1000.0})
+        self._bloqueado = {}      # order_id -> (asset, valor ainda bloqueado)
+        self._trades = defaultdict(list)
+        self._caminhos = {}       # symbol -> [mid, ...]
+        self._posicao = {}        # symbol -> índice atual no caminho
+        self._lp_por_symbol = {}  # symbol -> ids das ordens de liquidez de mercado
+        self._books = []          # snapshots gravados, em ordem de timestamp
+        self._books_pendentes = {}  # symbol -> (bids, asks) ainda não levados ao motor
+        self._proximo_book = 0
+        self.books_aplicados = 0
+        self._inicio = self.relogio.agora()
+        self._passos_desde_compactacao = 0
+        self._lock = threading.RLock()
+
+        # Compatibilidade com quem usa executor.exchange / executor.saldos / executor.agendador
+        self.exchange = self
+        self.saldos = self
+        self.agendador = None
+        self.mercados = None
+        self.contadores = {'tickers_buscados': 0, 'tickers_evitados': 0}
+        self.requisicoes = 0
+
+    # ---------- caminho de preços ----------
+
+    def carregar_caminho(self, symbol, precos):
+        """Define o caminho de preços (mids) de um símbolo e posiciona no primeiro ponto"""
+        with self._lock:
+            self._caminhos[symbol] = [float(p) for p in precos]
+            self._posicao[symbol] = -1
+            self._ir_para(symbol, 0)
+
+    def avancar(self, passos=1):
+        """Avança manualmente todos os caminhos (útil com intervalo_caminho=None)"""
+        with self._lock:
+            for symbol, caminho in self._caminhos.items():
+                self._ir_para(symbol, min(self._posicao[symbol] + passos, len(caminho) - 1))
+
+    def terminou(self):
+        return all(self._posicao[s] >= len(c) - 1 for s, c in self._caminhos.items())
+
+    # ---------- books gravados (backtest) ----------
+
+    def carregar_books(self, snapshots):
+        """
+        snapshots: dicts {"timestamp", "symbol", "bids", "asks"} (níveis [[preço, qtd], ...]).
+        São aplicados conforme o relógio avança (em qualquer chamada da API ou em sincronizar()).
+        """
+        with self._lock:
+            self._books = sorted(snapshots, key=lambda b: b["timestamp"])
+            self._proximo_book = 0
+
+    def proximo_timestamp(self):
+        """Timestamp do próximo book gravado ainda não aplicado (None se acabaram)"""
+        if self._proximo_book < len(self._books):
+            return self._books[self._proximo_book]["timestamp"]
+        return None
+
+    def sincronizar(self):
+        """Aplica tudo o que já venceu no relógio; retorna os símbolos cujo book mudou"""
+        with self._lock:
+            return self._sincronizar()
+
+    def _aplicar_books(self):
+        """
+        Os books vencidos ficam pendentes e só viram ordens no MatchingEngine quando
+        preciso: ao cruzar uma ordem aberta do bot ou quando o bot consulta/opera o
+        símbolo. Books que ninguém olha não custam inserções no motor.
+        Cada book vencido é conferido contra as ordens do bot ao sair da fila: um
+        cruzamento que dura menos que o intervalo entre duas sincronizações também executa.
+        """
+        agora = self.relogio.agora()
+        alterados = []
+        while self._proximo_book < len(self._books) and self._books[self._proximo_book]["timestamp"] <= agora:
+            book = self._books[self._proximo_book]
+            self._proximo_book += 1
+            self._books_pendentes[book["symbol"]] = (book["bids"], book["asks"])
+            self.books_aplicados += 1
+            if self._cruza_ordens_do_bot(book["symbol"]):
+                self._materializar(book["symbol"])
+            alterados.append(book["symbol"])
+        return alterados
+
+    def _cruza_ordens_do_bot(self, symbol):
+        bids, asks = self._books_pendentes[symbol]
+        # Toda ordem limit aberta do bot tem saldo bloqueado
+        for ordem_id in self._bloqueado:
+            ordem = self.motor.ordens[ordem_id]
+            if ordem["symbol"] != symbol or ordem["status"] != "open":
+                continue
+            if ordem["side"] == "buy" and asks and asks[0][0] <= ordem["price"]:
+                return True
+            if ordem["side"] == "sell" and bids and bids[0][0] >= ordem["price"]:
+                return True
+        return False
+
+    def _materializar(self, symbol):
+        pendente = self._books_pendentes.pop(symbol, None)
+        if pendente is not None:
+            self._repor_liquidez(symbol, *pendente)
+
+    def topo(self, symbol):
+        """(bid, ask) atuais do símbolo sem contar como requisição nem materializar o book"""
+        with self._lock:
+            pendente = self._books_pendentes.get(symbol)
+            if pendente is not None:
+                bids, asks = pendente
+                return (bids[0][0] if bids else None, asks[0][0] if asks else None)
+            return self.motor.melhor_preco(symbol, "buy"), self.motor.melhor_preco(symbol, "sell")
+
+    def _sincronizar(self):
+        alterados = self._aplicar_books() if self._books else []
+        if not self.intervalo_caminho:
+            return alterados
+        alvo = int((self.relogio.agora() - self._inicio) / self.intervalo_caminho)
+        for symbol, caminho in self._caminhos.items():
+            destino = min(alvo, len(caminho) - 1)
+            if destino > self._posicao[symbol]:
+                self._ir_para(symbol, destino)
+                alterados.append(symbol)
+        return alterados
+
+    def _ir_para(self, symbol, indice):
+        self._posicao[symbol] = indice
+        mid = self._caminhos[symbol][indice]
+
+        meio_spread = mid * self.spread_liquidez / 2
+        passo = mid * self.spread_liquidez / 2
+        bids, asks = [], []
+        for nivel in range(self.niveis_liquidez):
+            tamanho = self.tamanho_nivel * (0.5 + self._aleatorio.random())
+            bids.append((mid - meio_spread - nivel * passo, tamanho))
+            asks.append((mid + meio_spread + nivel * passo, tamanho))
+        self._repor_liquidez(symbol, bids, asks)
+
+    def _repor_liquidez(self, symbol, bids, asks):
+        """Troca toda a liquidez de mercado do símbolo pelos níveis dados (cruzando com ordens do bot)"""
+        ids_lp = self._lp_por_symbol.pop(symbol, ())
+        for ordem_id in ids_lp:
+            self.motor.cancelar(ordem_id)
+
+        novos = []
+        agora = self.relogio.agora()
+        for side, niveis in (("buy", bids), ("sell", asks)):
+            for preco, tamanho in niveis:
+                if tamanho <= 0:
+                    continue
+                ordem, execucoes = self.motor.inserir_limite(symbol, side, float(preco), float(tamanho), dono=DONO_LP, timestamp=agora)
+                self._liquidar(execucoes)
+                if ordem["status"] == "open":
+                    novos.append(ordem["id"])
+        self._lp_por_symbol[symbol] = novos
+
+        self._passos_desde_compactacao += 1
+        if self._passos_desde_compactacao >= 100:
+            self.motor.compactar(descartaveis=(DONO_LP,))
+            self._passos_desde_compactacao = 0
+
+    # ---------- infraestrutura ----------
+
+    def _chamada(self):
+        """Toda chamada da API: conta requisição, aplica latência e sincroniza o caminho"""
+        self.requisicoes += 1
+        if self.latencia:
+            self.relogio.dormir(self.latencia)
+        self._sincronizar()
+
+    def _liquidar(self, execucoes):
+        for execucao in execucoes:
+            for papel, ordem in (("maker", execucao["maker"]), ("taker", execucao["taker"])):
+                if ordem["dono"] != DONO_BOT:
+                    continue
+                self._aplicar_fill(ordem, execucao["price"], execucao["amount"], papel)
+
+    def _aplicar_fill(self, ordem, preco, quantidade, papel):
+        base, quote = ordem["symbol"].split("/")
+        custo = preco * quantidade
+        taxa = self.taxa_maker if papel == "maker" else self.taxa_taker
+        fee = custo * taxa
+
+        bloqueio = self._bloqueado.get(ordem["id"])
+        if ordem["side"] == "buy":
+            if bloqueio:
+                # Libera o bloqueado ao preço limite; o que sobrar volta para o livre
+                liberado = min(bloqueio[1], ordem["price"] * quantidade)
+                self._bloqueado[ordem["id"]] = (quote, bloqueio[1] - liberado)
+                self._livre[quote] += liberado
+            self._livre[quote] -= custo
+            self._livre[base] += quantidade
+        else:
+            if bloqueio:
+                liberado = min(bloqueio[1], quantidade)
+                self._bloqueado[ordem["id"]] = (base, bloqueio[1] - liberado)
+                self._livre[base] += liberado
+            self._livre[base] -= quantidade
+            self._livre[quote] += custo
+        self._livre[quote] -= fee
+
+        if ordem["status"] != "open":
+            self._liberar_bloqueio(ordem["id"])
+
+        self._trades[ordem["id"]].append({
+            "price": preco,
+            "amount": quantidade,
+            "cost": custo,
+            "takerOrMaker": papel,
+            "fee": {"cost": fee, "currency": quote},
+            # Mesmo significado usado pelo OrderTracker: valor positivo = rebate recebido
+            "commission": -fee,
+            "timestamp": self.relogio.agora(),
+        })
+
+    def _liberar_bloqueio(self, ordem_id):
+        bloqueio = self._bloqueado.pop(ordem_id, None)
+        if bloqueio and bloqueio[1] > 0:
+            self._livre[bloqueio[0]] += bloqueio[1]
+
+    def _visao(self, ordem):
+        """Ordem no formato ccxt"""
+        trades = self._trades.get(ordem["id"], [])
+        fee = sum(t["fee"]["cost"] for t in trades)
+        return {
+            "id": ordem["id"],
+            "symbol": ordem["symbol"],
+            "side": ordem["side"],
+            "type": ordem["type"],
+            "price": ordem["price"],
+            "amount": ordem["amount"],
+            "filled": ordem["filled"],
+            "remaining": ordem["remaining"],
+            "cost": ordem["cost"],
+            "average": ordem["cost"] / ordem["filled"] if ordem["filled"] else None,
+            "status": ordem["status"],
+            "timestamp": ordem["timestamp"],
+            "fee": {"cost": fee, "currency": ordem["symbol"].split("/")[1]},
+            "trades": list(trades),
+        }
+
+    def _ordem_do_bot(self, order_id):
+        ordem = self.motor.ordens.get(order_id)
+        if ordem is None or ordem["dono"] != DONO_BOT:
+            raise ccxt.OrderNotFound(f"Ordem {order_id} não encontrada")
+        return ordem
+
+    # ---------- interface do ExchangeExecutor ----------
+
+    def place_limit_order(self, symbol, side, price, quantity):
+        side = side.lower()
+        if side not in ("buy", "sell"):
+            raise ValueError("Side must be 'buy' or 'sell'")
+        with self._lock:
+            self._chamada()
+            self._materializar(symbol)
+            base, quote = symbol.split("/")
+            asset, valor = (quote, price * quantity) if side == "buy" else (base, quantity)
+            if self._livre[asset] + 1e-12 < valor:
+                raise ccxt.InsufficientFunds(f"Saldo {asset} insuficiente: {self._livre[asset]:.8f} < {valor:.8f}")
+
+            ordem, execucoes = self.motor.inserir_limite(symbol, side, price, quantity, dono=DONO_BOT, timestamp=self.relogio.agora())
+            self._livre[asset] -= valor
+            self._bloqueado[ordem["id"]] = (asset, valor)
+            self._liquidar(execucoes)
+            return self._visao(ordem)
+
+    def cancel_order(self, order_id, symbol):
+        with self._lock:
+            self._chamada()
+            ordem = self._ordem_do_bot(order_id)
+            if self.motor.cancelar(order_id) is None:
+                raise ccxt.OrderNotFound(f"Ordem {order_id} não está aberta")
+            self._liberar_bloqueio(order_id)
+            return self._visao(ordem)
+
+    def fetch_order_status(self, order_id, symbol):
+        with self._lock:
+            self._chamada()
+            return self._visao(self._ordem_do_bot(order_id))
+
+    def fetch_order_fills(self, order_id, symbol):
+        with self._lock:
+            self._chamada()
+            return list(self._trades.get(self._ordem_do_bot(order_id)["id"], []))
+
+    def fetch_order_book(self, symbol, limit=5):
+        with self._lock:
+            self._chamada()
+            self._materializar(symbol)
+            return self.motor.book(symbol, limit)
+
+    def fetch_ticker(self, symbol):
+        with self._lock:
+            self._chamada()
+            self._materializar(symbol)
+            bid = self.motor.melhor_preco(symbol, "buy")
+            ask = self.motor.melhor_preco(symbol, "sell")
+            last = self._caminhos[symbol][self._posicao[symbol]] if symbol in self._caminhos else None
+            return {"symbol": symbol, "bid": bid, "ask": ask, "last": last}
+
+    def fetch_open_orders(self, symbol=None):
+        with self._lock:
+            self._chamada()
+            # Toda ordem limit aberta do bot tem saldo bloqueado: evita varrer a liquidez sintética
+            abertas = (self.motor.ordens[i] for i in list(self._bloqueado))
+            return [
+                self._visao(o) for o in abertas
+                if o["status"] == "open" and (symbol is None or o["symbol"] == symbol)
+            ]
+
+    def listar_ordens_abertas(self):
+        return self.fetch_open_orders()
+
+    def get_balance(self, asset=None):
+        with self._lock:
+            if asset:
+                return self._livre.get(asset, 0.0)
+            return dict(self._livre)
+
+    # Interface do BalanceLedger (executor.saldos)
+    def livre(self, asset):
+        return self.get_balance(asset)
+
+    def todos(self):
+        return self.get_balance()
+
+    def cancelar_todas(self, symbol):
+        with self._lock:
+            canceladas = []
+            for ordem in self.motor.ordens_abertas(symbol, dono=DONO_BOT):
+                canceladas.append(self.cancel_order(ordem["id"], symbol))
+            return canceladas
+
+    def cancelar_todas_em_paralelo(self, symbols, max_workers=None):
+        inicio = self.relogio.agora()
+        resultados = {}
+        for symbol in dict.fromkeys(symbols):
+            try:
+                resultados[symbol] = {"ok": True, "canceladas": len(self.cancelar_todas(symbol)), "erro": None, "tempo": 0.0}
+            except Exception as e:
+                resultados[symbol] = {"ok": False, "canceladas": None, "erro": str(e), "tempo": 0.0}
+        return {"resultados": resultados, "tempo_total": self.relogio.agora() - inicio}
+
+    def _executar_mercado(self, symbol, side, quantidade):
+        with self._lock:
+            self._chamada()
+            self._materializar(symbol)
+            ordem, execucoes = self.motor.inserir_mercado(symbol, side, quantidade, dono=DONO_BOT, timestamp=self.relogio.agora())
+            self._liquidar(execucoes)
+            return self._visao(ordem)
+
+    def execute_buy(self, crypto, investment, quote='USDT', strategy='scalping', snapshot=None, idade_maxima=None):
+        symbol = f"{crypto}/{quote}"
+        preco = snapshot.get("price") if snapshot else None
+        if preco:
+            self.contadores['tickers_evitados'] += 1
+        else:
+            self.contadores['tickers_buscados'] += 1
+            preco = self.fetch_ticker(symbol)["ask"]
+        if not preco or investment > self._livre[quote]:
+            return None
+
+        ordem = self._executar_mercado(symbol, "buy", investment / preco)
+        if not ordem["filled"]:
+            return None
+        return {
+            'symbol': symbol,
+            'amount': ordem["filled"],
+            'price': ordem["average"],
+            'order_id': ordem["id"],
+            'time': self.relogio.agora_utc()
+        }
+
+    def execute_sell(self, crypto, amount, quote='USDT', entry_price=None, strategy='scalping', snapshot=None, idade_maxima=None):
+        symbol = f"{crypto}/{quote}"
+        if snapshot and snapshot.get("price"):
+            self.contadores['tickers_evitados'] += 1
+        else:
+            self.contadores['tickers_buscados'] += 1
+        amount = min(amount, self._livre[crypto])
+        if amount <= 0:
+            return None
+
+        ordem = self._executar_mercado(symbol, "sell", amount)
+        if not ordem["filled"]:
+            return None
+        avg_price = ordem["average"]
+        pnl_percent = ((avg_price / entry_price) - 1) * 100 if entry_price else None
+        pnl_value = (avg_price - entry_price) * ordem["filled"] if entry_price else None
+        return {
+            'symbol': symbol,
+            'amount': ordem["filled"],
+            'price': avg_price,
+            'order_id': ordem["id"],
+            'time': self.relogio.agora_utc(),
+            'pnl_percent': pnl_percent,
+            'pnl_value': pnl_value
+        }
@@ -0,0 +1,20 @@
+class LoggerSilencioso:
+    """Mesma interface do LogService, sem I/O (evita medir print/arquivo/banco)"""
+
+    def __init__(self):
+        self.mensagens = 0
+
+    def info(self, message):
+        self.mensagens += 1
+
+    debug = warn = error = critical = info
+
+
+class EventLoggerSilencioso:
+    """Mesma interface do EventLogger, sem I/O"""
+
+    def __init__(self):
+        self.eventos = 0
+
+    def log_evento(self, tipo, par, mensagem, detalhe=None):
+        self.eventos += 1
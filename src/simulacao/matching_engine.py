@@ -0,0 +1,156 @@
+import heapq
+import itertools
+
+
+class MatchingEngine:
+    """
+    Livro de ofertas com prioridade preço-tempo para um ou mais símbolos.
+    Ordens limit cruzam contra o lado oposto (taker) e o restante fica no livro (maker).
+    Ordens canceladas ou executadas são removidas dos heaps de forma preguiçosa.
+
+    Cada execução gera um dict {"maker", "taker", "price", "amount"} com as ordens
+    envolvidas, para o chamador aplicar taxas, rebates e saldos.
+    """
+
+    def __init__(self):
+        self._bids = {}   # symbol -> heap de (-preço, seq, id)
+        self._asks = {}   # symbol -> heap de (preço, seq, id)
+        self.ordens = {}  # id -> ordem
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+
+    # ---------- ordens ----------
+
+    def _nova_ordem(self, symbol, side, tipo, price, amount, dono, timestamp):
+        return {
+            "id": str(next(self._ids)),
+            "symbol": symbol,
+            "side": side,
+            "type": tipo,
+            "price": price,
+            "amount": amount,
+            "filled": 0.0,
+            "remaining": amount,
+            "cost": 0.0,
+            "status": "open",
+            "dono": dono,
+            "timestamp": timestamp,
+        }
+
+    def inserir_limite(self, symbol, side, price, amount, dono=None, timestamp=None):
+        """Insere ordem limit. Retorna (ordem, execuções)"""
+        ordem = self._nova_ordem(symbol, side, "limit", price, amount, dono, timestamp)
+        self.ordens[ordem["id"]] = ordem
+        execucoes = self._cruzar(ordem, limite=price)
+        if ordem["remaining"] > 0:
+            seq = next(self._seq)
+            if side == "buy":
+                heapq.heappush(self._bids.setdefault(symbol, []), (-price, seq, ordem["id"]))
+            else:
+                heapq.heappush(self._asks.setdefault(symbol, []), (price, seq, ordem["id"]))
+        return ordem, execucoes
+
+    def inserir_mercado(self, symbol, side, amount, dono=None, timestamp=None):
+        """Ordem a mercado: consome o livro até a quantidade ou acabar a liquidez"""
+        ordem = self._nova_ordem(symbol, side, "market", None, amount, dono, timestamp)
+        self.ordens[ordem["id"]] = ordem
+        execucoes = self._cruzar(ordem, limite=None)
+        if ordem["remaining"] > 0:
+            ordem["status"] = "closed" if ordem["filled"] > 0 else "canceled"
+        return ordem, execucoes
+
+    def cancelar(self, ordem_id):
+        ordem = self.ordens.get(ordem_id)
+        if ordem is None or ordem["status"] != "open":
+            return None
+        ordem["status"] = "canceled"
+        return ordem
+
+    def _cruzar(self, taker, limite):
+        lado_oposto = self._asks if taker["side"] == "buy" else self._bids
+        heap = lado_oposto.get(taker["symbol"], [])
+        execucoes = []
+
+        while taker["remaining"] > 0 and heap:
+            chave, _, maker_id = heap[0]
+            maker = self.ordens[maker_id]
+            if maker["status"] != "open":
+                heapq.heappop(heap)
+                continue
+
+            preco = maker["price"]
+            if limite is not None:
+                if taker["side"] == "buy" and preco > limite:
+                    break
+                if taker["side"] == "sell" and preco < limite:
+                    break
+
+            quantidade = min(taker["remaining"], maker["remaining"])
+            for ordem in (taker, maker):
+                ordem["filled"] += quantidade
+                ordem["remaining"] -= quantidade
+                ordem["cost"] += quantidade * preco
+                if ordem["remaining"] <= 1e-15:
+                    ordem["remaining"] = 0.0
+                    ordem["status"] = "closed"
+
+            if maker["status"] != "open":
+                heapq.heappop(heap)
+
+            execucoes.append({"maker": maker, "taker": taker, "price": preco, "amount": quantidade})
+
+        return execucoes
+
+    def compactar(self, descartaveis=("lp",)):
+        """
+        Reconstrói os heaps só com ordens abertas e esquece ordens encerradas
+        cujos donos estejam em `descartaveis` (ex.: liquidez sintética).
+        """
+        for heaps in (self._bids, self._asks):
+            for symbol, heap in heaps.items():
+                heaps[symbol] = [item for item in heap if self.ordens[item[2]]["status"] == "open"]
+                heapq.heapify(heaps[symbol])
+        self.ordens = {
+            ordem_id: ordem for ordem_id, ordem in self.ordens.items()
+            if ordem["status"] == "open" or ordem["dono"] not in descartaveis
+        }
+
+    # ---------- leitura ----------
+
+    def _niveis(self, heap, sinal, limite):
+        agregados = {}
+        for chave, _, ordem_id in sorted(heap):
+            ordem = self.ordens[ordem_id]
+            if ordem["status"] != "open":
+                continue
+            preco = chave * sinal
+            if preco not in agregados:
+                if len(agregados) >= limite:
+                    break
+                agregados[preco] = 0.0
+            agregados[preco] += ordem["remaining"]
+        return [[preco, qtd] for preco, qtd in agregados.items()]
+
+    def book(self, symbol, limit=5):
+        return {
+            "symbol": symbol,
+            "bids": self._niveis(self._bids.get(symbol, []), -1, limit),
+            "asks": self._niveis(self._asks.get(symbol, []), 1, limit),
+        }
+
+    def melhor_preco(self, symbol, side):
+        heap = (self._bids if side == "buy" else self._asks).get(symbol, [])
+        while heap:
+            chave, _, ordem_id = heap[0]
+            if self.ordens[ordem_id]["status"] == "open":
+                return -chave if side == "buy" else chave
+            heapq.heappop(heap)
+        return None
+
+    def ordens_abertas(self, symbol=None, dono=None):
+        return [
+            o for o in self.ordens.values()
+            if o["status"] == "open"
+            and (symbol is None or o["symbol"] == symbol)
+            and (dono is None or o["dono"] == dono)
+        ]
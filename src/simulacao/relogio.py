@@ -0,0 +1,37 @@
+import time
+from datetime import datetime, timedelta
+
+
+class RelogioReal:
+    """Relógio de parede: agora() em epoch e dormir() com time.sleep"""
+
+    def agora(self):
+        return time.time()
+
+    def agora_utc(self):
+        return datetime.utcnow()
+
+    def dormir(self, segundos):
+        time.sleep(segundos)
+
+
+class RelogioSimulado:
+    """
+    Relógio controlado pelo código: dormir() apenas avança o tempo, sem esperar.
+    Permite rodar simulações e backtests tão rápido quanto a CPU deixar.
+    """
+
+    def __init__(self, inicio=0.0):
+        self._agora = float(inicio)
+
+    def agora(self):
+        return self._agora
+
+    def agora_utc(self):
+        return datetime(1970, 1, 1) + timedelta(seconds=self._agora)
+
+    def dormir(self, segundos):
+        self._agora += max(0.0, segundos)
+
+    def avancar_para(self, instante):
+        self._agora = max(self._agora, float(instante))
@@ -0,0 +1,86 @@
+import unittest
+import calendar
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_repository import DatabaseRepository
+from simulacao.relogio import RelogioSimulado
+
+
+class TestAgregados(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "scalping.db")
+        # 2024-05-01 10:00:00 UTC
+        self.relogio = RelogioSimulado(calendar.timegm((2024, 5, 1, 10, 0, 0)))
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_totais_e_baldes_mantidos_a_cada_trade(self):
+        """Testa se cada save_trade atualiza os totais por par e os baldes de minuto, hora e dia"""
+        db = DatabaseRepository(self.caminho, relogio=self.relogio)
+        db.save_trade("BTC/USDT", "buy", 100.0, 0.1, rebate=0.001, pnl=0)
+        db.save_trade("BTC/USDT", "sell", 101.0, 0.1, rebate=0, pnl=0.1)
+        self.relogio.avancar_para(self.relogio.agora() + 3600)
+        db.save_trade("ETH/USDT", "sell", 50.0, 1.0, rebate=0.002, pnl=0.3)
+
+        resumo = db.resumo_agregado()
+        self.assertAlmostEqual(resumo["pnl"], 0.4)
+        self.assertAlmostEqual(resumo["rebate"], 0.003)
+        self.assertAlmostEqual(resumo["volume"], 10.0 + 10.1 + 50.0)
+        self.assertEqual(resumo["trades"], 3)
+        self.assertEqual(db.resumo_por_par()["BTC/USDT"]["trades"], 2)
+
+        horas = db.agregados_por_balde("hora")
+        self.assertEqual([(h[0], h[4]) for h in horas], [("2024-05-01 10:00", 2), ("2024-05-01 11:00", 1)])
+        self.assertEqual(db.agregados_por_balde("minuto", symbol="ETH/USDT")[0][0], "2024-05-01 11:00")
+        self.assertAlmostEqual(db.agregados_por_balde("dia", desde="2024-05-01")[0][1], 0.4)
+        db.close()
+
+    def test_banco_antigo_incorporado_pelo_ultimo_id(self):
+        """Testa se trades gravados antes dos agregados existirem são incorporados ao abrir o banco"""
+        conn = sqlite3.connect(self.caminho)
+        conn.execute("""
+            CREATE TABLE trades (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT, side TEXT, price REAL,
+                                 quantity REAL, rebate REAL, pnl REAL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)
+        """)
+        conn.executemany("INSERT INTO trades (symbol, side, price, quantity, rebate, pnl, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         [("SOL/USDT", "sell", 10.0, 1.0, 0.0, 0.5, "2024-05-01 09:00:00")] * 4)
+        conn.commit()
+        conn.close()
+
+        db = DatabaseRepository(self.caminho)
+        db.save_trade("SOL/USDT", "sell", 10.0, 1.0, rebate=0, pnl=0.5)
+        self.assertEqual(db.resumo_agregado("SOL/USDT")["trades"], 5)
+        db.close()
+
+        # Reabrir não soma o histórico de novo
+        db = DatabaseRepository(self.caminho)
+        self.assertAlmostEqual(db.resumo_agregado()["pnl"], 2.5)
+        db.reconstruir_agregados()
+        self.assertAlmostEqual(db.resumo_agregado()["pnl"], 2.5)
+        db.close()
+
+    def test_write_behind_na_mesma_transacao(self):
+        """Testa se os agregados acompanham os trades gravados em lote pelo write-behind"""
+        db = DatabaseRepository(self.caminho, write_behind=True)
+        for _ in range(50):
+            db.save_trade("BTC/USDT", "sell", 100.0, 0.01, rebate=0, pnl=0.01)
+
+        self.assertEqual(db.resumo_agregado()["trades"], 50)
+        self.assertAlmostEqual(db.resumo_agregado("BTC/USDT")["pnl"], 0.5)
+        with self.assertRaises(ValueError):
+            db.agregados_por_balde("semana")
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulacao.backtest import Backtest, MODO_TRACKER, _normalizar_snapshot
+
+
+def _book(timestamp, bid, ask, symbol="BTC/USDT"):
+    return {"timestamp": timestamp, "symbol": symbol, "bids": [[bid, 5.0]], "asks": [[ask, 5.0]]}
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho_db = os.path.join(self.pasta.name, "backtest.db")
+        # Compra no bid 100 executa quando o ask cai a 99.9; venda no ask 101 executa quando o bid sobe
+        self.books = [
+            _book(1000.0, 100.0, 101.0),
+            _book(1002.0, 99.5, 99.9),
+            _book(1004.0, 100.0, 100.4),
+            _book(1006.0, 101.2, 101.5),
+        ]
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_ida_e_volta_com_tracker(self):
+        """Testa se uma ida e volta é executada e gravada no SQLite separado com o tempo simulado"""
+        resultado = Backtest(self.books, caminho_db=self.caminho_db, spread_alvo=0.005,
+                             quantidade_padrao=1.0, modo=MODO_TRACKER).rodar()
+
+        self.assertEqual(resultado["eventos"], 4)
+        self.assertEqual(resultado["trades"], 2)
+        self.assertGreater(resultado["eventos_por_segundo"], 0)
+
+        conn = sqlite3.connect(self.caminho_db)
+        trades = conn.execute("SELECT symbol, side, price, timestamp FROM trades ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual([t[1] for t in trades], ["buy", "sell"])
+        self.assertEqual((trades[0][2], trades[1][2]), (100.0, 101.0))
+        self.assertTrue(trades[1][3].startswith("1970-01-01 00:16"))
+
+    def test_cruzamento_entre_duas_consultas_executa(self):
+        """Testa se um ask que cruza a compra e volta antes da próxima consulta do tracker ainda executa"""
+        books = [
+            _book(1000.0, 100.0, 101.0),
+            _book(1001.3, 99.5, 99.9),  # cruza o bid 100 por 0.3s, dentro do intervalo de polling
+            _book(1001.6, 100.0, 101.0),
+            _book(1006.0, 101.2, 101.5),
+        ]
+
+        resultado = Backtest(books, caminho_db=self.caminho_db, spread_alvo=0.005,
+                             quantidade_padrao=1.0, modo=MODO_TRACKER).rodar()
+
+        self.assertEqual(resultado["trades"], 2)
+
+    def test_spread_alvo_filtra_decisoes(self):
+        """Testa se nenhum ciclo é disparado com spread abaixo do alvo"""
+        resultado = Backtest(self.books, caminho_db=self.caminho_db, spread_alvo=0.05, quantidade_padrao=1.0).rodar()
+
+        self.assertEqual(resultado["decisoes"], 0)
+        self.assertEqual(resultado["trades"], 0)
+
+    def test_snapshot_so_com_topo(self):
+        """Testa a normalização de um snapshot gravado só com bid/ask"""
+        book = _normalizar_snapshot({"timestamp": "10", "symbol": "ETH/USDT", "bid": 10.0, "ask": 10.1, "ask_qty": 2})
+
+        self.assertEqual(book["timestamp"], 10.0)
+        self.assertEqual(book["asks"], [[10.1, 2]])
+        self.assertEqual(book["bids"][0][0], 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.balance_ledger import BalanceLedger
+
+
+def _ordem(status="closed", filled=0.0, cost=None, fee=None, side="buy", ordem_id="1"):
+    ordem = {"id": ordem_id, "symbol": "BTC/USDT", "side": side, "status": status,
+             "filled": filled, "price": 100.0, "cost": cost}
+    if fee is not None:
+        ordem["fee"] = {"cost": fee, "currency": "USDT"}
+    return ordem
+
+
+class TestBalanceLedger(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.buscar_saldo = MagicMock(return_value={"free": {"USDT": 1000.0, "BTC": 1.0}})
+        self.ledger = BalanceLedger(self.buscar_saldo, intervalo_reconciliacao=3600)
+        self.ledger.reconciliar()
+
+    def test_leituras_repetidas_da_ordem_fechada_aplicam_uma_vez(self):
+        """Testa se ler de novo uma ordem já fechada (watcher, cancelador) não soma o fill outra vez"""
+        self.ledger.registrar_ordem("1", "BTC/USDT", "buy", 100.0, 2.0)
+        self.assertAlmostEqual(self.ledger.livre("USDT"), 800.0)
+
+        for _ in range(3):
+            self.ledger.aplicar_ordem(_ordem(filled=2.0, cost=200.0, fee=0.2))
+
+        self.assertAlmostEqual(self.ledger.livre("USDT"), 799.8)
+        self.assertAlmostEqual(self.ledger.livre("BTC"), 3.0)
+
+    def test_leitura_com_mais_fill_aplica_so_a_diferenca(self):
+        """Testa se uma leitura posterior com mais quantidade executada aplica só a parte nova"""
+        self.ledger.aplicar_ordem(_ordem(status="closed", filled=0.5, cost=50.0, side="sell"))
+        self.ledger.aplicar_ordem(_ordem(status="closed", filled=0.8, cost=80.0, side="sell"))
+
+        self.assertAlmostEqual(self.ledger.livre("BTC"), 0.2)
+        self.assertAlmostEqual(self.ledger.livre("USDT"), 1080.0)
+
+    def test_cancelamento_apos_fill_parcial(self):
+        """Testa se o cancel aplica o fill parcial da resposta em vez de devolver a reserva inteira"""
+        self.ledger.registrar_ordem("1", "BTC/USDT", "buy", 100.0, 2.0)
+
+        self.ledger.aplicar_cancelamento("1", _ordem(status="canceled", filled=0.5, cost=50.0))
+        # O cancelador lê a mesma ordem depois: nada muda
+        self.ledger.aplicar_ordem(_ordem(status="canceled", filled=0.5, cost=50.0))
+
+        self.assertAlmostEqual(self.ledger.livre("USDT"), 950.0)
+        self.assertAlmostEqual(self.ledger.livre("BTC"), 1.5)
+        self.assertEqual(self.buscar_saldo.call_count, 1)
+
+    def test_cancelamento_sem_fill_na_resposta_pede_reconciliacao(self):
+        """Testa se um cancel sem filled na resposta devolve a reserva e força reconciliação"""
+        self.ledger.registrar_ordem("1", "BTC/USDT", "buy", 100.0, 2.0)
+
+        self.ledger.aplicar_cancelamento("1", {"id": "1", "status": "canceled"})
+
+        self.assertAlmostEqual(self.ledger.livre("USDT"), 1000.0)
+        self.assertEqual(self.buscar_saldo.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
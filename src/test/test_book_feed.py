@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.book_feed import BookFeed, FonteReplay
+from scanners.spread_scanner import escanear_spreads_feed
+
+
+class TestBookFeed(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.feed = BookFeed()
+        self.feed.inscrever(["BTC/USDT", "ETH/USDT"])
+
+    def test_book_ticker_atualiza_topo(self):
+        """Testa se uma mensagem bookTicker atualiza o topo do book"""
+        self.feed.aplicar_mensagem({"u": 1, "s": "BTCUSDT", "b": "100.0", "B": "2", "a": "100.5", "A": "3"}, timestamp=10.0)
+
+        topo = self.feed.top_of_book("BTC/USDT")
+        self.assertEqual(topo["bid"], 100.0)
+        self.assertEqual(topo["ask"], 100.5)
+        self.assertEqual(topo["bid_qty"], 2.0)
+        self.assertAlmostEqual(topo["spread"], 0.005)
+        self.assertEqual(topo["timestamp"], 10.0)
+
+    def test_depth_parcial_no_stream_combinado(self):
+        """Testa mensagem depth5 embrulhada no formato de stream combinado"""
+        self.feed.aplicar_mensagem({
+            "stream": "ethusdt@depth5@100ms",
+            "data": {
+                "lastUpdateId": 7,
+                "bids": [["10.0", "1"], ["9.9", "2"]],
+                "asks": [["10.1", "1"], ["10.2", "5"]]
+            }
+        }, timestamp=5.0)
+
+        livro = self.feed.livro("ETH/USDT")
+        self.assertEqual(livro["bids"], [[10.0, 1.0], [9.9, 2.0]])
+        self.assertEqual(livro["asks"][1], [10.2, 5.0])
+        self.assertEqual(self.feed.top_of_book("ETH/USDT")["ask"], 10.1)
+
+    def test_depth_update_ignorado(self):
+        """Testa se diferenças depthUpdate (sem snapshot nem sequência) não alteram o book"""
+        self.feed.aplicar_mensagem({"s": "BTCUSDT", "b": "100", "B": "1", "a": "101", "A": "1"})
+        self.feed.aplicar_mensagem({"e": "depthUpdate", "s": "BTCUSDT", "U": 5, "u": 6, "b": [["100", "0"]], "a": []})
+
+        self.assertEqual(self.feed.top_of_book("BTC/USDT")["bid"], 100.0)
+        self.assertEqual(self.feed.mensagens_processadas, 1)
+
+    def test_par_nao_inscrito_ignorado(self):
+        """Testa se mensagens de pares não inscritos são ignoradas e não contam como processadas"""
+        self.feed.aplicar_mensagem({"s": "SOLUSDT", "b": "1", "B": "1", "a": "2", "A": "1"})
+        self.feed.aplicar_mensagem({"stream": "solusdt@depth5@100ms",
+                                    "data": {"lastUpdateId": 1, "bids": [["1", "1"]], "asks": [["2", "1"]]}})
+
+        self.assertIsNone(self.feed.top_of_book("SOL/USDT"))
+        self.assertEqual(self.feed.mensagens_processadas, 0)
+
+    def test_idade_e_staleness(self):
+        """Testa o cálculo de idade por par"""
+        self.feed.aplicar_mensagem({"s": "BTCUSDT", "b": "1", "B": "1", "a": "2", "A": "1"}, timestamp=100.0)
+
+        self.assertEqual(self.feed.idade("BTC/USDT", agora=101.5), 1.5)
+        self.assertTrue(self.feed.esta_atualizado("BTC/USDT", 2.0, agora=101.5))
+        self.assertFalse(self.feed.esta_atualizado("BTC/USDT", 1.0, agora=101.5))
+        self.assertIsNone(self.feed.idade("ETH/USDT"))
+
+    def test_replay_em_thread(self):
+        """Testa o consumo de uma fonte de replay pela thread do feed"""
+        mensagens = [
+            {"s": "BTCUSDT", "b": str(100 + i), "B": "1", "a": str(101 + i), "A": "1"}
+            for i in range(50)
+        ]
+        feed = BookFeed(FonteReplay(mensagens))
+        feed.inscrever(["BTC/USDT"])
+        feed.iniciar()
+        feed._thread.join(5)
+
+        self.assertEqual(feed.mensagens_processadas, 50)
+        self.assertEqual(feed.top_of_book("BTC/USDT")["bid"], 149.0)
+
+    def test_scanner_ignora_book_velho(self):
+        """Testa se o scanner via feed descarta pares desatualizados"""
+        self.feed.aplicar_mensagem({"s": "BTCUSDT", "b": "100", "B": "1", "a": "101", "A": "1"})
+        self.feed.aplicar_mensagem({"s": "ETHUSDT", "b": "10", "B": "1", "a": "11", "A": "1"}, timestamp=0.0)
+
+        oportunidades = escanear_spreads_feed(self.feed, ["BTC/USDT", "ETH/USDT"], 0.003, max_idade=2.0)
+
+        self.assertIn("BTC/USDT", oportunidades)
+        self.assertNotIn("ETH/USDT", oportunidades)
+
+
+if __name__ == '__main__':
+    unittest.main()
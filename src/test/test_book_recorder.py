@@ -0,0 +1,128 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.book_recorder import GravadorBooks, LeitorBooks, LINHAS_POR_BLOCO
+
+DIA = 1714521600.0  # 2024-05-01 00:00:00 UTC
+
+
+def _niveis(preco, passo, n=3):
+    return [[preco + i * passo, 1.0 + i] for i in range(n)]
+
+
+class TestBookRecorder(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.base = self.pasta.name
+        self.gravador = GravadorBooks(self.base, niveis=3)
+
+    def tearDown(self):
+        self.gravador.parar()
+        self.pasta.cleanup()
+
+    def test_grava_colunas_e_le_como_memmap(self):
+        """Testa se os snapshots viram colunas de largura fixa lidas sem cópia, com NaN nos níveis ausentes"""
+        self.gravador.registrar("BTC/USDT", DIA + 1, _niveis(100.0, -0.1), _niveis(100.5, 0.1))
+        self.gravador.registrar("BTC/USDT", DIA + 2, _niveis(101.0, -0.1, n=2), _niveis(101.5, 0.1))
+        self.gravador.registrar("ETH/USDT", DIA + 1, _niveis(50.0, -0.1), _niveis(50.2, 0.1))
+
+        self.assertEqual(self.gravador.flush(), 3)
+
+        leitor = LeitorBooks(self.base)
+        self.assertEqual(leitor.dias(), ["2024-05-01"])
+        self.assertEqual(leitor.pares("2024-05-01"), ["BTC/USDT", "ETH/USDT"])
+        colunas = leitor.carregar("2024-05-01", "BTC/USDT")
+        self.assertIsInstance(colunas["bid_px"], np.memmap)
+        self.assertEqual(colunas["bid_px"].shape, (2, 3))
+        self.assertEqual(colunas["timestamp"].tolist(), [DIA + 1, DIA + 2])
+        self.assertEqual(colunas["symbol_id"].tolist(), [leitor.symbols()["BTC/USDT"]] * 2)
+        self.assertTrue(np.isnan(colunas["bid_px"][1, 2]))
+        self.assertEqual(colunas["ask_qty"][0].tolist(), [1.0, 2.0, 3.0])
+
+    def test_buffer_limitado_descarta_os_mais_antigos(self):
+        """Testa se o buffer cheio descarta os snapshots mais antigos e conta os descartes"""
+        gravador = GravadorBooks(self.base, niveis=1, capacidade=2)
+        for i in range(5):
+            gravador.registrar("BTC/USDT", DIA + i, [[100.0, 1.0]], [[101.0, 1.0]])
+
+        self.assertEqual(gravador.descartados, 3)
+        gravador.parar()
+        self.assertEqual(LeitorBooks(self.base).carregar("2024-05-01", "BTC/USDT")["timestamp"].tolist(),
+                         [DIA + 3, DIA + 4])
+
+    def test_intervalo_usa_indice_de_blocos(self):
+        """Testa a busca por intervalo de tempo em vários blocos e lotes"""
+        total = 3 * LINHAS_POR_BLOCO + 10
+        for lote in range(0, total, 700):
+            for i in range(lote, min(lote + 700, total)):
+                self.gravador.registrar("BTC/USDT", DIA + i, [[100.0, 1.0]], [[101.0, 1.0]])
+            self.gravador.flush()
+
+        leitor = LeitorBooks(self.base)
+        indice = np.fromfile(os.path.join(self.base, "2024-05-01", "BTCUSDT", "indice.f8"))
+        self.assertEqual(indice.tolist(), [DIA + i * LINHAS_POR_BLOCO for i in range(4)])
+
+        fatia = leitor.intervalo("2024-05-01", "BTC/USDT", DIA + 1500, DIA + 2100.5)
+        self.assertEqual(fatia["timestamp"][0], DIA + 1500)
+        self.assertEqual(fatia["timestamp"][-1], DIA + 2100)
+        self.assertEqual(len(fatia["timestamp"]), 601)
+
+    def test_virada_do_dia_e_snapshots_do_backtest(self):
+        """Testa a troca de pasta na virada do dia e a leitura em ordem de tempo no formato do backtest"""
+        self.gravador.registrar("BTC/USDT", DIA - 1, [[99.0, 1.0]], [[99.5, 1.0]])
+        self.gravador.registrar("BTC/USDT", DIA + 5, [[100.0, 1.0]], [[100.5, 1.0]])
+        self.gravador.registrar("ETH/USDT", DIA + 3, [[50.0, 2.0]], [[50.1, 2.0]])
+        self.gravador.flush()
+
+        leitor = LeitorBooks(self.base)
+        self.assertEqual(leitor.dias(), ["2024-04-30", "2024-05-01"])
+        snapshots = list(leitor.snapshots())
+        self.assertEqual([s["timestamp"] for s in snapshots], [DIA - 1, DIA + 3, DIA + 5])
+        self.assertEqual(snapshots[1], {"timestamp": DIA + 3, "symbol": "ETH/USDT",
+                                        "bids": [[50.0, 2.0]], "asks": [[50.1, 2.0]]})
+
+    def test_linha_incompleta_e_descartada_ao_reabrir(self):
+        """Testa se uma gravação interrompida no meio de uma linha é corrigida ao reabrir"""
+        self.gravador.registrar("BTC/USDT", DIA + 1, [[100.0, 1.0]], [[101.0, 1.0]])
+        self.gravador.parar()
+        with open(os.path.join(self.base, "2024-05-01", "BTCUSDT", "timestamp.f8"), "ab") as f:
+            f.write(b"\x00" * 8)
+
+        self.assertEqual(len(LeitorBooks(self.base).carregar("2024-05-01", "BTC/USDT")["timestamp"]), 1)
+        self.gravador = GravadorBooks(self.base, niveis=3)
+        self.gravador.registrar("BTC/USDT", DIA + 2, [[100.0, 1.0]], [[101.0, 1.0]])
+        self.gravador.flush()
+        self.assertEqual(LeitorBooks(self.base).carregar("2024-05-01", "BTC/USDT")["timestamp"].tolist(),
+                         [DIA + 1, DIA + 2])
+
+    def test_indice_curto_refeito_ao_reabrir(self):
+        """Testa se entradas do índice perdidas depois das colunas são refeitas a partir dos timestamps"""
+        for i in range(2 * LINHAS_POR_BLOCO + 10):
+            self.gravador.registrar("BTC/USDT", DIA + i, [[100.0, 1.0]], [[101.0, 1.0]])
+        self.gravador.parar()
+        caminho_indice = os.path.join(self.base, "2024-05-01", "BTCUSDT", "indice.f8")
+        # Perde a última entrada inteira e metade da penúltima
+        os.truncate(caminho_indice, 8 + 4)
+
+        self.gravador = GravadorBooks(self.base, niveis=3)
+        for i in range(2 * LINHAS_POR_BLOCO + 10, 3 * LINHAS_POR_BLOCO + 5):
+            self.gravador.registrar("BTC/USDT", DIA + i, [[100.0, 1.0]], [[101.0, 1.0]])
+        self.gravador.flush()
+
+        indice = np.fromfile(caminho_indice, dtype=np.float64)
+        self.assertEqual(indice.tolist(), [DIA + k * LINHAS_POR_BLOCO for k in range(4)])
+        fatia = LeitorBooks(self.base).intervalo("2024-05-01", "BTC/USDT", DIA + 3000, DIA + 3010)
+        self.assertEqual(fatia["timestamp"].tolist(), [DIA + i for i in range(3000, 3010)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,7 +25,7 @@ class TestCanceladorOrdens(unittest.TestCase):
     def test_cancelar_ordens_pendentes_sem_ordens(self, mock_getenv, mock_exchange_executor, mock_log_service, mock_db_repo):
         """Testa quando não há ordens pendentes"""
         # Configurar mocks
-        mock_getenv.side_effect = lambda x: "fake_key" if "API_KEY" in x else "fake_secret"
+        mock_getenv.side_effect = lambda x, default=None: "fake_key" if "API_KEY" in x else "fake_secret"
         mock_db_repo.return_value = self.mock_db
         mock_log_service.return_value = self.mock_log
         mock_exchange_executor.return_value = self.mock_executor
@@ -50,7 +50,7 @@ class TestCanceladorOrdens(unittest.TestCase):
     def test_cancelar_ordens_pendentes_com_ordem_timeout(self, mock_datetime, mock_getenv, mock_exchange_executor, mock_log_service, mock_db_repo):
         """Testa cancelamento de ordem com timeout"""
         # Configurar mocks
-        mock_getenv.side_effect = lambda x: "fake_key" if "API_KEY" in x else "fake_secret"
+        mock_getenv.side_effect = lambda x, default=None: "fake_key" if "API_KEY" in x else "fake_secret"
         mock_db_repo.return_value = self.mock_db
         mock_log_service.return_value = self.mock_log
         mock_exchange_executor.return_value = self.mock_executor
@@ -86,7 +86,7 @@ class TestCanceladorOrdens(unittest.TestCase):
     def test_cancelar_ordens_pendentes_ordem_ja_executada(self, mock_datetime, mock_getenv, mock_exchange_executor, mock_log_service, mock_db_repo):
         """Testa quando a ordem já foi executada"""
         # Configurar mocks
-        mock_getenv.side_effect = lambda x: "fake_key" if "API_KEY" in x else "fake_secret"
+        mock_getenv.side_effect = lambda x, default=None: "fake_key" if "API_KEY" in x else "fake_secret"
         mock_db_repo.return_value = self.mock_db
         mock_log_service.return_value = self.mock_log
         mock_exchange_executor.return_value = self.mock_executor
@@ -120,7 +120,7 @@ class TestCanceladorOrdens(unittest.TestCase):
     def test_cancelar_ordens_pendentes_erro_na_api(self, mock_datetime, mock_getenv, mock_exchange_executor, mock_log_service, mock_db_repo):
         """Testa quando há erro na API da exchange"""
         # Configurar mocks
-        mock_getenv.side_effect = lambda x: "fake_key" if "API_KEY" in x else "fake_secret"
+        mock_getenv.side_effect = lambda x, default=None: "fake_key" if "API_KEY" in x else "fake_secret"
         mock_db_repo.return_value = self.mock_db
         mock_log_service.return_value = self.mock_log
         mock_exchange_executor.return_value = self.mock_executor
@@ -154,7 +154,7 @@ class TestCanceladorOrdens(unittest.TestCase):
     def test_cancelar_ordens_pendentes_ordem_recente(self, mock_datetime, mock_getenv, mock_exchange_executor, mock_log_service, mock_db_repo):
         """Testa quando a ordem é recente e não deve ser cancelada"""
         # Configurar mocks
-        mock_getenv.side_effect = lambda x: "fake_key" if "API_KEY" in x else "fake_secret"
+        mock_getenv.side_effect = lambda x, default=None: "fake_key" if "API_KEY" in x else "fake_secret"
         mock_db_repo.return_value = self.mock_db
         mock_log_service.return_value = self.mock_log
         mock_exchange_executor.return_value = self.mock_executor
@@ -186,7 +186,7 @@ class TestCanceladorOrdens(unittest.TestCase):
     def test_cancelar_ordens_pendentes_multiplas_ordens(self, mock_datetime, mock_getenv, mock_exchange_executor, mock_log_service, mock_db_repo):
         """Testa cancelamento de múltiplas ordens"""
         # Configurar mocks
-        mock_getenv.side_effect = lambda x: "fake_key" if "API_KEY" in x else "fake_secret"
+        mock_getenv.side_effect = lambda x, default=None: "fake_key" if "API_KEY" in x else "fake_secret"
         mock_db_repo.return_value = self.mock_db
         mock_log_service.return_value = self.mock_log
         mock_exchange_executor.return_value = self.mock_executor
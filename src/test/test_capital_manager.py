@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+import threading
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controle.capital_manager import CapitalManager
+
+
+class TestCapitalManager(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.capital = CapitalManager({"BTC/USDT": 10, "ETH/USDT": 10}, limite_global=15)
+
+    def test_reserva_atomica_sob_concorrencia(self):
+        """Testa se threads concorrentes nunca reservam além do limite do par"""
+        reservas = []
+        barreira = threading.Barrier(20)
+
+        def tentar():
+            barreira.wait()
+            reserva = self.capital.tentar_reservar("BTC/USDT", 1)
+            if reserva is not None:
+                reservas.append(reserva)
+
+        threads = [threading.Thread(target=tentar) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(reservas), 10)
+        self.assertEqual(self.capital.snapshot()["recusas"], 10)
+        self.assertEqual(self.capital.capital_em_uso["BTC/USDT"], 10)
+
+    def test_limite_global(self):
+        """Testa se o limite global vale junto com o limite de cada par"""
+        self.assertIsNotNone(self.capital.tentar_reservar("BTC/USDT", 8))
+        self.assertIsNone(self.capital.tentar_reservar("ETH/USDT", 8))
+        self.assertIsNotNone(self.capital.tentar_reservar("ETH/USDT", 7))
+        self.assertEqual(self.capital.folgas(["BTC/USDT", "ETH/USDT"]), [0, 0])
+
+    def test_liberacao_idempotente_e_context_manager(self):
+        """Testa se liberar duas vezes não devolve capital a mais e se o bloco with libera na exceção"""
+        reserva = self.capital.tentar_reservar("BTC/USDT", 6)
+        outra = self.capital.tentar_reservar("BTC/USDT", 4)
+        reserva.liberar()
+        reserva.liberar()
+        self.assertEqual(self.capital.capital_em_uso["BTC/USDT"], 4)
+
+        with self.assertRaises(RuntimeError):
+            with outra:
+                raise RuntimeError("falha no ciclo")
+        self.assertFalse(outra.ativa)
+        self.assertEqual(self.capital.capital_em_uso["BTC/USDT"], 0)
+
+    def test_snapshot(self):
+        """Testa se o snapshot é uma cópia com uso, folga e reservas ativas"""
+        self.capital.tentar_reservar("ETH/USDT", 3)
+
+        snapshot = self.capital.snapshot()
+        snapshot["por_par"]["ETH/USDT"]["em_uso"] = 99
+
+        self.assertEqual(self.capital.snapshot()["por_par"]["ETH/USDT"], {"em_uso": 3, "limite": 10, "folga": 7})
+        self.assertEqual(snapshot["total_em_uso"], 3)
+        self.assertEqual(snapshot["reservas_ativas"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
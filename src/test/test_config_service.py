@@ -0,0 +1,85 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config_service import ConfigService, ConfigSnapshot, ConfigInvalidaError
+
+CONFIG_BASE = {
+    "dry_run": True,
+    "quantidade_padrao": 0.001,
+    "spread_alvo": 0.003,
+    "slippage_tolerancia": 0.0003,
+    "intervalo_execucao": 5,
+    "limites_capital": {"BTC/USDT": 5},
+    "quantidades_personalizadas": {"BTC/USDT": 0.0005},
+    "pares": ["BTC/USDT"]
+}
+
+
+class TestConfigService(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "config.json")
+        self._gravar(CONFIG_BASE)
+        self.service = ConfigService(self.caminho, intervalo_verificacao=0)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _gravar(self, dados, mtime=None):
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            f.write(dados if isinstance(dados, str) else json.dumps(dados))
+        if mtime is not None:
+            os.utime(self.caminho, ns=(mtime, mtime))
+
+    def test_snapshot_imutavel(self):
+        """Testa se o snapshot não pode ser alterado"""
+        config = self.service.atual()
+
+        self.assertEqual(config["pares"], ("BTC/USDT",))
+        self.assertEqual(config.quantidade_para("BTC/USDT"), 0.0005)
+        self.assertEqual(config.quantidade_para("ETH/USDT"), 0.001)
+        with self.assertRaises(TypeError):
+            config["limites_capital"]["BTC/USDT"] = 100
+        with self.assertRaises(AttributeError):
+            config.versao = 2
+
+    def test_mesmo_snapshot_sem_mudanca(self):
+        """Testa se o arquivo não é relido quando o mtime não muda"""
+        self.assertIs(self.service.atual(), self.service.atual())
+
+    def test_recarrega_quando_arquivo_muda(self):
+        """Testa se uma edição no arquivo gera um novo snapshot com versão nova"""
+        antigo = self.service.atual()
+        self._gravar(dict(CONFIG_BASE, spread_alvo=0.01), mtime=antigo.mtime + 10**9)
+
+        novo = self.service.atual()
+
+        self.assertEqual(novo["spread_alvo"], 0.01)
+        self.assertEqual(novo.versao, antigo.versao + 1)
+        self.assertEqual(antigo["spread_alvo"], 0.003)
+
+    def test_arquivo_invalido_mantem_snapshot(self):
+        """Testa se um arquivo inválido é ignorado e o snapshot anterior continua valendo"""
+        antigo = self.service.atual()
+        self._gravar(dict(CONFIG_BASE, spread_alvo="alto"), mtime=antigo.mtime + 10**9)
+
+        self.assertIs(self.service.atual(), antigo)
+
+    def test_validacao(self):
+        """Testa se chaves ausentes e valores inválidos são reportados"""
+        with self.assertRaises(ConfigInvalidaError) as ctx:
+            ConfigSnapshot({"dry_run": "sim", "quantidade_padrao": -1})
+        self.assertIn("dry_run", str(ctx.exception))
+        self.assertIn("pares", str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
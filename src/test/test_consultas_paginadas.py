@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_repository import DatabaseRepository
+
+
+class TestConsultasPaginadas(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.db = DatabaseRepository(":memory:")
+        for i in range(25):
+            par = "BTC/USDT" if i % 2 == 0 else "ETH/USDT"
+            self.db.save_trade(par, "buy", 100.0 + i, 0.1, rebate=0, pnl=0)
+            self.db.registrar_evento("ciclo_iniciado", par, f"evento {i}")
+
+    def tearDown(self):
+        self.db.close()
+
+    def _plano(self, sql, parametros):
+        return " ".join(linha[-1] for linha in self.db.conn.execute("EXPLAIN QUERY PLAN " + sql, parametros))
+
+    def test_indices_criados(self):
+        """Testa se a tabela de ordens abertas e os índices por par/tempo existem"""
+        nomes = {linha[0] for linha in self.db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+        self.assertTrue({"idx_trades_symbol_timestamp", "idx_eventos_par_timestamp",
+                         "idx_ordens_abertas_symbol_created"} <= nomes)
+        self.assertIn("USING INDEX idx_eventos_par_timestamp", self._plano(
+            "SELECT * FROM eventos WHERE par = ? AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 5",
+            ("BTC/USDT", "9999", 1)))
+
+    def test_trades_desde_id_em_paginas(self):
+        """Testa se o iterador continua de onde parou, página a página, sem repetir linhas"""
+        ids = [linha[0] for linha in self.db.iterar_trades(desde_id=5, tamanho_pagina=4)]
+        self.assertEqual(ids, list(range(6, 26)))
+
+        btc = [linha[0] for linha in self.db.iterar_trades(desde_id=20, symbol="BTC/USDT", tamanho_pagina=2)]
+        self.assertEqual(btc, [21, 23, 25])
+
+    def test_iterador_preguicoso(self):
+        """Testa se o iterador só consulta a próxima página quando é consumido"""
+        iterador = self.db.iterar_trades(tamanho_pagina=10)
+        primeiras = [next(iterador) for _ in range(10)]
+        self.db.save_trade("SOL/USDT", "buy", 10.0, 1.0, rebate=0, pnl=0)
+
+        restantes = list(iterador)
+
+        self.assertEqual(primeiras[-1][0], 10)
+        self.assertEqual(restantes[-1][1], "SOL/USDT")
+
+    def test_ultimos_eventos_e_trades_do_par(self):
+        """Testa os últimos K eventos/trades de um par em ordem cronológica, inclusive com timestamps iguais"""
+        eventos = self.db.ultimos_eventos(3, par="ETH/USDT")
+        self.assertEqual([e[3] for e in eventos], ["evento 19", "evento 21", "evento 23"])
+
+        recentes = list(self.db.iterar_eventos_recentes(par="BTC/USDT", limite=5, tamanho_pagina=2))
+        self.assertEqual([e[3] for e in recentes], ["evento 24", "evento 22", "evento 20", "evento 18", "evento 16"])
+
+        self.assertEqual([t[3] for t in self.db.ultimos_trades(2)], [123.0, 124.0])
+        self.assertEqual(self.db.ultimos_eventos(0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_repository import DatabaseRepository
+
+
+class TestDatabaseRepositoryWriteBehind(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "scalping.db")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _contar(self, tabela):
+        conn = sqlite3.connect(self.caminho)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_grava_em_lote_e_esvazia_no_close(self):
+        """Testa se as linhas enfileiradas são agrupadas em poucas transações e gravadas até o close"""
+        db = DatabaseRepository(self.caminho, write_behind=True, intervalo_lote=0.05)
+        for i in range(200):
+            db.save_log("INFO", f"linha {i}")
+        db.registrar_evento("buy", "BTC/USDT", "compra", {"preco": 100})
+        db.save_trade("BTC/USDT", "buy", 100.0, 0.1, rebate=0, pnl=0)
+        db.close()
+
+        self.assertEqual(self._contar("logs"), 200)
+        self.assertEqual(self._contar("eventos"), 1)
+        self.assertEqual(self._contar("trades"), 1)
+        self.assertEqual(db.contadores["gravadas"], 202)
+        self.assertLess(db.contadores["lotes"], 20)
+
+    def test_modo_wal_e_leitura_apos_escrita(self):
+        """Testa o journal em WAL e se fetch_trades enxerga os trades ainda na fila"""
+        db = DatabaseRepository(self.caminho, write_behind=True)
+        db.save_trade("ETH/USDT", "sell", 50.0, 1.0, rebate=0.01, pnl=0.2)
+
+        self.assertEqual(len(db.fetch_trades("ETH/USDT")), 1)
+        self.assertEqual(db.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        db.close()
+
+    def test_backpressure_com_fila_cheia(self):
+        """Testa se, com a fila cheia, quem grava espera a fila andar em vez de perder linhas"""
+        db = DatabaseRepository(self.caminho, write_behind=True, capacidade_fila=5, max_lote=2)
+        db._lock.acquire()  # segura a thread de gravação
+        produtor = threading.Thread(target=lambda: [db.save_log("INFO", str(i)) for i in range(30)])
+        produtor.start()
+        produtor.join(0.2)
+        self.assertTrue(produtor.is_alive())
+
+        db._lock.release()
+        produtor.join(5)
+        db.close()
+
+        self.assertGreater(db.contadores["fila_cheia"], 0)
+        self.assertEqual(self._contar("logs"), 30)
+
+    def test_escrita_concorrente_com_close_nao_se_perde(self):
+        """Testa se uma escrita que já passou da checagem de fechamento entra antes do sentinela do close"""
+        db = DatabaseRepository(self.caminho, write_behind=True)
+        dentro, liberar = threading.Event(), threading.Event()
+        put_original = db._fila.put_nowait
+
+        def put_lento(item):
+            # Produtor parado entre a checagem de _fechando e o put
+            dentro.set()
+            liberar.wait(5)
+            put_original(item)
+
+        db._fila.put_nowait = put_lento
+        produtor = threading.Thread(target=db.save_log, args=("INFO", "no limite"))
+        produtor.start()
+        dentro.wait(5)
+        fechamento = threading.Thread(target=db.close)
+        fechamento.start()
+        fechamento.join(0.1)
+        liberar.set()
+        produtor.join(5)
+        fechamento.join(5)
+
+        self.assertFalse(produtor.is_alive() or fechamento.is_alive())
+        self.assertEqual(self._contar("logs"), 1)
+        self.assertEqual(db.contadores["enfileiradas"], db.contadores["gravadas"])
+
+    def test_modo_sincrono_inalterado(self):
+        """Testa se sem write-behind cada escrita é gravada na hora"""
+        db = DatabaseRepository(self.caminho)
+        db.save_log("WARN", "aviso")
+
+        self.assertEqual(self._contar("logs"), 1)
+        self.assertEqual(db.pendentes(), 0)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+
+from services.exchange_executor import ExchangeExecutor
+from services.metricas_endpoint import RegistroMetricas
+from services.rate_limiter import AgendadorRequisicoes
+
+
+class TestExchangeExecutor(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.executor = ExchangeExecutor("key", "secret", agendador=AgendadorRequisicoes(), metricas=RegistroMetricas())
+        self.exchange = MagicMock()
+        self.exchange.fetch_balance.return_value = {"free": {"USDT": 1000.0}}
+        self.executor.exchange = self.exchange
+
+    def test_cancelar_todas_com_endpoint_unico(self):
+        """Testa se cancelar_todas usa uma requisição só quando a exchange tem cancelAllOrders"""
+        self.exchange.has = {"cancelAllOrders": True}
+        self.exchange.cancel_all_orders.return_value = [{"id": "1"}, {"id": "2"}]
+
+        canceladas = self.executor.cancelar_todas("BTC/USDT")
+
+        self.assertEqual(len(canceladas), 2)
+        self.exchange.cancel_all_orders.assert_called_once_with("BTC/USDT")
+        self.exchange.cancel_order.assert_not_called()
+
+    def test_cancelar_todas_sem_endpoint_unico(self):
+        """Testa se sem cancelAllOrders as abertas do par são canceladas uma a uma"""
+        self.exchange.has = {}
+        self.exchange.fetch_open_orders.return_value = [{"id": "1"}, {"id": "2"}]
+        self.exchange.cancel_order.side_effect = lambda order_id, symbol: {"id": order_id, "status": "canceled"}
+
+        canceladas = self.executor.cancelar_todas("ETH/USDT")
+
+        self.assertEqual([o["id"] for o in canceladas], ["1", "2"])
+        self.exchange.fetch_open_orders.assert_called_once_with("ETH/USDT")
+
+    def test_cancelar_todas_em_paralelo_com_falha(self):
+        """Testa se a falha de um par não impede os outros e símbolos repetidos contam uma vez"""
+        self.exchange.has = {"cancelAllOrders": True}
+
+        def cancelar(symbol):
+            if symbol == "SOL/USDT":
+                raise ccxt.NetworkError("timeout")
+            return [{"id": f"{symbol}-1"}]
+
+        self.exchange.cancel_all_orders.side_effect = cancelar
+
+        lote = self.executor.cancelar_todas_em_paralelo(["BTC/USDT", "SOL/USDT", "BTC/USDT", "ETH/USDT"])
+
+        resultados = lote["resultados"]
+        self.assertEqual(sorted(resultados), ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        self.assertEqual(resultados["BTC/USDT"]["canceladas"], 1)
+        self.assertFalse(resultados["SOL/USDT"]["ok"])
+        self.assertIn("timeout", resultados["SOL/USDT"]["erro"])
+        self.assertEqual(self.exchange.cancel_all_orders.call_count, 3)
+
+    def test_cancelar_ordens_em_lote(self):
+        """Testa se cada ordem é cancelada no próprio par e o resultado fica por order_id"""
+        self.exchange.cancel_order.side_effect = lambda order_id, symbol: {"id": order_id, "symbol": symbol}
+
+        lote = self.executor.cancelar_ordens_em_lote([("1", "BTC/USDT"), ("2", "ETH/USDT")])
+
+        self.assertEqual(lote["resultados"]["1"]["resultado"]["symbol"], "BTC/USDT")
+        self.assertEqual(lote["resultados"]["2"]["resultado"]["symbol"], "ETH/USDT")
+        self.assertTrue(all(r["ok"] for r in lote["resultados"].values()))
+
+    def test_simbolos_da_sessao(self):
+        """Testa se os pares com ordens limit ficam registrados mesmo quando o envio falha"""
+        self.exchange.create_limit_buy_order.return_value = {"id": "1"}
+        self.exchange.create_limit_sell_order.side_effect = ccxt.RequestTimeout("sem resposta")
+
+        self.executor.place_limit_order("BTC/USDT", "buy", 100.0, 1.0)
+        with self.assertRaises(ccxt.RequestTimeout):
+            self.executor.place_limit_order("ETH/USDT", "sell", 10.0, 1.0)
+
+        self.assertEqual(self.executor.simbolos_da_sessao(), ["BTC/USDT", "ETH/USDT"])
+
+    def test_preco_do_snapshot_recente_evita_ticker(self):
+        """Testa se o preço do snapshot recente é usado sem fetch_ticker e conta como evitado"""
+        preco = self.executor._preco_atual("BTC/USDT", {"price": 100.0, "timestamp": time.time()})
+
+        self.assertEqual(preco, 100.0)
+        self.exchange.fetch_ticker.assert_not_called()
+        self.assertEqual(self.executor.contadores, {"tickers_buscados": 0, "tickers_evitados": 1})
+
+    def test_snapshot_velho_ou_incompleto_busca_ticker(self):
+        """Testa se snapshot velho, sem preço ou ausente cai no fetch_ticker e conta como buscado"""
+        self.exchange.fetch_ticker.return_value = {"last": 101.0}
+
+        precos = [
+            self.executor._preco_atual("BTC/USDT", {"price": 100.0, "timestamp": time.time() - 5}),
+            self.executor._preco_atual("BTC/USDT", {"price": None, "timestamp": time.time()}),
+            self.executor._preco_atual("BTC/USDT", {"price": 100.0}),
+            self.executor._preco_atual("BTC/USDT"),
+            self.executor._preco_atual("BTC/USDT", {"price": 100.0, "timestamp": time.time() - 5}, idade_maxima=10),
+        ]
+
+        self.assertEqual(precos, [101.0, 101.0, 101.0, 101.0, 100.0])
+        self.assertEqual(self.exchange.fetch_ticker.call_count, 4)
+        self.assertEqual(self.executor.contadores, {"tickers_buscados": 4, "tickers_evitados": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
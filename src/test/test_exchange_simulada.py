@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+
+from simulacao.matching_engine import MatchingEngine
+from simulacao.exchange_simulada import ExchangeSimulada
+from simulacao.relogio import RelogioSimulado
+
+
+class TestMatchingEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.motor = MatchingEngine()
+
+    def test_prioridade_preco_tempo(self):
+        """Testa se o melhor preço executa primeiro e, no mesmo preço, a ordem mais antiga"""
+        primeira, _ = self.motor.inserir_limite("BTC/USDT", "sell", 101.0, 1.0, dono="a")
+        segunda, _ = self.motor.inserir_limite("BTC/USDT", "sell", 101.0, 1.0, dono="b")
+        melhor, _ = self.motor.inserir_limite("BTC/USDT", "sell", 100.0, 1.0, dono="c")
+
+        _, execucoes = self.motor.inserir_limite("BTC/USDT", "buy", 101.0, 1.5, dono="x")
+
+        self.assertEqual([e["maker"]["id"] for e in execucoes], [melhor["id"], primeira["id"]])
+        self.assertEqual(execucoes[1]["amount"], 0.5)
+        self.assertEqual(segunda["remaining"], 1.0)
+
+    def test_cancelada_nao_executa(self):
+        """Testa se ordem cancelada sai do livro"""
+        ordem, _ = self.motor.inserir_limite("BTC/USDT", "buy", 99.0, 1.0)
+        self.motor.cancelar(ordem["id"])
+
+        _, execucoes = self.motor.inserir_limite("BTC/USDT", "sell", 99.0, 1.0)
+
+        self.assertEqual(execucoes, [])
+        self.assertIsNone(self.motor.melhor_preco("BTC/USDT", "buy"))
+
+
+class TestExchangeSimulada(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.relogio = RelogioSimulado()
+        self.venue = ExchangeSimulada(saldos_iniciais={"USDT": 1000.0}, relogio=self.relogio,
+                                      spread_liquidez=0.002, taxa_maker=-0.0001)
+        self.venue.carregar_caminho("BTC/USDT", [100.0, 100.0, 99.0, 99.0])
+
+    def test_ordem_limit_executa_quando_preco_cruza(self):
+        """Testa se a ordem maker é executada ao andar o caminho e recebe rebate"""
+        book = self.venue.fetch_order_book("BTC/USDT")
+        bid = book["bids"][0][0]
+        ordem = self.venue.place_limit_order("BTC/USDT", "buy", bid, 1.0)
+        self.assertEqual(ordem["status"], "open")
+        self.assertAlmostEqual(self.venue.get_balance("USDT"), 1000.0 - bid)
+
+        self.relogio.dormir(2)
+        status = self.venue.fetch_order_status(ordem["id"], "BTC/USDT")
+
+        self.assertEqual(status["status"], "closed")
+        self.assertAlmostEqual(self.venue.get_balance("BTC"), 1.0)
+        fills = self.venue.fetch_order_fills(ordem["id"], "BTC/USDT")
+        self.assertEqual(fills[0]["takerOrMaker"], "maker")
+        self.assertGreater(fills[0]["commission"], 0)
+
+    def test_cancelamento_devolve_saldo(self):
+        """Testa se o cancelamento libera o saldo bloqueado"""
+        ordem = self.venue.place_limit_order("BTC/USDT", "buy", 90.0, 1.0)
+        self.venue.cancel_order(ordem["id"], "BTC/USDT")
+
+        self.assertAlmostEqual(self.venue.get_balance("USDT"), 1000.0)
+        with self.assertRaises(ccxt.OrderNotFound):
+            self.venue.cancel_order(ordem["id"], "BTC/USDT")
+
+    def test_saldo_insuficiente(self):
+        """Testa se ordens acima do saldo livre são recusadas"""
+        with self.assertRaises(ccxt.InsufficientFunds):
+            self.venue.place_limit_order("BTC/USDT", "buy", 99.0, 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
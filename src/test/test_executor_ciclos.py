@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.executor_ciclos import ExecutorCiclos
+
+
+class TestExecutorCiclos(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.liberar = threading.Event()
+        self.executor = ExecutorCiclos(max_simultaneos=2)
+
+    def tearDown(self):
+        self.liberar.set()
+        self.executor.encerrar(timeout=5)
+
+    def _ciclo_bloqueante(self):
+        self.liberar.wait(5)
+
+    def test_mesmo_par_nao_roda_duas_vezes(self):
+        """Testa se um segundo ciclo do mesmo par é recusado enquanto o primeiro está em andamento"""
+        self.assertTrue(self.executor.submeter("BTC/USDT", self._ciclo_bloqueante))
+        self.assertFalse(self.executor.submeter("BTC/USDT", self._ciclo_bloqueante))
+
+        self.liberar.set()
+        self.executor.aguardar_todos(timeout=5)
+
+        self.assertTrue(self.executor.submeter("BTC/USDT", lambda: None))
+
+    def test_limite_de_ciclos_simultaneos(self):
+        """Testa se o limite de ciclos em andamento é respeitado"""
+        self.assertTrue(self.executor.submeter("BTC/USDT", self._ciclo_bloqueante))
+        self.assertTrue(self.executor.submeter("ETH/USDT", self._ciclo_bloqueante))
+        self.assertFalse(self.executor.submeter("SOL/USDT", self._ciclo_bloqueante))
+        self.assertEqual(sorted(self.executor.em_andamento()), ["BTC/USDT", "ETH/USDT"])
+        self.assertEqual(self.executor.pulados, 1)
+
+    def test_pares_diferentes_em_paralelo(self):
+        """Testa se ciclos lentos de pares diferentes rodam ao mesmo tempo"""
+        inicio = time.time()
+        self.executor.submeter("BTC/USDT", time.sleep, 0.2)
+        self.executor.submeter("ETH/USDT", time.sleep, 0.2)
+        self.executor.aguardar_todos(timeout=5)
+
+        self.assertLess(time.time() - inicio, 0.35)
+        self.assertEqual(self.executor.concluidos, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_repository import DatabaseRepository
+from repository.exportacao import ExportadorColunar, carregar_colunas, FORMATO_NPY, FORMATO_PARQUET, pa
+
+
+class TestExportacao(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.destino = os.path.join(self.pasta.name, "export")
+        self.db = DatabaseRepository(":memory:")
+        for i in range(7):
+            self.db.save_trade("BTC/USDT" if i % 2 else "ETH/USDT", "sell", 100.0 + i, 0.1, rebate=0.001, pnl=0.01 * i)
+        self.db.registrar_evento("buy", "BTC/USDT", "compra", {"preco": 100})
+        self.exportador = ExportadorColunar(self.db, self.destino, tamanho_chunk=3, formato=FORMATO_NPY)
+
+    def tearDown(self):
+        self.db.close()
+        self.pasta.cleanup()
+
+    def test_exporta_em_partes_colunares(self):
+        """Testa se cada chunk vira uma parte com um .npy por coluna e tipos próprios para análise"""
+        relatorio = self.exportador.exportar()
+
+        self.assertEqual(relatorio["trades"], {"linhas": 7, "partes": 3, "ultimo_id": 7})
+        self.assertEqual(relatorio["eventos"]["linhas"], 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.destino, "trades"))), 3)
+
+        colunas = carregar_colunas(self.destino, "trades")
+        self.assertEqual(colunas["id"].tolist(), list(range(1, 8)))
+        self.assertEqual(colunas["price"].dtype, np.float64)
+        self.assertEqual(colunas["timestamp"].dtype, np.dtype("datetime64[s]"))
+        self.assertEqual(colunas["symbol"][1], "BTC/USDT")
+        self.assertAlmostEqual(float(colunas["pnl"].sum()), 0.21)
+
+    def test_exportacao_incremental(self):
+        """Testa se a segunda execução só exporta as linhas novas"""
+        self.exportador.exportar()
+        self.db.save_trade("SOL/USDT", "buy", 10.0, 1.0, rebate=0, pnl=0)
+
+        relatorio = self.exportador.exportar(["trades"])
+
+        self.assertEqual(relatorio["trades"], {"linhas": 1, "partes": 1, "ultimo_id": 8})
+        self.assertEqual(self.exportador.estado()["trades"], 8)
+        self.assertEqual(carregar_colunas(self.destino, "trades", ["symbol"])["symbol"][-1], "SOL/USDT")
+
+    def test_parte_unica_aberta_sem_copia(self):
+        """Testa se uma tabela com uma única parte é lida direto do mmap"""
+        ExportadorColunar(self.db, self.destino, formato=FORMATO_NPY).exportar(["eventos"])
+
+        colunas = carregar_colunas(self.destino, "eventos")
+
+        self.assertIsInstance(colunas["id"], np.memmap)
+        self.assertEqual(colunas["detalhe_json"][0], '{"preco": 100}')
+        self.assertEqual(len(carregar_colunas(self.destino, "logs")["id"]), 0)
+
+    def test_texto_longo_nao_infla_a_coluna(self):
+        """Testa se uma mensagem longa ocupa só o próprio tamanho em vez de alargar todas as linhas"""
+        for i in range(200):
+            self.db.save_log("INFO", "curta")
+        self.db.save_log("ERROR", "x" * 4000)
+
+        ExportadorColunar(self.db, self.destino, formato=FORMATO_NPY).exportar(["logs"])
+
+        parte = os.path.join(self.destino, "logs", os.listdir(os.path.join(self.destino, "logs"))[0])
+        self.assertLess(os.path.getsize(os.path.join(parte, "message.bytes.npy")), 200 * 5 + 4000 + 1024)
+        colunas = carregar_colunas(self.destino, "logs", ["message"])
+        self.assertEqual(colunas["message"][0], "curta")
+        self.assertEqual(len(colunas["message"][-1]), 4000)
+
+    @unittest.skipUnless(pa is not None, "pyarrow não instalado")
+    def test_exportacao_parquet(self):
+        """Testa a exportação e a leitura em Parquet, também incremental"""
+        exportador = ExportadorColunar(self.db, self.destino, tamanho_chunk=4, formato=FORMATO_PARQUET)
+        exportador.exportar(["trades"])
+        self.db.save_trade("SOL/USDT", "buy", 10.0, 1.0, rebate=0, pnl=0)
+
+        relatorio = exportador.exportar(["trades"])
+
+        self.assertEqual(relatorio["trades"], {"linhas": 1, "partes": 1, "ultimo_id": 8})
+        self.assertTrue(all(p.endswith(".parquet") for p in os.listdir(os.path.join(self.destino, "trades"))))
+        colunas = carregar_colunas(self.destino, "trades")
+        self.assertEqual(colunas["id"].tolist(), list(range(1, 9)))
+        self.assertEqual(colunas["symbol"][-1], "SOL/USDT")
+        self.assertEqual(colunas["timestamp"].dtype, np.dtype("datetime64[s]"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_repository import DatabaseRepository
+from services.log_service import LogService
+
+
+class TestLogService(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self.pasta.name, "logs", "bot_scalping.log")
+        self.db = DatabaseRepository(":memory:")
+        self.stdout = patch("sys.stdout", new_callable=io.StringIO)
+        self.console = self.stdout.start()
+
+    def tearDown(self):
+        self.stdout.stop()
+        self.db.close()
+        self.pasta.cleanup()
+
+    def _linhas_arquivo(self):
+        with open(self.arquivo, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def _logs_banco(self):
+        return self.db.conn.execute("SELECT level, message FROM logs ORDER BY id").fetchall()
+
+    def test_thresholds_por_destino(self):
+        """Testa se cada destino recebe só os níveis a partir do seu threshold"""
+        log = LogService(self.db, self.arquivo, nivel_console="INFO", nivel_arquivo="DEBUG", nivel_db="WARN")
+        log.debug("detalhe")
+        log.info("ordem enviada")
+        log.warn("slippage alto")
+        log.critical("saldo insuficiente")
+
+        self.assertEqual(len(self._linhas_arquivo()), 4)
+        self.assertTrue(self._linhas_arquivo()[0].startswith("[DEBUG] "))
+        self.assertNotIn("detalhe", self.console.getvalue())
+        self.assertIn("[INFO] ", self.console.getvalue())
+        self.assertEqual(self._logs_banco(), [("WARN", "slippage alto"), ("CRITICAL", "saldo insuficiente")])
+        log.fechar()
+
+    def test_assincrono_escreve_em_lote_ao_drenar(self):
+        """Testa se no modo assíncrono a chamada só empilha e o flush grava tudo num lote"""
+        log = LogService(self.db, self.arquivo, assincrono=True, intervalo=60)
+        for i in range(20):
+            log.info(f"linha {i}")
+
+        self.assertEqual(log.pendentes(), 20)
+        self.assertEqual(self._logs_banco(), [])
+
+        log.flush()
+
+        self.assertEqual(log.pendentes(), 0)
+        self.assertEqual(log.contadores["lotes"], 1)
+        self.assertEqual(len(self._logs_banco()), 20)
+        self.assertTrue(self._linhas_arquivo()[-1].endswith("linha 19"))
+        log.fechar()
+
+    def test_buffer_cheio_descarta_mais_antigo(self):
+        """Testa se o overflow descarta os registros mais antigos e conta por nível"""
+        log = LogService(self.db, self.arquivo, assincrono=True, capacidade=4, intervalo=60)
+        # Segura a thread de escrita para o buffer encher
+        with log._lock_escrita:
+            log.warn("velho")
+            for i in range(5):
+                log.info(f"novo {i}")
+
+        log.fechar()
+
+        self.assertEqual(log.descartados["WARN"], 1)
+        self.assertEqual(log.descartados["INFO"], 1)
+        self.assertEqual(log.total_descartados(), 2)
+        self.assertEqual([m for _, m in self._logs_banco()], ["novo 1", "novo 2", "novo 3", "novo 4"])
+
+    def test_rotacao_por_tamanho(self):
+        """Testa se o arquivo gira ao passar de max_bytes e mantém só `backups` cópias"""
+        log = LogService(self.db, self.arquivo, nivel_console=None, nivel_db=None, max_bytes=200, backups=2)
+        for i in range(30):
+            log.info(f"mensagem {i:02d} " + "x" * 40)
+        log.fechar()
+
+        self.assertGreater(log.contadores["rotacoes"], 2)
+        self.assertTrue(os.path.exists(self.arquivo + ".1"))
+        self.assertTrue(os.path.exists(self.arquivo + ".2"))
+        self.assertFalse(os.path.exists(self.arquivo + ".3"))
+        self.assertLess(os.path.getsize(self.arquivo + ".1"), 400)
+
+    def test_depois_de_fechar_so_console(self):
+        """Testa se logar após fechar (banco já fechado) não quebra e vai só para o console"""
+        log = LogService(self.db, self.arquivo, assincrono=True)
+        log.info("antes")
+        log.fechar()
+        self.db.close()
+
+        log.info("Banco de dados fechado")
+
+        self.assertIn("Banco de dados fechado", self.console.getvalue())
+        self.assertEqual(len(self._linhas_arquivo()), 1)
+
+    def test_nivel_invalido(self):
+        """Testa se um nível desconhecido é recusado"""
+        with self.assertRaises(ValueError):
+            LogService(self.db, self.arquivo, nivel_db="TRACE")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.database_repository import DatabaseRepository
+from repository.manutencao import ManutencaoBanco
+
+AGORA = datetime(2024, 5, 10, 12, 0, 0)
+
+
+class TestManutencao(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "scalping.db")
+        self.pasta_arquivo = os.path.join(self.pasta.name, "arquivo")
+        self.db = DatabaseRepository(self.caminho)
+        with self.db.transacao() as conn:
+            conn.executemany("INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)", [
+                ("INFO", "velho 1", "2024-05-01 10:00:00"),
+                ("WARN", "velho 2", "2024-05-01 11:00:00"),
+                ("INFO", "velho 3", "2024-05-02 09:00:00"),
+                ("INFO", "recente", "2024-05-09 09:00:00"),
+            ])
+            conn.executemany("INSERT INTO eventos (tipo_evento, par, mensagem, timestamp) VALUES (?, ?, ?, ?)", [
+                ("buy", "BTC/USDT", "compra", "2024-04-01 10:00:00"),
+                ("buy", "BTC/USDT", "compra", "2024-04-01 10:05:00"),
+                ("sell", "ETH/USDT", "venda", "2024-05-09 10:00:00"),
+            ])
+        self.manutencao = ManutencaoBanco(self.db, retencao_logs_dias=7, retencao_eventos_dias=30,
+                                          pasta_arquivo=self.pasta_arquivo, tamanho_lote=2)
+
+    def tearDown(self):
+        self.db.close()
+        self.pasta.cleanup()
+
+    def test_timestamp_nulo_nao_trava_a_passada(self):
+        """Testa se linhas com timestamp NULL ficam no banco e as velhas depois delas ainda são arquivadas"""
+        with self.db.transacao() as conn:
+            conn.execute("DELETE FROM logs")
+            conn.executemany("INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)", [
+                ("INFO", "velho 1", "2024-05-01 10:00:00"),
+                ("INFO", "sem data 1", None),
+                ("INFO", "sem data 2", None),
+                ("INFO", "velho 2", "2024-05-02 10:00:00"),
+                ("INFO", "velho 3", "2024-05-03 10:00:00"),
+                ("INFO", "recente", "2024-05-09 09:00:00"),
+            ])
+
+        relatorio = self.manutencao.rodar(agora=AGORA)
+        de_novo = self.manutencao.rodar(agora=AGORA)
+
+        self.assertEqual(relatorio["logs"]["arquivadas"], 3)
+        self.assertEqual(relatorio["logs"]["sem_data"], 2)
+        self.assertEqual(relatorio["logs"]["dias"], ["2024-05-01", "2024-05-02", "2024-05-03"])
+        restantes = self.db.conn.execute("SELECT message FROM logs ORDER BY id").fetchall()
+        self.assertEqual(restantes, [("sem data 1",), ("sem data 2",), ("recente",)])
+        self.assertEqual(de_novo["logs"]["arquivadas"], 0)
+        self.assertEqual(de_novo["logs"]["sem_data"], 2)
+
+    def test_arquiva_resume_e_apaga_em_lotes(self):
+        """Testa se as linhas fora da retenção vão para o arquivo do dia, entram no resumo e saem do banco"""
+        relatorio = self.manutencao.rodar(agora=AGORA)
+
+        self.assertEqual(relatorio["logs"]["arquivadas"], 3)
+        self.assertEqual(relatorio["logs"]["dias"], ["2024-05-01", "2024-05-02"])
+        self.assertEqual(relatorio["eventos"]["arquivadas"], 2)
+        restantes = self.db.conn.execute("SELECT message FROM logs").fetchall()
+        self.assertEqual(restantes, [("recente",)])
+
+        resumo = self.db.conn.execute("SELECT dia, level, linhas, primeiro, ultimo FROM logs_diario ORDER BY dia, level").fetchall()
+        self.assertEqual(resumo[0], ("2024-05-01", "INFO", 1, "2024-05-01 10:00:00", "2024-05-01 10:00:00"))
+        self.assertEqual(len(resumo), 3)
+        self.assertEqual(self.db.conn.execute("SELECT linhas FROM eventos_diario").fetchall(), [(2,)])
+
+        arquivo = sqlite3.connect(os.path.join(self.pasta_arquivo, "arquivo_2024-05-01.db"))
+        self.assertEqual(arquivo.execute("SELECT id, message FROM logs ORDER BY id").fetchall(),
+                         [(1, "velho 1"), (2, "velho 2")])
+        arquivo.close()
+
+    def test_rodar_de_novo_nao_duplica(self):
+        """Testa se uma segunda execução não arquiva nem resume nada de novo"""
+        self.manutencao.rodar(agora=AGORA)
+        relatorio = self.manutencao.rodar(agora=AGORA)
+
+        self.assertEqual(relatorio["logs"]["arquivadas"], 0)
+        self.assertEqual(self.db.conn.execute("SELECT SUM(linhas) FROM logs_diario").fetchone()[0], 3)
+
+    def test_vacuum_incremental_libera_paginas(self):
+        """Testa se as páginas livres depois do arquivamento são devolvidas ao sistema"""
+        with self.db.transacao() as conn:
+            # O arquivamento anda por id e para na primeira linha dentro da retenção
+            conn.execute("DELETE FROM logs WHERE message = 'recente'")
+            conn.executemany("INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)",
+                             [("INFO", "x" * 500, "2024-04-01 00:00:00")] * 2000)
+        self.manutencao.tamanho_lote = 500
+        self.manutencao.paginas_vacuum = 50
+
+        relatorio = self.manutencao.rodar(agora=AGORA)
+
+        self.assertEqual(self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertGreater(relatorio["paginas_liberadas"], 100)
+        self.assertEqual(self.db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_sem_retencao_mantem_tabela(self):
+        """Testa se retenção None não apaga nada"""
+        manutencao = ManutencaoBanco(self.db, retencao_logs_dias=None, retencao_eventos_dias=None,
+                                     pasta_arquivo=self.pasta_arquivo)
+
+        relatorio = manutencao.rodar(agora=AGORA)
+
+        self.assertEqual(relatorio["logs"]["arquivadas"] + relatorio["eventos"]["arquivadas"], 0)
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
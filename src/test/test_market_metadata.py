@@ -0,0 +1,81 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_metadata import (
+    MarketMetadata, info_de_market, ajustar_ao_passo, _passo_e_casas, DECIMAL_PLACES, TICK_SIZE
+)
+from services.exchange_executor import ExchangeExecutor
+
+
+def _market(step, tick=0.01, min_qty=0.001, min_cost=5.0):
+    return {
+        "symbol": "BTC/USDT",
+        "precision": {"amount": step, "price": tick},
+        "limits": {"amount": {"min": min_qty}, "cost": {"min": min_cost}},
+        "active": True,
+    }
+
+
+class _ExchangeFalsa:
+    id = "binance"
+    precisionMode = TICK_SIZE
+
+    def __init__(self):
+        self.cargas = 0
+        self.markets = None
+
+    def load_markets(self, recarregar=False):
+        self.cargas += 1
+        return {"BTC/USDT": _market(0.005)}
+
+    def set_markets(self, markets):
+        self.markets = markets
+
+
+class TestMarketMetadata(unittest.TestCase):
+
+    def test_casas_pela_representacao_decimal_do_passo(self):
+        """Testa se as casas decimais vêm da representação do passo, não de log10"""
+        self.assertEqual(_passo_e_casas(0.005, TICK_SIZE), (0.005, 3))
+        self.assertEqual(_passo_e_casas(0.01, TICK_SIZE), (0.01, 2))
+        self.assertEqual(_passo_e_casas(0.00000001, TICK_SIZE), (0.00000001, 8))
+        self.assertEqual(_passo_e_casas(10, TICK_SIZE), (10.0, 0))
+        self.assertEqual(_passo_e_casas(3, DECIMAL_PLACES), (0.001, 3))
+
+    def test_ajuste_para_baixo_ate_multiplo_do_passo(self):
+        """Testa se a quantidade é arredondada para baixo até um múltiplo exato do passo"""
+        self.assertEqual(ajustar_ao_passo(0.127, 0.005, 3), 0.125)
+        self.assertEqual(ajustar_ao_passo(0.3, 0.1, 1), 0.3)
+        self.assertEqual(ajustar_ao_passo(12.999, 1, 0), 12.0)
+
+    def test_ajustar_quantidade_para_venda_respeita_step(self):
+        """Testa se a venda com step 0.005 não formata para 2 casas fora do passo"""
+        executor = ExchangeExecutor("", "", markets_cache="")
+        info = info_de_market(_market(0.005), TICK_SIZE)
+
+        self.assertEqual(executor.ajustar_quantidade_para_venda(0.127, 1.0, info, 100.0), 0.125)
+        self.assertEqual(executor.ajustar_quantidade_para_venda(0.5, 0.127, info, 100.0), 0.125)
+        with self.assertRaises(ValueError):
+            executor.ajustar_quantidade_para_venda(0.04, 1.0, info, 100.0)
+
+    def test_cache_em_disco_evita_load_markets(self):
+        """Testa se a segunda instância lê os mercados do cache em disco"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "markets_cache.json")
+            primeira = _ExchangeFalsa()
+            MarketMetadata(primeira, caminho_cache=caminho).carregar()
+            segunda = _ExchangeFalsa()
+            metadata = MarketMetadata(segunda, caminho_cache=caminho)
+
+            self.assertEqual(metadata.info("BTC/USDT").casas_quantidade, 3)
+            self.assertEqual((primeira.cargas, segunda.cargas), (1, 0))
+            self.assertIsNotNone(segunda.markets)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+
+from services.metricas_endpoint import RegistroMetricas
+from services.exchange_executor import ExchangeExecutor
+from services.rate_limiter import AgendadorRequisicoes
+
+
+class TestRegistroMetricas(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.registro = RegistroMetricas()
+
+    def test_percentis_por_endpoint_e_simbolo(self):
+        """Testa contagem, peso e percentis aproximados de uma série"""
+        for _ in range(98):
+            self.registro.registrar("fetch_order_book", "BTC/USDT", 0.010, peso=5)
+        self.registro.registrar("fetch_order_book", "BTC/USDT", 0.500, peso=5)
+        self.registro.registrar("fetch_order_book", "BTC/USDT", 1.000, peso=5, erro=True)
+
+        linha = self.registro.snapshot()[0]
+
+        self.assertEqual(linha["chamadas"], 100)
+        self.assertEqual(linha["erros"], 1)
+        self.assertEqual(linha["peso"], 500)
+        self.assertLess(abs(linha["p50"] - 0.010), 0.003)
+        self.assertGreaterEqual(linha["p99"], 0.4)
+        self.assertEqual(linha["max"], 1.0)
+
+    def test_snapshot_com_reset(self):
+        """Testa se o snapshot com resetar=True inicia uma nova janela"""
+        self.registro.registrar("fetch_ticker", "ETH/USDT", 0.02, peso=2)
+        self.registro.registrar("fetch_balance", None, 0.05, peso=20)
+
+        linhas = self.registro.snapshot(resetar=True)
+
+        self.assertEqual([l["endpoint"] for l in linhas], ["fetch_balance", "fetch_ticker"])
+        self.assertEqual(linhas[0]["symbol"], "-")
+        self.assertEqual(self.registro.snapshot(), [])
+
+    def test_executor_registra_chamadas_e_erros(self):
+        """Testa se o ExchangeExecutor registra símbolo, peso e erro de cada chamada"""
+        executor = ExchangeExecutor("key", "secret", agendador=AgendadorRequisicoes(), metricas=self.registro)
+        executor.exchange = MagicMock()
+        executor.exchange.fetch_order.side_effect = ccxt.NetworkError("timeout")
+
+        executor.fetch_order_book("BTC/USDT")
+        with self.assertRaises(ccxt.NetworkError):
+            executor.fetch_order_status("123", "SOL/USDT")
+
+        series = {(l["endpoint"], l["symbol"]): l for l in self.registro.snapshot()}
+        self.assertEqual(series[("fetch_order_book", "BTC/USDT")]["peso"], 5)
+        self.assertEqual(series[("fetch_order", "SOL/USDT")]["erros"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
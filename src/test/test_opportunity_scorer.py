@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanners.opportunity_scorer import pontuar_oportunidades, melhores_oportunidades
+
+
+def _op(bids, asks, timestamp=1700000000.0):
+    bid, ask = bids[0][0], asks[0][0]
+    return {"bid": bid, "ask": ask, "spread": (ask - bid) / bid, "timestamp": timestamp,
+            "bids": bids, "asks": asks}
+
+
+class TestOpportunityScorer(unittest.TestCase):
+
+    def test_spread_ponderado_consumindo_niveis(self):
+        """Testa VWAP dos dois lados, microprice e desequilíbrio para a quantidade do par"""
+        oportunidades = {"BTC/USDT": _op([[100.0, 1.0], [99.0, 3.0]], [[101.0, 1.0], [102.0, 1.0]])}
+
+        linha = pontuar_oportunidades(oportunidades, {"BTC/USDT": 2}, 1)[0]
+
+        # VWAP bid 99,5 e ask 101,5 sobre o mid 100,5
+        self.assertAlmostEqual(linha["spread_ponderado"], 2.0 / 100.5)
+        self.assertAlmostEqual(linha["preenchimento"], 1.0)
+        self.assertAlmostEqual(linha["notional_executavel"], 2 * 100.5)
+        self.assertAlmostEqual(linha["microprice"], 100.5)
+        self.assertAlmostEqual(linha["desequilibrio"], (4.0 - 2.0) / 6.0)
+        self.assertEqual(linha["quantidade"], 2.0)
+        self.assertEqual(linha["timestamp"], 1700000000.0)
+
+    def test_preenchimento_limitado_pelo_lado_mais_raso(self):
+        """Testa se a quantidade acima da profundidade do book é cortada e reduz o score"""
+        oportunidades = {"ETH/USDT": _op([[10.0, 5.0]], [[10.1, 1.0], [10.2, 1.0]])}
+
+        linha = pontuar_oportunidades(oportunidades, {}, 4)[0]
+
+        self.assertAlmostEqual(linha["preenchimento"], 0.5)
+        self.assertAlmostEqual(linha["notional_executavel"], 2 * 10.05)
+        self.assertAlmostEqual(linha["score"], linha["spread_ponderado"] * 0.5)
+        # Só os níveis consumidos entram no VWAP: bid 10,0 e ask 10,15
+        self.assertAlmostEqual(linha["spread_ponderado"], 0.15 / 10.05)
+
+    def test_ranking_por_score(self):
+        """Testa se o spread largo num book raso perde para um spread menor com liquidez"""
+        oportunidades = {
+            "RASO/USDT": _op([[1.0, 0.01]], [[1.02, 0.01]]),
+            "FUNDO/USDT": _op([[1.0, 10.0]], [[1.01, 10.0]]),
+            "APERTADO/USDT": _op([[1.0, 10.0]], [[1.001, 10.0]]),
+        }
+
+        tabela = pontuar_oportunidades(oportunidades, {}, 1)
+
+        self.assertEqual([l["symbol"] for l in tabela], ["FUNDO/USDT", "APERTADO/USDT", "RASO/USDT"])
+        self.assertGreater(tabela[-1]["spread"], tabela[0]["spread"])
+
+    def test_melhores_oportunidades_filtra_e_corta(self):
+        """Testa o corte por preenchimento mínimo e por max_pares"""
+        oportunidades = {
+            "A/USDT": _op([[1.0, 10.0]], [[1.03, 10.0]]),
+            "B/USDT": _op([[1.0, 10.0]], [[1.02, 10.0]]),
+            "C/USDT": _op([[1.0, 10.0]], [[1.01, 10.0]]),
+            "PARCIAL/USDT": _op([[1.0, 0.5]], [[1.05, 0.5]]),
+        }
+
+        completas = melhores_oportunidades(oportunidades, {}, 1)
+        com_parcial = melhores_oportunidades(oportunidades, {}, 1, preenchimento_minimo=0.5)
+        duas = melhores_oportunidades(oportunidades, {}, 1, max_pares=2)
+
+        self.assertEqual([l["symbol"] for l in completas], ["A/USDT", "B/USDT", "C/USDT"])
+        self.assertIn("PARCIAL/USDT", [l["symbol"] for l in com_parcial])
+        self.assertEqual([l["symbol"] for l in duas], ["A/USDT", "B/USDT"])
+
+    def test_sem_niveis_e_vazio(self):
+        """Testa se oportunidade só com topo (sem níveis) fica sem liquidez e a entrada vazia devolve []"""
+        oportunidades = {"XRP/USDT": {"bid": 0.5, "ask": 0.51, "spread": 0.02, "timestamp": 1.0}}
+
+        linha = pontuar_oportunidades(oportunidades, {}, 1)[0]
+
+        self.assertEqual(linha["preenchimento"], 0.0)
+        self.assertEqual(linha["score"], 0.0)
+        self.assertEqual(melhores_oportunidades(oportunidades, {}, 1), [])
+        self.assertEqual(pontuar_oportunidades({}, {}, 1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.order_tracker import OrderTracker
+from core.order_watcher import OrderWatcher, EXECUTADA, PARCIAL, CANCELADA, TIMEOUT
+from simulacao.exchange_simulada import ExchangeSimulada
+from simulacao.relogio import RelogioSimulado
+
+
+def _ordem(ordem_id, status="open", filled=0.0, symbol="BTC/USDT"):
+    return {"id": ordem_id, "symbol": symbol, "status": status, "filled": filled}
+
+
+class TestOrderWatcher(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.relogio = RelogioSimulado()
+        self.executor = MagicMock()
+        self.watcher = OrderWatcher(self.executor, intervalo=1, tempo_max_espera=5, relogio=self.relogio)
+
+    def test_uma_consulta_por_tick_para_varias_ordens(self):
+        """Testa se várias ordens do mesmo par custam uma única consulta de abertas por tick"""
+        self.executor.fetch_open_orders.return_value = [_ordem("1"), _ordem("2"), _ordem("3")]
+        for ordem_id in ("1", "2", "3"):
+            self.watcher.acompanhar(ordem_id, "BTC/USDT")
+
+        self.watcher.verificar()
+
+        self.executor.fetch_open_orders.assert_called_once_with("BTC/USDT")
+        self.executor.fetch_order_status.assert_not_called()
+        self.assertEqual(self.watcher.pendentes, 3)
+
+    def test_ordem_que_sai_das_abertas_resolve_uma_vez(self):
+        """Testa se a ordem ausente das abertas é consultada uma vez e resolvida como executada"""
+        futuro = self.watcher.acompanhar("1", "BTC/USDT")
+        self.watcher.acompanhar("2", "BTC/USDT")
+        self.executor.fetch_open_orders.return_value = [_ordem("2")]
+        self.executor.fetch_order_status.return_value = _ordem("1", "closed", 1.0)
+
+        self.watcher.verificar()
+        self.watcher.verificar()
+
+        self.assertEqual(futuro.result(0)["estado"], EXECUTADA)
+        # No segundo tick só a "2" está pendente e vai pela consulta individual
+        consultas_1 = [c for c in self.executor.fetch_order_status.call_args_list if c.args[0] == "1"]
+        self.assertEqual(len(consultas_1), 1)
+
+    def test_parcial_e_cancelamento_externo(self):
+        """Testa callback de execução parcial e resolução por cancelamento fora do bot"""
+        eventos = []
+        futuro = self.watcher.acompanhar("1", "BTC/USDT", callback=lambda estado, r: eventos.append((estado, r["filled"])))
+
+        self.watcher.aplicar_atualizacao(_ordem("1", "open", 0.4))
+        self.watcher.aplicar_atualizacao(_ordem("1", "canceled", 0.4))
+
+        self.assertEqual(eventos, [(PARCIAL, 0.4), (CANCELADA, 0.4)])
+        self.assertEqual(futuro.result(0)["estado"], CANCELADA)
+
+    def test_timeout(self):
+        """Testa se a ordem que continua aberta é resolvida com TIMEOUT após o prazo"""
+        self.executor.fetch_order_status.return_value = _ordem("1")
+        futuro = self.watcher.acompanhar("1", "BTC/USDT")
+
+        resultado = self.watcher.aguardar(futuro)
+
+        self.assertEqual(resultado["estado"], TIMEOUT)
+        self.assertGreaterEqual(self.relogio.agora(), 5)
+
+    def test_timeout_com_consulta_individual_ainda_aberta(self):
+        """Testa se a ordem ausente das abertas, mas que a consulta individual ainda lê como open, expira no prazo"""
+        self.executor.fetch_open_orders.return_value = [_ordem("2")]
+        self.executor.fetch_order_status.return_value = _ordem("1", "open", 0.2)
+        futuro = self.watcher.acompanhar("1", "BTC/USDT")
+        self.watcher.acompanhar("2", "BTC/USDT")
+
+        resultado = self.watcher.aguardar(futuro)
+
+        self.assertEqual(resultado["estado"], TIMEOUT)
+        self.assertEqual(resultado["ordem"]["status"], "open")
+        self.assertEqual(resultado["filled"], 0.2)
+
+    def test_ordem_unica_usa_consulta_individual(self):
+        """Testa se com uma só ordem pendente o tick é um fetch_order, sem consulta de abertas"""
+        self.executor.fetch_order_status.side_effect = [_ordem("1"), _ordem("1", "closed", 1.0)]
+        futuro = self.watcher.acompanhar("1", "BTC/USDT")
+
+        resultado = self.watcher.aguardar(futuro)
+
+        self.assertEqual(resultado["estado"], EXECUTADA)
+        self.assertEqual(self.executor.fetch_order_status.call_count, 2)
+        self.executor.fetch_open_orders.assert_not_called()
+
+    def test_avisos_vao_para_o_logger(self):
+        """Testa se falhas de consulta são registradas no logger recebido"""
+        logger = MagicMock()
+        watcher = OrderWatcher(self.executor, intervalo=1, tempo_max_espera=5, relogio=self.relogio, logger=logger)
+        self.executor.fetch_open_orders.side_effect = RuntimeError("timeout")
+        watcher.acompanhar("1", "BTC/USDT")
+        watcher.acompanhar("2", "BTC/USDT")
+
+        watcher.verificar()
+
+        self.assertIn("[WATCHER]", logger.warn.call_args.args[0])
+        self.assertIn("timeout", logger.warn.call_args.args[0])
+
+    def test_watcher_compartilhado_entre_trackers(self):
+        """Testa se trackers com o watcher compartilhado em thread esperam juntos com uma consulta por tick"""
+        watcher = OrderWatcher(self.executor, intervalo=0.01, tempo_max_espera=5, logger=MagicMock())
+        abertas = [_ordem("1"), _ordem("2")]
+        status = {"1": "open", "2": "open"}
+        self.executor.fetch_open_orders.side_effect = lambda symbol=None: list(abertas)
+        self.executor.fetch_order_status.side_effect = lambda ordem_id, symbol: _ordem(ordem_id, status[ordem_id], 1.0)
+        trackers = [OrderTracker(self.executor, MagicMock(), MagicMock(), watcher=watcher) for _ in range(2)]
+        resultados = {}
+
+        def esperar(tracker, ordem_id):
+            resultados[ordem_id] = tracker._aguardar_execucao(ordem_id, "BTC/USDT")
+
+        watcher.iniciar()
+        try:
+            threads = [threading.Thread(target=esperar, args=(t, i)) for t, i in zip(trackers, ("1", "2"))]
+            for t in threads:
+                t.start()
+            limite = time.monotonic() + 2
+            while watcher.pendentes < 2 and time.monotonic() < limite:
+                time.sleep(0.005)
+            time.sleep(0.02)
+            chamadas_antes = self.executor.fetch_order_status.call_count
+            time.sleep(0.05)
+            # Com as duas pendentes só a consulta de abertas roda a cada tick
+            self.assertEqual(self.executor.fetch_order_status.call_count, chamadas_antes)
+
+            status.update({"1": "closed", "2": "closed"})
+            abertas.clear()
+            for t in threads:
+                t.join(2)
+        finally:
+            watcher.parar()
+
+        self.assertEqual(resultados, {"1": True, "2": True})
+        self.assertTrue(all(c.args == ("BTC/USDT",) for c in self.executor.fetch_open_orders.call_args_list))
+
+    def test_com_exchange_simulada(self):
+        """Testa o watcher contra a exchange simulada: a ordem maker executa quando o preço cruza"""
+        venue = ExchangeSimulada(saldos_iniciais={"USDT": 1000.0}, relogio=self.relogio)
+        venue.carregar_caminho("BTC/USDT", [100.0, 100.0, 99.0, 99.0])
+        watcher = OrderWatcher(venue, intervalo=1, tempo_max_espera=10, relogio=self.relogio)
+        bid = venue.fetch_order_book("BTC/USDT")["bids"][0][0]
+        ordem = venue.place_limit_order("BTC/USDT", "buy", bid, 1.0)
+
+        resultado = watcher.aguardar(watcher.acompanhar(ordem["id"], "BTC/USDT"))
+
+        self.assertEqual(resultado["estado"], EXECUTADA)
+        self.assertEqual(resultado["filled"], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
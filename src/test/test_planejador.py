@@ -0,0 +1,105 @@
+import unittest
+import os
+import sys
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.planejador import planejar_execucao, rebate_esperado
+from controle.capital_manager import CapitalManager
+
+
+def _op(bid, ask):
+    return {"bid": bid, "ask": ask, "spread": (ask - bid) / bid, "timestamp": 0.0}
+
+
+class TestPlanejador(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.oportunidades = {
+            "BTC/USDT": _op(100.0, 101.0),
+            "ETH/USDT": _op(50.0, 50.2),
+            "SOL/USDT": _op(10.0, 10.001),
+        }
+        self.quantidades = {"BTC/USDT": 0.1, "ETH/USDT": 1.0, "SOL/USDT": 1.0}
+
+    def test_precos_e_pnl_com_as_regras_do_engine(self):
+        """Testa preços com meia slippage, notional e P&L líquido de rebate"""
+        plano, _ = planejar_execucao(self.oportunidades, self.quantidades, 0.001, 0.02, taxa_rebate=0.0001)
+
+        btc = next(linha for linha in plano if linha["symbol"] == "BTC/USDT")
+        self.assertAlmostEqual(btc["preco_compra"], 100.01)
+        self.assertAlmostEqual(btc["preco_venda"], 100.99)
+        self.assertAlmostEqual(btc["notional"], 10.001)
+        self.assertAlmostEqual(btc["rebate_esperado"], 0.0001 * (10.001 + 10.099))
+        self.assertAlmostEqual(btc["pnl_esperado"], 0.098 + btc["rebate_esperado"])
+
+    def test_ranking_e_recusas(self):
+        """Testa ordenação por P&L esperado e motivos de recusa (spread e capital do par)"""
+        capital = CapitalManager({"BTC/USDT": 5, "ETH/USDT": 100, "SOL/USDT": 100})
+
+        plano, tabela = planejar_execucao(self.oportunidades, self.quantidades, 0.001, 0.02,
+                                          capital_manager=capital, spread_alvo=0.001)
+
+        self.assertEqual([linha["symbol"] for linha in plano], ["ETH/USDT"])
+        motivos = {linha["symbol"]: linha["motivo_recusa"] for linha in tabela}
+        self.assertEqual(motivos, {"BTC/USDT": "capital_par", "ETH/USDT": None, "SOL/USDT": "spread"})
+        self.assertEqual(tabela[0]["symbol"], "ETH/USDT")
+
+    def test_capital_total(self):
+        """Testa se as entradas são aceitas em ordem até o notional acumulado estourar o total"""
+        plano, tabela = planejar_execucao(self.oportunidades, self.quantidades, 0.001, 0.0,
+                                          capital_total=55, exigir_lucro=False)
+
+        self.assertEqual([linha["symbol"] for linha in plano], ["ETH/USDT"])
+        self.assertEqual(next(l for l in tabela if l["symbol"] == "BTC/USDT")["motivo_recusa"], "capital_total")
+
+    def test_entrada_grande_nao_bloqueia_as_menores(self):
+        """Testa se a entrada grande que não cabe no total é pulada e a menor seguinte ainda entra"""
+        oportunidades = {"GRANDE/USDT": _op(100.0, 102.0), "PEQUENO/USDT": _op(10.0, 10.1)}
+        quantidades = {"GRANDE/USDT": 1.0, "PEQUENO/USDT": 1.0}
+
+        plano, tabela = planejar_execucao(oportunidades, quantidades, 1.0, 0.0,
+                                          capital_total=30, exigir_lucro=False)
+
+        self.assertEqual(tabela[0]["symbol"], "GRANDE/USDT")
+        self.assertEqual(tabela[0]["motivo_recusa"], "capital_total")
+        self.assertEqual([linha["symbol"] for linha in plano], ["PEQUENO/USDT"])
+
+    def test_rebate_igual_ao_do_trade_engine(self):
+        """Testa se o planejador e o TradeEngine usam a mesma fórmula de rebate"""
+        plano, _ = planejar_execucao({"BTC/USDT": _op(100.0, 101.0)}, {"BTC/USDT": 0.1}, 0.1, 0.02)
+
+        linha = plano[0]
+        self.assertAlmostEqual(
+            linha["rebate_esperado"],
+            rebate_esperado(linha["preco_compra"], linha["preco_venda"], linha["quantidade"])
+        )
+
+    def test_folga_global_como_capital_total(self):
+        """Testa se a folga do limite global corta o plano acumulado em vez de valer inteira para cada par"""
+        capital = CapitalManager({"BTC/USDT": 100, "ETH/USDT": 100, "SOL/USDT": 100}, limite_global=60)
+        capital.tentar_reservar("SOL/USDT", 5)
+
+        plano, tabela = planejar_execucao(self.oportunidades, self.quantidades, 0.001, 0.0,
+                                          capital_manager=capital, capital_total=capital.folga_global(),
+                                          exigir_lucro=False)
+
+        self.assertEqual(capital.folga_global(), 55)
+        self.assertLessEqual(sum(linha["notional"] for linha in plano), 55)
+        self.assertEqual(next(l for l in tabela if l["symbol"] == "BTC/USDT")["motivo_recusa"], "capital_total")
+        self.assertIsNone(CapitalManager({"BTC/USDT": 1}).folga_global())
+
+    def test_lista_do_scorer_e_vazio(self):
+        """Testa entrada no formato do scorer e universo vazio"""
+        lista = [dict(_op(100.0, 101.0), symbol="BTC/USDT")]
+
+        plano, _ = planejar_execucao(lista, {}, 0.01, 0.0)
+
+        self.assertEqual(plano[0]["quantidade"], 0.01)
+        self.assertEqual(planejar_execucao({}, {}, 0.01, 0.0), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ccxt
+
+from services.exchange_executor import ExchangeExecutor
+from services.metricas_endpoint import RegistroMetricas
+from services.rate_limiter import (
+    AgendadorRequisicoes, FilaCheiaError, PENALIDADE_PADRAO, segundos_retry_after,
+    PRIORIDADE_CANCELAMENTO, PRIORIDADE_CONSULTA, PRIORIDADE_SCAN
+)
+
+
+def _aguardar_fila(agendador, tamanho, timeout=2.0):
+    limite = time.monotonic() + timeout
+    while agendador.metricas()["fila"] < tamanho:
+        if time.monotonic() > limite:
+            raise AssertionError(f"Fila não chegou a {tamanho} requisições")
+        time.sleep(0.005)
+
+
+class TestAgendadorRequisicoes(unittest.TestCase):
+
+    def test_reabastecimento_de_tokens(self):
+        """Testa se sem peso disponível a requisição espera o reabastecimento proporcional"""
+        # 10 de peso por segundo
+        agendador = AgendadorRequisicoes(limite_peso=10, janela=1, fator_seguranca=1.0)
+
+        self.assertLess(agendador.adquirir(10), 0.05)
+        espera = agendador.adquirir(3)
+
+        self.assertGreaterEqual(espera, 0.25)
+        self.assertLess(espera, 1.0)
+        self.assertEqual(agendador.metricas()["peso_total"], 13)
+
+    def test_ordem_por_prioridade(self):
+        """Testa se cancelamentos saem antes de consultas e scans enfileirados antes deles"""
+        agendador = AgendadorRequisicoes(limite_peso=1000, janela=1, fator_seguranca=1.0)
+        agendador.penalizar(0.2)
+        ordem = []
+
+        def requisicao(nome, prioridade):
+            agendador.adquirir(1, prioridade)
+            ordem.append(nome)
+
+        threads = []
+        for nome, prioridade in (("scan", PRIORIDADE_SCAN), ("consulta", PRIORIDADE_CONSULTA),
+                                 ("cancelamento", PRIORIDADE_CANCELAMENTO)):
+            t = threading.Thread(target=requisicao, args=(nome, prioridade))
+            t.start()
+            threads.append(t)
+            _aguardar_fila(agendador, len(threads))
+        for t in threads:
+            t.join(2)
+
+        self.assertEqual(ordem, ["cancelamento", "consulta", "scan"])
+
+    def test_fila_cheia_recusa_scan(self):
+        """Testa o backpressure: com a fila cheia o scan é recusado e o cancelamento ainda entra"""
+        agendador = AgendadorRequisicoes(limite_peso=1000, janela=1, fator_seguranca=1.0, max_fila=1)
+        agendador.penalizar(0.2)
+        consulta = threading.Thread(target=agendador.adquirir, args=(1, PRIORIDADE_CONSULTA))
+        consulta.start()
+        _aguardar_fila(agendador, 1)
+
+        with self.assertRaises(FilaCheiaError):
+            agendador.adquirir(1, PRIORIDADE_SCAN)
+        agendador.adquirir(1, PRIORIDADE_CANCELAMENTO)
+        consulta.join(2)
+
+        m = agendador.metricas()
+        self.assertEqual(m["rejeitadas"], 1)
+        self.assertEqual(m["requisicoes"], 2)
+
+    def test_penalidade_pausa_todas_as_requisicoes(self):
+        """Testa se penalizar zera os tokens e segura as requisições pelo tempo indicado"""
+        agendador = AgendadorRequisicoes(limite_peso=1000, janela=1, fator_seguranca=1.0)
+
+        agendador.penalizar(0.2)
+        self.assertTrue(agendador.metricas()["pausado"])
+        espera = agendador.adquirir(1)
+
+        self.assertGreaterEqual(espera, 0.15)
+        self.assertFalse(agendador.metricas()["pausado"])
+        self.assertEqual(agendador.metricas()["penalidades"], 1)
+
+    def test_espera_interrompida_sai_da_fila(self):
+        """Testa se o chamador interrompido na espera (ex.: CTRL+C) tira o ticket e não trava os outros"""
+        agendador = AgendadorRequisicoes(limite_peso=1000, janela=1, fator_seguranca=1.0)
+        agendador.penalizar(0.1)
+        esperar = agendador._cond.wait
+
+        def interromper(timeout=None):
+            agendador._cond.wait = esperar
+            raise KeyboardInterrupt
+
+        agendador._cond.wait = interromper
+        with self.assertRaises(KeyboardInterrupt):
+            agendador.adquirir(1, PRIORIDADE_CANCELAMENTO)
+        self.assertEqual(agendador.metricas()["fila"], 0)
+
+        consulta = threading.Thread(target=agendador.adquirir, args=(1, PRIORIDADE_CONSULTA), daemon=True)
+        consulta.start()
+        consulta.join(2)
+
+        self.assertFalse(consulta.is_alive())
+        self.assertEqual(agendador.metricas()["requisicoes"], 1)
+
+    def test_segundos_retry_after(self):
+        """Testa a leitura do cabeçalho Retry-After e o valor padrão"""
+        self.assertEqual(segundos_retry_after({"Retry-After": "7"}), 7.0)
+        self.assertEqual(segundos_retry_after({"retry-after": "2"}), 2.0)
+        self.assertEqual(segundos_retry_after({"Retry-After": "amanhã"}), PENALIDADE_PADRAO)
+        self.assertEqual(segundos_retry_after(None), PENALIDADE_PADRAO)
+
+    def test_executor_penaliza_com_retry_after(self):
+        """Testa se o ExchangeExecutor usa o Retry-After da resposta 429/418 na penalidade"""
+        agendador = MagicMock()
+        executor = ExchangeExecutor("key", "secret", agendador=agendador, metricas=RegistroMetricas())
+        executor.exchange = MagicMock()
+        executor.exchange.fetch_ticker.side_effect = ccxt.RateLimitExceeded("429")
+        executor.exchange.last_response_headers = {"Retry-After": "12"}
+
+        with self.assertRaises(ccxt.RateLimitExceeded):
+            executor.fetch_ticker("BTC/USDT")
+        executor.exchange.last_response_headers = {}
+        with self.assertRaises(ccxt.RateLimitExceeded):
+            executor.fetch_ticker("BTC/USDT")
+
+        self.assertEqual([c.args[0] for c in agendador.penalizar.call_args_list], [12.0, PENALIDADE_PADRAO])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanners.spread_scanner import escanear_spreads, escanear_spreads_concorrente
+
+
+class ExchangeFalsa:
+    """Order books fixos por par, com latência e contagem de leituras simultâneas"""
+
+    def __init__(self, books, latencia=0.05):
+        self.books = books
+        self.latencia = latencia
+        self.agendador = None  # como o ExchangeExecutor: sem espaçamento manual no modo sequencial
+        self.em_voo = 0
+        self.max_em_voo = 0
+        self._lock = threading.Lock()
+
+    def fetch_order_book(self, par, limit=5):
+        with self._lock:
+            self.em_voo += 1
+            self.max_em_voo = max(self.max_em_voo, self.em_voo)
+        try:
+            time.sleep(self.latencia)
+            book = self.books[par]
+            if isinstance(book, Exception):
+                raise book
+            return book
+        finally:
+            with self._lock:
+                self.em_voo -= 1
+
+
+def _book(bid, ask):
+    return {"bids": [[bid, 1.0], [bid * 0.999, 2.0]], "asks": [[ask, 1.0], [ask * 1.001, 2.0]]}
+
+
+class TestEscanearSpreadsConcorrente(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.books = {
+            "BTC/USDT": _book(100.0, 100.5),   # 0,5%
+            "ETH/USDT": _book(10.0, 10.01),    # 0,1%
+            "SOL/USDT": {"bids": [], "asks": []},
+            "XRP/USDT": RuntimeError("timeout"),
+            "ADA/USDT": _book(1.0, 1.01),      # 1%
+        }
+        self.pares = list(self.books)
+
+    def test_mesmo_resultado_do_sequencial(self):
+        """Testa se o modo concorrente devolve os mesmos pares e spreads do sequencial, na ordem de entrada"""
+        sequencial = escanear_spreads(ExchangeFalsa(self.books, latencia=0), self.pares, 0.003)
+        concorrente = escanear_spreads_concorrente(ExchangeFalsa(self.books, latencia=0), self.pares, 0.003)
+
+        self.assertEqual(list(concorrente), ["BTC/USDT", "ADA/USDT"])
+        self.assertEqual(list(concorrente), list(sequencial))
+        for par in concorrente:
+            self.assertAlmostEqual(concorrente[par]["spread"], sequencial[par]["spread"])
+
+    def test_modo_flexivel_e_pares_com_falha(self):
+        """Testa se o modo flexível inclui spreads baixos e books vazios ou com erro ficam de fora"""
+        oportunidades = escanear_spreads_concorrente(ExchangeFalsa(self.books, latencia=0), self.pares, 0.003,
+                                                     modo_flexivel=True)
+
+        self.assertEqual(list(oportunidades), ["BTC/USDT", "ETH/USDT", "ADA/USDT"])
+        self.assertEqual(len(oportunidades["BTC/USDT"]["bids"]), 2)
+
+    def test_limite_de_workers_e_paralelismo(self):
+        """Testa se as leituras rodam em paralelo sem passar de max_workers simultâneas"""
+        books = {f"P{i}/USDT": _book(100.0, 100.5) for i in range(8)}
+        exchange = ExchangeFalsa(books, latencia=0.1)
+
+        inicio = time.time()
+        oportunidades = escanear_spreads_concorrente(exchange, list(books), 0.003, max_workers=4)
+        tempo = time.time() - inicio
+
+        self.assertEqual(len(oportunidades), 8)
+        self.assertEqual(exchange.max_em_voo, 4)
+        self.assertLess(tempo, 0.6)  # sequencial levaria 0,8s
+
+    def test_gravador_recebe_todos_os_books(self):
+        """Testa se todo book lido vai para o gravador, inclusive os que não viram oportunidade"""
+        gravador = MagicMock()
+
+        escanear_spreads(ExchangeFalsa(self.books, latencia=0), self.pares, 0.003,
+                         concorrente=True, gravador=gravador)
+
+        gravados = sorted(c.args[0] for c in gravador.registrar.call_args_list)
+        self.assertEqual(gravados, ["ADA/USDT", "BTC/USDT", "ETH/USDT"])
+
+    def test_sem_pares(self):
+        """Testa se a lista vazia não cria pool nem falha"""
+        self.assertEqual(escanear_spreads_concorrente(ExchangeFalsa({}), [], 0.003), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
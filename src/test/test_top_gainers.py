@@ -0,0 +1,199 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+# Adiciona o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from top_gainers import TopGainersCache, fetch_from_binance
+
+LISTA = [("SOL/USDT", 12.0), ("ETH/USDT", 5.0)]
+
+
+class TestTopGainersCache(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.pasta = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.pasta.name, "top_gainers.db")
+        self.fetcher = MagicMock(return_value=list(LISTA))
+        self.cache = self._cache()
+
+    def tearDown(self):
+        self.cache.fechar()
+        self.pasta.cleanup()
+
+    def _cache(self, **kwargs):
+        return TopGainersCache(db_path=self.db_path, quote="USDT", fetcher=self.fetcher, **kwargs)
+
+    def _esperar_refresh(self, cache):
+        if cache._thread_refresh:
+            cache._thread_refresh.join(5)
+
+    def test_partida_vazia_nao_bloqueia(self):
+        """Testa se sem memória nem banco a chamada devolve [] e busca em background"""
+        liberar = threading.Event()
+        self.fetcher.side_effect = lambda n: liberar.wait(5) and list(LISTA)
+
+        inicio = time.time()
+        self.assertEqual(self.cache.obter(), [])
+        self.assertLess(time.time() - inicio, 1)
+
+        liberar.set()
+        self._esperar_refresh(self.cache)
+        self.assertEqual(self.cache.obter(), LISTA)
+
+    def test_bloquear_busca_na_partida(self):
+        """Testa se obter(bloquear=True) busca na hora e grava no banco"""
+        self.assertEqual(self.cache.obter(bloquear=True), LISTA)
+        self.assertEqual(self.cache.ler_do_banco(), LISTA)
+
+    def test_dentro_do_ttl_sem_io_e_expirado_serve_antigo(self):
+        """Testa se dentro do TTL não há busca e, expirado, a lista antiga é servida enquanto atualiza"""
+        self.cache.obter(bloquear=True)
+        self.cache.obter()
+        self.assertEqual(self.fetcher.call_count, 1)
+
+        self.cache._expira_em = 0
+        self.fetcher.return_value = [("BTC/USDT", 3.0)]
+        self.assertEqual(self.cache.obter(), LISTA)
+        self._esperar_refresh(self.cache)
+        self.assertEqual(self.cache.obter(), [("BTC/USDT", 3.0)])
+
+    def test_partida_usa_banco(self):
+        """Testa se uma nova instância aproveita a lista válida do banco sem ir à rede"""
+        self.cache.obter(bloquear=True)
+        outro = self._cache()
+        try:
+            self.assertEqual(outro.obter(bloquear=True), LISTA)
+            self.assertEqual(self.fetcher.call_count, 1)
+        finally:
+            outro.fechar()
+
+    def test_falha_entra_em_backoff(self):
+        """Testa se depois de uma busca vazia as chamadas seguintes não repetem a busca até o backoff"""
+        self.fetcher.return_value = []
+
+        self.assertEqual(self.cache.obter(bloquear=True), [])
+        for _ in range(5):
+            self.assertEqual(self.cache.obter(bloquear=True), [])
+            self.assertEqual(self.cache.obter(), [])
+        self._esperar_refresh(self.cache)
+
+        self.assertEqual(self.fetcher.call_count, 1)
+        self.assertTrue(self.cache.em_backoff())
+
+        self.cache._proxima_tentativa = 0
+        self.fetcher.return_value = list(LISTA)
+        self.assertEqual(self.cache.obter(bloquear=True), LISTA)
+        self.assertFalse(self.cache.em_backoff())
+
+
+class TestFetchFromBinance(unittest.TestCase):
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.exchange = MagicMock()
+        # Índice de mercados do ExchangeExecutor já carregado (cache): load_markets não vai à rede
+        self.exchange.mercados.carregamentos_remotos = 0
+        self.exchange.load_markets.return_value = {
+            "SOL/USDT": {"active": True},
+            "ETH/USDT": {"active": True},
+            "BTC/USDT": {"active": True},
+            "DOGE/USDT": {"active": True},
+            "USDC/USDT": {"active": True},
+            "ETH/BTC": {"active": True},
+            "LUNA/USDT": {"active": False},
+        }
+        self.tickers = {
+            "SOL/USDT": {"percentage": 12.0},
+            "ETH/USDT": {"percentage": 5.0},
+            "BTC/USDT": {"percentage": -1.0},
+            "DOGE/USDT": {"percentage": 8.0},
+            "USDC/USDT": {"percentage": 0.1},
+            "ETH/BTC": {"percentage": 30.0},
+        }
+
+    def test_lote_unico_sem_buscas_individuais(self):
+        """Testa se com todos os pares no lote há uma só fetch_tickers e o top N sai filtrado e ordenado"""
+        self.exchange.fetch_tickers.return_value = dict(self.tickers)
+
+        with self.assertLogs("top_gainers", level="INFO") as logs:
+            gainers = fetch_from_binance(2, executor=self.exchange)
+
+        self.assertEqual(gainers, [("SOL/USDT", 12.0), ("DOGE/USDT", 8.0)])
+        self.exchange.fetch_tickers.assert_called_once_with()
+        self.exchange.fetch_ticker.assert_not_called()
+        # Mercados do cache não contam como requisição
+        self.assertIn("com 1 requisições", logs.output[-1])
+
+    def test_pares_fora_do_lote_buscados_individualmente(self):
+        """Testa se só os pares que o lote não trouxe são buscados um a um"""
+        lote = dict(self.tickers)
+        del lote["DOGE/USDT"]
+        self.exchange.fetch_tickers.return_value = lote
+        self.exchange.fetch_ticker.side_effect = lambda symbol: {"percentage": 20.0}
+
+        gainers = fetch_from_binance(10, executor=self.exchange)
+
+        self.assertEqual(gainers, [("DOGE/USDT", 20.0), ("SOL/USDT", 12.0), ("ETH/USDT", 5.0)])
+        self.exchange.fetch_ticker.assert_called_once_with("DOGE/USDT")
+
+    def test_muitos_faltantes_sem_rajada(self):
+        """Testa se um lote incompleto demais não vira uma busca individual por par"""
+        lote = dict(self.tickers)
+        del lote["DOGE/USDT"]
+        del lote["ETH/USDT"]
+        self.exchange.fetch_tickers.return_value = lote
+
+        with patch("top_gainers.MAX_FALTANTES_INDIVIDUAIS", 1):
+            gainers = fetch_from_binance(10, executor=self.exchange)
+
+        self.assertEqual(gainers, [("SOL/USDT", 12.0)])
+        self.exchange.fetch_ticker.assert_not_called()
+
+    def test_falha_individual_ignorada(self):
+        """Testa se o par que falha na busca individual fica de fora sem derrubar o resto"""
+        lote = dict(self.tickers)
+        del lote["DOGE/USDT"]
+        self.exchange.fetch_tickers.return_value = lote
+        self.exchange.fetch_ticker.side_effect = RuntimeError("timeout")
+
+        gainers = fetch_from_binance(10, executor=self.exchange)
+
+        self.assertEqual(gainers, [("SOL/USDT", 12.0), ("ETH/USDT", 5.0)])
+
+    def test_lote_com_erro_nao_busca_individualmente(self):
+        """Testa se a falha da chamada em lote devolve [] sem uma rajada de fetch_ticker"""
+        self.exchange.fetch_tickers.side_effect = RuntimeError("418")
+
+        gainers = fetch_from_binance(10, executor=self.exchange)
+
+        self.assertEqual(gainers, [])
+        self.exchange.fetch_ticker.assert_not_called()
+
+    def test_cache_mantem_lista_quando_o_lote_falha(self):
+        """Testa se, com o lote falhando, o cache continua servindo a lista anterior"""
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.exchange.fetch_tickers.return_value = dict(self.tickers)
+        cache = TopGainersCache(db_path=os.path.join(pasta.name, "tg.db"), quote="USDT",
+                                fetcher=lambda n: fetch_from_binance(n, executor=self.exchange))
+        self.addCleanup(cache.fechar)
+        anterior = cache.obter(bloquear=True)
+
+        self.exchange.fetch_tickers.side_effect = RuntimeError("429")
+        cache._expira_em = 0
+        cache.atualizar()
+
+        self.assertEqual(cache.obter(), anterior)
+        self.assertTrue(cache.em_backoff())
+        self.exchange.fetch_ticker.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
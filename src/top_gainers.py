@@ -5,6 +5,9 @@
 
 import logging
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Tuple
 import os
@@ -17,96 +20,316 @@ logger.setLevel(logging.INFO)
 DB_PATH = os.getenv("DB_PATH", "/home/tiozinho-gamer/domains/defi-scalping/data/top_gainers.db")
 QUOTE = os.getenv("QUOTE", "USDT")
 CACHE_TTL_MINUTES = 30
+BACKOFF_INICIAL = 30  # segundos até tentar de novo após uma busca vazia ou com erro
+BACKOFF_MAXIMO = 600
+
+SQL_CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS top_gainers_cache (
+        symbol TEXT,
+        change_percent REAL,
+        quote TEXT,
+        expires_at DATETIME
+    )
+"""
+SQL_CRIAR_INDICE = """
+    CREATE INDEX IF NOT EXISTS idx_top_gainers_quote_expires
+    ON top_gainers_cache (quote, expires_at)
+"""
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS top_gainers_cache (
-            symbol TEXT,
-            change_percent REAL,
-            quote TEXT,
-            expires_at DATETIME
-        )
-    """)
-    conn.commit()
-    conn.close()
+    _cache_padrao()
 
 def get_cache() -> List[Tuple[str, float]]:
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.execute("""
-            SELECT symbol, change_percent FROM top_gainers_cache
-            WHERE quote = ? AND expires_at > datetime('now')
-            ORDER BY change_percent DESC
-        """, (QUOTE,))
-        results = cursor.fetchall()
-        conn.close()
-        if results:
-            logger.info(f"✅ Cache válido encontrado ({len(results)} ativos)")
-        return results
-    except Exception as e:
-        logger.warning(f"⚠️ Falha ao ler cache: {e}")
-        return []
+    return _cache_padrao().ler_do_banco()
 
 def update_cache(data: List[Tuple[str, float]]):
+    _cache_padrao().salvar_no_banco(data)
+
+STABLECOINS = ['BUSD', 'USDC', 'DAI']
+MAX_WORKERS_FALLBACK = 8
+# Acima disso o lote veio incompleto demais: não vira uma rajada de fetch_ticker
+MAX_FALTANTES_INDIVIDUAIS = 20
+
+
+def _filtrar_pares(symbols) -> List[str]:
+    return [
+        symbol for symbol in symbols
+        if symbol.endswith(f"/{QUOTE}") and
+        not any(stable in symbol for stable in STABLECOINS) and
+        not symbol.startswith(f"{QUOTE}/")
+    ]
+
+
+def _variacao_positiva(ticker):
+    pct = ticker.get("percentage", None) if ticker else None
+    if pct is None:
+        return None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute("DELETE FROM top_gainers_cache WHERE quote = ?", (QUOTE,))
-        expires_at = datetime.utcnow() + timedelta(minutes=CACHE_TTL_MINUTES)
-        for symbol, change in data:
-            conn.execute("""
-                INSERT INTO top_gainers_cache (symbol, change_percent, quote, expires_at)
-                VALUES (?, ?, ?, ?)
-            """, (symbol, change, QUOTE, expires_at))
-        conn.commit()
-        conn.close()
-        logger.info(f"💾 Cache atualizado com {len(data)} top gainers")
-    except Exception as e:
-        logger.warning(f"❌ Falha ao atualizar cache: {e}")
+        pct_float = float(pct)
+    except (ValueError, TypeError):
+        return None
+    return pct_float if pct_float > 0 else None
+
 
-def fetch_from_binance(n=20) -> List[Tuple[str, float]]:
+def _buscar_tickers_individuais(exchange, symbols):
+    """Busca em paralelo os tickers que ficaram de fora da chamada em lote"""
+    def _buscar(symbol):
+        try:
+            return symbol, exchange.fetch_ticker(symbol)
+        except Exception:
+            return symbol, None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS_FALLBACK, len(symbols)))) as pool:
+        return dict(pool.map(_buscar, symbols))
+
+
+def _carregar_mercados(exchange):
+    """
+    Retorna (markets, requisições feitas): zero quando os mercados vieram do cache
+    (índice em disco/memória do ExchangeExecutor ou markets já carregados no ccxt).
+    """
+    mercados = getattr(exchange, 'mercados', None)
+    if mercados is not None:
+        antes = mercados.carregamentos_remotos
+        markets = exchange.load_markets()
+        return markets, mercados.carregamentos_remotos - antes
+    em_memoria = bool(getattr(exchange, 'markets', None))
+    return exchange.load_markets(), 0 if em_memoria else 1
+
+
+def fetch_from_binance(n=20, executor=None) -> List[Tuple[str, float]]:
+    """
+    Busca os top gainers com uma única chamada fetch_tickers (24h de todos os pares)
+    e faz filtro de quote/stablecoins e seleção do top N em memória.
+    Só os poucos símbolos que uma chamada em lote bem-sucedida não trouxe são buscados
+    individualmente, em paralelo. Se o lote falhar, retorna [] (o cache mantém a
+    lista anterior e entra em backoff) em vez de buscar par a par.
+    Se `executor` (ExchangeExecutor) for informado, as requisições passam pelo agendador
+    compartilhado e os mercados vêm do índice em cache.
+    """
     try:
         logger.info("🔄 Buscando top gainers da Binance...")
-        exchange = binance({'enableRateLimit': True})
-        markets = exchange.load_markets()
-        quote_pairs = [
-            symbol for symbol in markets
-            if symbol.endswith(f"/{QUOTE}") and
-            not any(stable in symbol for stable in ['BUSD', 'USDC', 'DAI']) and
-            not symbol.startswith(f"{QUOTE}/")
-        ]
+        inicio = time.time()
+        exchange = executor if executor is not None else binance({'enableRateLimit': True})
+        markets, requisicoes = _carregar_mercados(exchange)
+        quote_pairs = _filtrar_pares(
+            symbol for symbol, market in markets.items()
+            if market.get('active', True) is not False
+        )
+
+        try:
+            tickers = exchange.fetch_tickers()
+            requisicoes += 1
+        except Exception as e:
+            # Exchange falhando ou limitando: buscar par a par só pioraria
+            logger.warning(f"⚠️ Falha no fetch_tickers em lote, mantendo a lista anterior: {e}")
+            return []
+
+        faltantes = [symbol for symbol in quote_pairs if symbol not in tickers]
+        if len(faltantes) > MAX_FALTANTES_INDIVIDUAIS:
+            logger.warning(f"⚠️ {len(faltantes)} pares fora do lote; ignorados sem buscas individuais")
+        elif faltantes:
+            logger.info(f"🔁 {len(faltantes)} pares fora do lote, buscando individualmente...")
+            tickers.update(_buscar_tickers_individuais(exchange, faltantes))
+            requisicoes += len(faltantes)
+
         changes = []
         for symbol in quote_pairs:
-            try:
-                ticker = exchange.fetch_ticker(symbol)
-                pct = ticker.get("percentage", None)
-                if pct is not None:
-                    try:
-                        pct_float = float(pct)
-                        if pct_float > 0:
-                            changes.append((symbol, pct_float))
-                    except (ValueError, TypeError):
-                        continue
-            except Exception:
-                continue
+            pct = _variacao_positiva(tickers.get(symbol))
+            if pct is not None:
+                changes.append((symbol, pct))
 
         sorted_changes = sorted(changes, key=lambda x: x[1], reverse=True)[:n]
-        logger.info(f"✅ Encontrados {len(sorted_changes)} top gainers da Binance")
+        logger.info(
+            f"✅ Encontrados {len(sorted_changes)} top gainers da Binance "
+            f"em {time.time() - inicio:.2f}s com {requisicoes} requisições"
+        )
         return sorted_changes
     except Exception as e:
         logger.error(f"❌ Erro na Binance: {e}")
         return []
 
+class TopGainersCache:
+    """
+    Cache em memória dos top gainers com TTL e stale-while-revalidate:
+    - dentro do TTL devolve a lista em memória, sem I/O
+    - depois do TTL devolve a lista antiga e dispara a atualização em background
+    - sem nada em memória nem no banco, dispara a busca em background e devolve []
+      (obter(bloquear=True) busca na hora, para a partida)
+    - depois de uma busca vazia ou com erro, novas tentativas esperam um backoff exponencial
+    Mantém uma única conexão SQLite para a tabela top_gainers_cache.
+    """
+
+    def __init__(self, db_path=None, quote=None, ttl_minutes=CACHE_TTL_MINUTES, n=20, fetcher=None,
+                 backoff_segundos=BACKOFF_INICIAL):
+        self.db_path = db_path or DB_PATH
+        self.quote = quote or QUOTE
+        self.ttl = ttl_minutes * 60
+        self.n = n
+        self.fetcher = fetcher or fetch_from_binance
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock_db = threading.Lock()
+        self._lock_refresh = threading.Lock()
+        self._dados: List[Tuple[str, float]] = []
+        self._expira_em = 0.0
+        self.backoff_segundos = backoff_segundos
+        self._falhas = 0
+        self._proxima_tentativa = 0.0
+        self._thread_refresh = None
+        self._thread_agendada = None
+        self._parar = threading.Event()
+        with self._lock_db, self._conn:
+            self._conn.execute(SQL_CRIAR_TABELA)
+            self._conn.execute(SQL_CRIAR_INDICE)
+
+    # ---------- banco ----------
+
+    def ler_do_banco(self, incluir_expirados=False) -> List[Tuple[str, float]]:
+        try:
+            filtro = "" if incluir_expirados else "AND expires_at > datetime('now')"
+            with self._lock_db:
+                results = self._conn.execute(f"""
+                    SELECT symbol, change_percent FROM top_gainers_cache
+                    WHERE quote = ? {filtro}
+                    ORDER BY change_percent DESC
+                """, (self.quote,)).fetchall()
+            if results and not incluir_expirados:
+                logger.info(f"✅ Cache válido encontrado ({len(results)} ativos)")
+            return results
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao ler cache: {e}")
+            return []
+
+    def salvar_no_banco(self, data: List[Tuple[str, float]]):
+        try:
+            expires_at = (datetime.utcnow() + timedelta(seconds=self.ttl)).strftime('%Y-%m-%d %H:%M:%S')
+            with self._lock_db, self._conn:
+                self._conn.execute("DELETE FROM top_gainers_cache WHERE quote = ?", (self.quote,))
+                self._conn.executemany("""
+                    INSERT INTO top_gainers_cache (symbol, change_percent, quote, expires_at)
+                    VALUES (?, ?, ?, ?)
+                """, [(symbol, change, self.quote, expires_at) for symbol, change in data])
+            logger.info(f"💾 Cache atualizado com {len(data)} top gainers")
+        except Exception as e:
+            logger.warning(f"❌ Falha ao atualizar cache: {e}")
+
+    # ---------- memória ----------
+
+    def _definir(self, dados, ttl=None):
+        self._dados = list(dados)
+        self._expira_em = time.time() + (self.ttl if ttl is None else ttl)
+
+    def expirado(self):
+        return time.time() >= self._expira_em
+
+    def em_backoff(self):
+        return time.time() < self._proxima_tentativa
+
+    def _registrar_falha(self):
+        self._falhas += 1
+        espera = min(BACKOFF_MAXIMO, self.backoff_segundos * 2 ** (self._falhas - 1))
+        self._proxima_tentativa = time.time() + espera
+        logger.warning(f"⚠️ Top gainers indisponíveis ({self._falhas}x); nova tentativa em {espera:.0f}s")
+
+    def atualizar(self) -> List[Tuple[str, float]]:
+        """Busca a lista na Binance de forma síncrona e atualiza memória e banco"""
+        with self._lock_refresh:
+            try:
+                fresh = self.fetcher(n=self.n)
+            except Exception:
+                self._registrar_falha()
+                raise
+            if fresh:
+                self.salvar_no_banco(fresh)
+                self._definir(fresh)
+                self._falhas = 0
+                self._proxima_tentativa = 0.0
+            else:
+                self._registrar_falha()
+            return fresh
+
+    def atualizar_em_background(self):
+        """Dispara uma atualização em thread, se não houver outra em andamento nem backoff"""
+        if self._thread_refresh and self._thread_refresh.is_alive():
+            return
+        if self.em_backoff():
+            return
+        self._thread_refresh = threading.Thread(target=self._atualizar_seguro, name="top-gainers-refresh", daemon=True)
+        self._thread_refresh.start()
+
+    def _atualizar_seguro(self):
+        try:
+            self.atualizar()
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao atualizar top gainers em background: {e}")
+
+    def obter(self, n=None, bloquear=False) -> List[Tuple[str, float]]:
+        """
+        Nunca vai à rede no caminho de quem chama, exceto com bloquear=True e nada
+        em memória nem no banco (e fora do backoff).
+        """
+        n = n or self.n
+        if self._dados and not self.expirado():
+            return self._dados[:n]
+
+        if not self._dados:
+            # Partida: aproveita o que estiver no banco antes de ir à rede
+            validos = self.ler_do_banco()
+            if validos:
+                self._definir(validos)
+                return self._dados[:n]
+            antigos = self.ler_do_banco(incluir_expirados=True)
+            if antigos:
+                self._definir(antigos, ttl=0)
+            elif bloquear and not self.em_backoff():
+                return self.atualizar()[:n]
+            else:
+                self.atualizar_em_background()
+                return []
+
+        # Stale-while-revalidate: serve a lista antiga e atualiza em paralelo
+        self.atualizar_em_background()
+        return self._dados[:n]
+
+    # ---------- agendamento ----------
+
+    def iniciar_agendamento(self, intervalo_segundos=None):
+        """Atualiza a lista periodicamente em background (por padrão a cada TTL)"""
+        intervalo = intervalo_segundos or self.ttl
+        if self._thread_agendada and self._thread_agendada.is_alive():
+            return
+        self._parar.clear()
+
+        def _loop():
+            while not self._parar.wait(intervalo):
+                self._atualizar_seguro()
+
+        self._thread_agendada = threading.Thread(target=_loop, name="top-gainers-agendado", daemon=True)
+        self._thread_agendada.start()
+
+    def fechar(self):
+        self._parar.set()
+        if self._thread_refresh:
+            self._thread_refresh.join(5)
+        with self._lock_db:
+            self._conn.close()
+
+
+_caches = {}
+_lock_caches = threading.Lock()
+
+def _cache_padrao(n=20) -> TopGainersCache:
+    with _lock_caches:
+        cache = _caches.get((DB_PATH, QUOTE))
+        if cache is None:
+            cache = TopGainersCache(n=n)
+            _caches[(DB_PATH, QUOTE)] = cache
+        elif n > cache.n:
+            cache.n = n
+        return cache
+
 def get_top_gainers(n=20) -> List[Tuple[str, float]]:
-    init_db()
-    cached = get_cache()
-    if cached:
-        return cached
-    fresh = fetch_from_binance(n=n)
-    if fresh:
-        update_cache(fresh)
-        return fresh
-    return []
+    return _cache_padrao(n).obter(n, bloquear=True)
 
 # Teste simples (executando direto)
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+
+CAMINHO_PADRAO = Path(__file__).parent.parent.parent / "config.json"
+INTERVALO_VERIFICACAO = 1.0  # segundos entre consultas ao mtime do arquivo
+
+NUMERO = (int, float)
+
+# chave -> tipos aceitos (bool é subclasse de int, por isso é tratado à parte)
+CHAVES_OBRIGATORIAS = {
+    "dry_run": bool,
+    "quantidade_padrao": NUMERO,
+    "spread_alvo": NUMERO,
+    "slippage_tolerancia": NUMERO,
+    "intervalo_execucao": NUMERO,
+    "limites_capital": dict,
+    "pares": list,
+}
+
+
+NIVEIS_LOG = ("DEBUG", "INFO", "WARN", "ERROR", "CRITICAL")
+
+
+class ConfigInvalidaError(ValueError):
+    pass
+
+
+def _congelar(valor):
+    """dict -> MappingProxyType e list -> tuple, recursivamente"""
+    if isinstance(valor, dict):
+        return MappingProxyType({k: _congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def _e_numero(valor):
+    return isinstance(valor, NUMERO) and not isinstance(valor, bool)
+
+
+def validar_config(dados):
+    """Valida o dict lido do config.json; levanta ConfigInvalidaError com todos os problemas"""
+    if not isinstance(dados, dict):
+        raise ConfigInvalidaError("config.json deve conter um objeto JSON")
+
+    erros = []
+    for chave, tipo in CHAVES_OBRIGATORIAS.items():
+        if chave not in dados:
+            erros.append(f"'{chave}' ausente")
+            continue
+        valor = dados[chave]
+        if tipo is NUMERO:
+            if not _e_numero(valor) or valor < 0:
+                erros.append(f"'{chave}' deve ser um número >= 0")
+        elif not isinstance(valor, tipo):
+            erros.append(f"'{chave}' deve ser do tipo {tipo.__name__}")
+
+    for chave in ("limites_capital", "quantidades_personalizadas"):
+        mapa = dados.get(chave)
+        if isinstance(mapa, dict):
+            for par, valor in mapa.items():
+                if not _e_numero(valor) or valor < 0:
+                    erros.append(f"'{chave}.{par}' deve ser um número >= 0")
+        elif mapa is not None:
+            erros.append(f"'{chave}' deve ser do tipo dict")
+
+    limite_global = dados.get("limite_capital_global")
+    if limite_global is not None and (not _e_numero(limite_global) or limite_global < 0):
+        erros.append("'limite_capital_global' deve ser um número >= 0")
+
+    for chave in ("log_nivel_console", "log_nivel_arquivo", "log_nivel_db"):
+        nivel = dados.get(chave)
+        if nivel is not None and (not isinstance(nivel, str) or nivel.upper() not in NIVEIS_LOG):
+            erros.append(f"'{chave}' deve ser um destes níveis: {', '.join(NIVEIS_LOG)} (ou null)")
+
+    if erros:
+        raise ConfigInvalidaError("Configuração inválida: " + "; ".join(erros))
+
+
+class ConfigSnapshot(Mapping):
+    """
+    Configuração imutável e já validada. Funciona como um dict somente leitura
+    (config["pares"], config.get(...)); dicts internos viram MappingProxyType e
+    listas viram tuplas.
+    """
+
+    __slots__ = ("_dados", "versao", "mtime")
+
+    def __init__(self, dados, versao=1, mtime=None):
+        validar_config(dados)
+        object.__setattr__(self, "_dados", _congelar(dados))
+        object.__setattr__(self, "versao", versao)
+        object.__setattr__(self, "mtime", mtime)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("ConfigSnapshot é imutável")
+
+    def __getitem__(self, chave):
+        return self._dados[chave]
+
+    def __iter__(self):
+        return iter(self._dados)
+
+    def __len__(self):
+        return len(self._dados)
+
+    def __repr__(self):
+        return f"ConfigSnapshot(versao={self.versao}, chaves={list(self._dados)})"
+
+    def quantidade_para(self, symbol):
+        return float(self._dados.get("quantidades_personalizadas", {}).get(symbol, self._dados["quantidade_padrao"]))
+
+
+class ConfigService:
+    """
+    Lê o config.json uma vez e mantém o snapshot atual em memória.
+    atual() é O(1): no máximo uma vez por `intervalo_verificacao` consulta o mtime
+    do arquivo e, se mudou, lê, valida e troca o snapshot atomicamente.
+    Arquivo inválido numa recarga é ignorado (o snapshot anterior continua valendo).
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, intervalo_verificacao=INTERVALO_VERIFICACAO):
+        self.caminho = Path(caminho)
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._snapshot = self._ler(versao=1)
+        self._mtime_visto = self._snapshot.mtime
+        self._proxima_verificacao = time.monotonic() + intervalo_verificacao
+
+    def _ler(self, versao):
+        mtime = os.stat(self.caminho).st_mtime_ns
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        return ConfigSnapshot(dados, versao=versao, mtime=mtime)
+
+    def atual(self):
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return self._snapshot
+        with self._lock:
+            if agora >= self._proxima_verificacao:
+                self._proxima_verificacao = agora + self.intervalo_verificacao
+                self._recarregar_se_mudou()
+        return self._snapshot
+
+    def _recarregar_se_mudou(self):
+        try:
+            mtime = os.stat(self.caminho).st_mtime_ns
+        except OSError as e:
+            print(f"[CONFIG] ⚠️ Não foi possível verificar {self.caminho}: {e}")
+            return
+        if mtime == self._mtime_visto:
+            return
+        # Um arquivo inválido só é relido quando mudar outra vez
+        self._mtime_visto = mtime
+        try:
+            novo = self._ler(versao=self._snapshot.versao + 1)
+        except (OSError, ValueError) as e:
+            # json.JSONDecodeError e ConfigInvalidaError são ValueError
+            print(f"[CONFIG] ⚠️ config.json alterado mas inválido, mantendo versão {self._snapshot.versao}: {e}")
+            return
+        self._snapshot = novo
+        print(f"[CONFIG] 🔄 config.json recarregado (versão {novo.versao})")
+
+    def recarregar(self):
+        """Força a verificação do arquivo agora"""
+        with self._lock:
+            self._proxima_verificacao = time.monotonic() + self.intervalo_verificacao
+            self._recarregar_se_mudou()
+        return self._snapshot
+
+
+class ConfigEstatica:
+    """Mesma interface do ConfigService para uma configuração fixa em memória (backtest, testes)"""
+
+    def __init__(self, dados):
+        self._snapshot = dados if isinstance(dados, ConfigSnapshot) else ConfigSnapshot(dados)
+
+    def atual(self):
+        return self._snapshot
+
+    def recarregar(self):
+        return self._snapshot
+
+
+_config_compartilhada = None
+_lock_config = threading.Lock()
+
+
+def config_compartilhada():
+    """Instância única do processo para quem não recebe um ConfigService explicitamente"""
+    global _config_compartilhada
+    with _lock_config:
+        if _config_compartilhada is None:
+            _config_compartilhada = ConfigService()
+        return _config_compartilhada
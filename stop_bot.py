@@ -38,21 +38,24 @@ def stop_bot():
         print(f"⚠️ Encontradas {len(ordens_abertas)} ordem(s) aberta(s)")
         
         for ordem in ordens_abertas:
-            try:
-                order_id = ordem['id']
-                symbol = ordem['symbol']
-                side = ordem['side']
-                price = ordem['price']
-                amount = ordem['amount']
-                
-                print(f"🛑 Cancelando: {symbol} | {side} | {price} | {amount}")
-                executor.cancel_order(order_id, symbol)
-                print(f"✅ Ordem {order_id} cancelada com sucesso")
-                
-            except Exception as e:
-                print(f"❌ Erro ao cancelar ordem {ordem.get('id')}: {e}")
+            print(f"🛑 Cancelando: {ordem['symbol']} | {ordem['side']} | {ordem['price']} | {ordem['amount']}")
+        
+        # Um cancel-all por símbolo, todos os símbolos em paralelo
+        symbols = sorted({ordem['symbol'] for ordem in ordens_abertas})
+        lote = executor.cancelar_todas_em_paralelo(symbols)
+        
+        falhas = 0
+        for symbol, resultado in lote["resultados"].items():
+            if resultado["ok"]:
+                print(f"✅ {symbol}: {resultado['canceladas']} ordem(s) cancelada(s) em {resultado['tempo']:.2f}s")
+            else:
+                falhas += 1
+                print(f"❌ Erro ao cancelar ordens de {symbol}: {resultado['erro']}")
                 
-        print("🧹 Todas as ordens foram canceladas!")
+        if falhas:
+            print(f"⚠️ {falhas} símbolo(s) com falha. Tempo total: {lote['tempo_total']:.2f}s")
+        else:
+            print(f"🧹 Todas as ordens foram canceladas em {lote['tempo_total']:.2f}s!")
         
     except Exception as e:
         print(f"❌ Erro geral: {e}")